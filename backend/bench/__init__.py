@@ -0,0 +1,6 @@
+"""
+Benchmarks for the backend. Run from the `backend/` directory, e.g.
+
+    python -m bench.importtime
+    python -m bench.offline      # routes + Monster against local stand-ins
+"""
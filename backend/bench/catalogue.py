@@ -0,0 +1,296 @@
+"""
+Synthetic catalogue generator for scale testing.
+
+Produces influencers, products, buy links and watchlist rows that look like
+ours: bilingual (English / Egyptian Arabic) product names and quotes, the
+categories from `main.KNOWN_CATEGORIES`, the real names in `influencers.json`
+first and generated ones after. Output is deterministic
+for a given seed and is streamed into the local PostgREST stand-in's SQLite
+database in chunks, so 1M products fit in memory.
+
+Usage:
+    python -m bench.catalogue --scale 100k --db bench/data/catalogue-100k.sqlite
+    python -m bench.offline --db bench/data/catalogue-100k.sqlite --influencers 20
+"""
+
+import argparse
+import json
+import random
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .postgrest import LocalPostgREST
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+# name: (products, influencers)
+SCALES = {
+    "10k": (10_000, 100),
+    "100k": (100_000, 500),
+    "1m": (1_000_000, 2_000),
+}
+
+CHUNK = 10_000
+
+# category: (brands, product types as (English, Arabic))
+VOCABULARY = {
+    "skincare": (
+        ["The Ordinary", "CeraVe", "La Roche-Posay", "Bioderma", "Eucerin", "Vichy", "Garnier", "Starville", "Bobai", "Luna"],
+        [("Hydrating Cleanser", "غسول مرطب"), ("Vitamin C Serum", "سيروم فيتامين سي"), ("Sunscreen SPF50", "صن بلوك"),
+         ("Night Cream", "كريم ليلي"), ("Micellar Water", "مسيلار ووتر"), ("Niacinamide Serum", "سيروم نياسيناميد"),
+         ("Eye Cream", "كريم تحت العين"), ("Clay Mask", "ماسك طين"), ("Toner", "تونر"), ("Moisturiser", "مرطب")],
+    ),
+    "makeup": (
+        ["Huda Beauty", "Fenty Beauty", "Charlotte Tilbury", "NARS", "Maybelline", "Rare Beauty", "MAC", "Essence", "Flormar", "Note"],
+        [("Matte Lipstick", "روج مط"), ("Lip Gloss", "جلوس"), ("Foundation", "كريم أساس"), ("Concealer", "كونسيلر"),
+         ("Mascara", "ماسكارا"), ("Eyeshadow Palette", "باليت ظلال"), ("Blush", "بلاشر"), ("Highlighter", "هايلايتر"),
+         ("Setting Spray", "سبراي تثبيت"), ("Loose Powder", "بودرة")],
+    ),
+    "haircare": (
+        ["Olaplex", "Moroccanoil", "Kerastase", "Dyson", "Pantene", "L'Oreal", "Raw African", "Hair Burst"],
+        [("Hair Oil", "زيت شعر"), ("Leave-in Conditioner", "ليف إن"), ("Repair Mask", "ماسك شعر"),
+         ("Shampoo", "شامبو"), ("Hair Serum", "سيروم شعر"), ("Styler", "استشوار"), ("Heat Protectant", "حماية من الحرارة")],
+    ),
+    "fragrance": (
+        ["Kayali", "Dior", "Lattafa", "Chanel", "YSL", "Arabian Oud", "Ajmal", "Rasasi"],
+        [("Eau de Parfum", "بيرفيوم"), ("Body Mist", "بادي ميست"), ("Oud Oil", "زيت عود"), ("Hair Mist", "عطر شعر")],
+    ),
+    "fashion": (
+        ["Zara", "H&M", "Mango", "Defacto", "Max", "Town Team", "Bershka", "Nike"],
+        [("Linen Blazer", "بليزر كتان"), ("Wide Leg Trousers", "بنطلون واسع"), ("Abaya", "عباية"), ("Sneakers", "كوتشي"),
+         ("Hijab Scarf", "طرحة"), ("Maxi Dress", "فستان طويل"), ("Tote Bag", "شنطة")],
+    ),
+    "food": (
+        ["Juhayna", "Molto", "Edita", "Domty", "Almarai", "Chipsy", "Lamar"],
+        [("Greek Yoghurt", "زبادي يوناني"), ("Croissant", "كرواسون"), ("Protein Bar", "بروتين بار"),
+         ("Juice", "عصير"), ("Cheese", "جبنة"), ("Snack Pack", "سناكس")],
+    ),
+    "tech": (
+        ["Apple", "Samsung", "Xiaomi", "Anker", "Oraimo", "Huawei", "JBL"],
+        [("Wireless Earbuds", "سماعات وايرلس"), ("Smart Watch", "ساعة ذكية"), ("Power Bank", "باور بانك"),
+         ("Ring Light", "رينج لايت"), ("Phone Case", "جراب موبايل"), ("Tripod", "ترايبود")],
+    ),
+    "lifestyle": (
+        ["Nespresso", "IKEA", "Stanley", "Yankee Candle", "Decathlon", "Kindle"],
+        [("Coffee Machine", "ماكينة قهوة"), ("Scented Candle", "شمعة معطرة"), ("Tumbler", "مج"),
+         ("Yoga Mat", "مات يوجا"), ("Planner", "بلانر"), ("Diffuser", "معطر جو")],
+    ),
+    "beauty": (
+        ["Sephora Collection", "Huda Beauty", "Real Techniques", "Foreo", "Bobai"],
+        [("Makeup Brush Set", "طقم فرش"), ("Beauty Sponge", "بيوتي بلندر"), ("Face Cleansing Device", "جهاز تنظيف"),
+         ("Nail Polish", "مانيكير"), ("Lash Glue", "صمغ رموش")],
+    ),
+    "other": (
+        ["Generic", "Local Brand", "Etsy Shop"],
+        [("Gift Box", "بوكس هدايا"), ("Phone Stand", "ستاند موبايل"), ("Water Bottle", "زمزمية")],
+    ),
+}
+
+SHADES = ["01 Nude", "02 Rose", "Ruby Woo", "Pillow Talk", "Honey", "Espresso", "Ivory", "Sand",
+          "Mini", "Travel Size", "50ml", "100ml", "Limited Edition", "Ramadan Edition", "Pro", "Max"]
+STORES = [("Noon Egypt", "noon.com/egypt-en"), ("Amazon Egypt", "amazon.eg"), ("Jumia Egypt", "jumia.com.eg"),
+          ("Sephora Middle East", "sephora.me"), ("Faces", "faces.com"), ("Brand website", "brand.example.com")]
+
+FIRST_NAMES = ["Sarah", "Nour", "Mona", "Dina", "Salma", "Rana", "Farida", "Yasmin", "Malak", "Hana", "Laila", "Jana",
+               "Mariam", "Habiba", "Reem", "Nada", "Aya", "Menna", "Omar", "Youssef", "Karim", "Ahmed", "Ziad", "Hassan"]
+LAST_NAMES = ["Hany", "Arida", "Hala", "Tokio", "Ali", "Maher", "El Sayed", "Khaled", "Fathy", "Mostafa", "Adel", "Samir",
+              "Ashraf", "Nabil", "Ramzy", "Galal", "Soliman", "Hegazy", "Fouad", "Zaki"]
+QUOTES = [
+    "I've been using the {product} every day and it's honestly amazing",
+    "الـ {product} ده بجد تحفة، مش بستغنى عنه",
+    "Obsessed with this {product}! ريحته تجنن",
+    "Best {product} I've tried this year, worth every pound",
+    "جربت {product} من {brand} وعجبني جدا",
+    "My holy grail {product} 💕 يا جماعة لازم تجربوه",
+]
+
+
+def known_categories() -> list[str]:
+    from main import KNOWN_CATEGORIES
+
+    return list(KNOWN_CATEGORIES)
+
+
+def _handle(name: str, rng: random.Random) -> str:
+    base = name.lower().replace(" ", rng.choice(["_", ".", ""]))
+    return f"{base}{rng.choice(['', '_official', '.beauty', str(rng.randint(1, 999))])}"
+
+
+class Catalogue:
+    def __init__(self, products: int, influencers: int, seed: int = 0, categories: Optional[list[str]] = None):
+        self.products = products
+        self.influencer_count = influencers
+        self.seed = seed
+        self.categories = [c for c in (categories or known_categories()) if c in VOCABULARY] or ["other"]
+        self.influencers = self._influencers()
+
+    def _influencers(self) -> list[dict]:
+        rng = random.Random(self.seed)
+        with open(BACKEND_DIR / "influencers.json", encoding="utf-8") as f:
+            real = json.load(f)
+        people = [
+            {"name": r["name"], "instagram": r["instagram"], "tiktok": r["tiktok"], "category": r.get("category", "beauty")}
+            for r in real
+        ][: self.influencer_count]
+        seen = {p["instagram"] for p in people}
+        names = {p["name"].lower() for p in people}
+        while len(people) < self.influencer_count:
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            n = 2
+            while name.lower() in names:  # influencers.name is unique
+                name = f"{name.rsplit(' ', 1)[0] if n > 2 else name} {n}"
+                n += 1
+            handle = _handle(name, rng)
+            if handle in seen:
+                continue
+            seen.add(handle)
+            names.add(name.lower())
+            people.append({"name": name, "instagram": handle, "tiktok": handle.replace(".", ""), "category": rng.choice(self.categories)})
+        return people
+
+    def product(self, rng: random.Random) -> tuple[str, str, str, str]:
+        """Return (brand, product name, category, brand handle) with a bilingual name."""
+        category = rng.choice(self.categories)
+        brands, kinds = VOCABULARY[category]
+        brand = rng.choice(brands)
+        english, arabic = rng.choice(kinds)
+        name = f"{english} {rng.choice(SHADES)}"
+        if rng.random() < 0.25:
+            name = f"{name} ({arabic})"
+        elif rng.random() < 0.1:
+            name = f"{arabic} {brand}"
+        return brand, name, category, brand.lower().replace(" ", "").replace("'", "")
+
+    # ── Rows ───────────────────────────────────────────────────────────────────
+
+    def influencer_rows(self) -> list[dict]:
+        rng = random.Random(self.seed + 1)
+        return [
+            {
+                "name": p["name"],
+                "instagram_handle": p["instagram"],
+                "tiktok_handle": p["tiktok"],
+                "platform": rng.choice(["instagram", "tiktok"]),
+                "followers": int(rng.lognormvariate(11, 1.5)),
+                "profile_image": f"https://cdn.example.com/{p['instagram']}/avatar.jpg",
+            }
+            for p in self.influencers
+        ]
+
+    def watchlist_rows(self) -> list[dict]:
+        rng = random.Random(self.seed + 2)
+        return [
+            {
+                "handle": p["instagram"],
+                "platform": "instagram",
+                "status": "active" if rng.random() < 0.9 else "paused",
+                "total_products_found": 0,
+                "added_by": rng.choice(["manual", "telegram", "auto_discovery"]),
+            }
+            for p in self.influencers
+        ]
+
+    def product_chunks(self, chunk: int = CHUNK) -> Iterator[tuple[list[dict], list[dict]]]:
+        """Yield (products, buy_links) in chunks of `chunk` products."""
+        rng = random.Random(self.seed + 3)
+        # Follower-like skew: a few influencers have most of the products.
+        weights = [1 / (rank + 1) ** 0.8 for rank in range(len(self.influencers))]
+        products, links = [], []
+        for i in range(self.products):
+            person = rng.choices(self.influencers, weights)[0]
+            brand, name, category, handle = self.product(rng)
+            product_id = f"00000000-0000-4000-8000-{i:012d}"
+            platform = rng.choice(["instagram", "instagram", "tiktok"])
+            products.append({
+                "id": product_id,
+                # The Monster saves handles, add_influencer saves display names.
+                "influencer_name": person["instagram"] if rng.random() < 0.3 else person["name"],
+                "product_name": name,
+                "brand": brand,
+                "category": category,
+                "quote": rng.choice(QUOTES).format(product=name, brand=brand),
+                "video_url": (
+                    f"https://www.instagram.com/p/{i:011d}/" if platform == "instagram"
+                    else f"https://www.tiktok.com/@{person['tiktok']}/video/{7_000_000_000 + i}"
+                ),
+                "platform": platform,
+                "influencer_profile_pic": f"https://cdn.example.com/{person['instagram']}/avatar.jpg",
+            })
+            for store, domain in rng.sample(STORES, rng.choice([0, 1, 1, 2, 2, 3, 4])):
+                links.append({
+                    "product_id": product_id,
+                    "store_name": store if store != "Brand website" else f"@{handle}",
+                    "price": round(rng.uniform(80, 6000), 2) if rng.random() < 0.7 else None,
+                    "currency": "EGP",
+                    "url": f"https://www.{domain}/p/{i}",
+                    "in_stock": rng.random() < 0.9,
+                })
+            if len(products) >= chunk:
+                yield products, links
+                products, links = [], []
+        if products:
+            yield products, links
+
+    def caption_products(self, count: int = 500) -> list[tuple[str, str, str, str]]:
+        """A fixed pool of products for captions (FakeApify) and extraction (FakeGroq)."""
+        rng = random.Random(self.seed + 4)
+        return [self.product(rng) for _ in range(count)]
+
+    # ── Loading ────────────────────────────────────────────────────────────────
+
+    def load(self, server: LocalPostgREST, progress: bool = False) -> None:
+        """Insert everything into the stand-in database (bypassing HTTP)."""
+        server.insert_many("influencers", self.influencer_rows())
+        server.insert_many("influencer_watchlist", self.watchlist_rows())
+        if server.count("monster_config") == 0:
+            server.insert_many("monster_config", [{"is_active": True, "monitoring_interval": 21600}])
+        done = 0
+        start = time.perf_counter()
+        for products, links in self.product_chunks():
+            server.insert_many("products", products)
+            server.insert_many("buy_links", links)
+            done += len(products)
+            if progress:
+                rate = done / max(1e-9, time.perf_counter() - start)
+                print(f"  {done:>9,} / {self.products:,} products ({rate:,.0f}/s)", end="\r", flush=True)
+        if progress:
+            print()
+
+
+def parse_scale(value: str) -> tuple[int, int]:
+    """Accept a named scale ("100k") or a product count ("250000")."""
+    key = value.lower()
+    if key in SCALES:
+        return SCALES[key]
+    products = int(key.replace("_", "").replace(",", ""))
+    return products, max(10, min(2_000, products // 500))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", default="10k", help=f"{', '.join(SCALES)} or a product count")
+    parser.add_argument("--influencers", type=int, help="override the influencer count for the scale")
+    parser.add_argument("--db", required=True, help="SQLite file to create (must not exist)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    db = Path(args.db)
+    if db.exists():
+        parser.error(f"{db} already exists")
+    db.parent.mkdir(parents=True, exist_ok=True)
+
+    products, influencers = parse_scale(args.scale)
+    catalogue = Catalogue(products, args.influencers or influencers, seed=args.seed)
+    print(f"🏭 Generating {products:,} products for {len(catalogue.influencers):,} influencers → {db}")
+    start = time.perf_counter()
+    server = LocalPostgREST(str(db))  # not started: loading doesn't need HTTP
+    catalogue.load(server, progress=True)
+    print(
+        f"✅ {server.count('products'):,} products, {server.count('buy_links'):,} buy links, "
+        f"{server.count('influencer_watchlist'):,} watchlist rows in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
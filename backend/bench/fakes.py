@@ -0,0 +1,289 @@
+"""
+In-process stand-ins for the Groq and Apify clients, for offline benchmarks.
+
+They implement only the calls this repo makes (`chat.completions.create`,
+`audio.transcriptions.create`, `actor(...).call`, `dataset(...).iterate_items`)
+and return objects shaped like the real SDK responses. Latency is simulated
+with `time.sleep`, so a benchmark measures how our code waits on them.
+
+    from core.clients import set_client
+    set_client("groq", FakeGroq(latency=0.4))
+    set_client("apify", FakeApify(latency=2.0))
+"""
+
+import json
+import random
+import re
+import threading
+import time
+import uuid
+import zlib
+from types import SimpleNamespace
+from typing import Any, Iterator, Optional
+
+# (brand, product, category, Instagram handle of the brand). Both fakes take a
+# `products=` list of the same shape, e.g. `Catalogue.caption_products()`.
+SAMPLE_PRODUCTS = [
+    ("Fenty Beauty", "Gloss Bomb Universal Lip Luminizer", "makeup", "fentybeauty"),
+    ("Huda Beauty", "Easy Bake Loose Baking Powder", "makeup", "hudabeautyshop"),
+    ("Huda Beauty", "Faux Filter Foundation", "makeup", "hudabeautyshop"),
+    ("Charlotte Tilbury", "Pillow Talk Matte Revolution Lipstick", "makeup", "charlottetilbury"),
+    ("Charlotte Tilbury", "Airbrush Flawless Setting Spray", "makeup", "charlottetilbury"),
+    ("Rare Beauty", "Soft Pinch Liquid Blush", "makeup", "rarebeauty"),
+    ("NARS", "Radiant Creamy Concealer", "makeup", "narsissist"),
+    ("Maybelline", "Lash Sensational Sky High Mascara", "makeup", "maybelline"),
+    ("The Ordinary", "Niacinamide 10% + Zinc 1%", "skincare", "theordinary"),
+    ("CeraVe", "Hydrating Facial Cleanser", "skincare", "cerave"),
+    ("La Roche-Posay", "Anthelios UVMune 400 Fluid SPF50+", "skincare", "larocheposay"),
+    ("Bioderma", "Sensibio H2O Micellar Water", "skincare", "bioderma"),
+    ("Eucerin", "Hyaluron-Filler Night Cream", "skincare", "eucerin"),
+    ("Vichy", "Mineral 89 Booster", "skincare", "vichy"),
+    ("Olaplex", "No. 3 Hair Perfector", "haircare", "olaplex"),
+    ("Moroccanoil", "Treatment Original", "haircare", "moroccanoil"),
+    ("Kerastase", "Elixir Ultime L'Huile Originale", "haircare", "kerastase"),
+    ("Dyson", "Airwrap Multi-Styler", "haircare", "dyson"),
+    ("Kayali", "Vanilla 28 Eau de Parfum", "fragrance", "kayali"),
+    ("Dior", "Sauvage Eau de Parfum", "fragrance", "dior"),
+    ("Lattafa", "Khamrah Eau de Parfum", "fragrance", "lattafa"),
+    ("Zara", "Oversized Linen Blazer", "fashion", "zara"),
+    ("H&M", "Wide Leg Tailored Trousers", "fashion", "hm"),
+    ("Apple", "AirPods Pro 2", "tech", "apple"),
+    ("Samsung", "Galaxy Watch6", "tech", "samsung"),
+    ("Nespresso", "Vertuo Pop Coffee Machine", "lifestyle", "nespresso"),
+    ("Juhayna", "Greek Yoghurt Honey", "food", "juhayna"),
+    ("Molto", "Magnum Croissant Chocolate", "food", "molto"),
+]
+
+_CAPTION_TEMPLATES = [
+    "Obsessed with the {brand} {product} ✨ using it every single day @{handle}",
+    "My current fave: {product} from {brand} 💕 link in bio @{handle}",
+    "GRWM using {brand} {product}! بجد تحفة 😍 @{handle}",
+    "Honest review of {brand} {product} — worth the hype? #ad @{handle}",
+    "الـ {product} من {brand} غير حياتي 🙌 @{handle}",
+]
+
+
+def _response(content: str, prompt_chars: int) -> SimpleNamespace:
+    """Shape a chat completion like `groq.types.chat.ChatCompletion`."""
+    prompt_tokens = max(1, prompt_chars // 4)
+    completion_tokens = max(1, len(content) // 4)
+    return SimpleNamespace(
+        id=f"chatcmpl-{uuid.uuid4().hex[:12]}",
+        model="fake-llama",
+        choices=[SimpleNamespace(index=0, finish_reason="stop", message=SimpleNamespace(role="assistant", content=content))],
+        usage=SimpleNamespace(
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            total_tokens=prompt_tokens + completion_tokens,
+        ),
+    )
+
+
+class _Latency:
+    def __init__(self, latency: float, jitter: float, seed: Optional[int]):
+        self.latency = latency
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def wait(self) -> None:
+        with self._lock:
+            spread = self._random.uniform(-self.jitter, self.jitter)
+        delay = max(0.0, self.latency * (1 + spread))
+        if delay:
+            time.sleep(delay)
+
+
+def _stream(content: str, prompt_chars: int, size: int = 16) -> Iterator[SimpleNamespace]:
+    """Shape a streamed completion: content deltas, then Groq's `x_groq.usage` on the last chunk."""
+    for i in range(0, len(content), size):
+        yield SimpleNamespace(choices=[SimpleNamespace(index=0, delta=SimpleNamespace(content=content[i:i + size]))])
+    usage = _response(content, prompt_chars).usage
+    yield SimpleNamespace(choices=[SimpleNamespace(index=0, delta=SimpleNamespace(content=None), finish_reason="stop")],
+                          x_groq=SimpleNamespace(usage=usage))
+
+
+class FakeGroq:
+    """Answers extraction prompts with the known products named in them and /ask prompts with a pick."""
+
+    def __init__(self, latency: float = 0.5, jitter: float = 0.2, seed: Optional[int] = 0, products: Optional[list[tuple]] = None):
+        self._latency = _Latency(latency, jitter, seed)
+        self.products = products or SAMPLE_PRODUCTS
+        self.calls = 0
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._chat))
+        self.audio = SimpleNamespace(transcriptions=SimpleNamespace(create=self._transcribe))
+
+    def _count(self) -> None:
+        with self._lock:
+            self.calls += 1
+
+    def _chat(self, *, messages: list[dict], **kwargs: Any) -> SimpleNamespace:
+        self._count()
+        self._latency.wait()
+        prompt = "\n".join(m.get("content") or "" for m in messages)
+        if "Question:" in messages[-1].get("content", ""):
+            content = self._answer(prompt)
+        elif kwargs.get("response_format"):  # JSON mode: the array comes wrapped in an object
+            content = json.dumps({"products": self._extract(prompt)}, ensure_ascii=False)
+        else:
+            content = json.dumps(self._extract(prompt), ensure_ascii=False)
+        if kwargs.get("stream"):
+            return _stream(content, len(prompt))
+        return _response(content, len(prompt))
+
+    def _transcribe(self, *, file: Any = None, **kwargs: Any) -> SimpleNamespace:
+        self._count()
+        self._latency.wait()
+        brand, product, _, _ = self.products[self.calls % len(self.products)]
+        return SimpleNamespace(text=f"النهارده هكلمكم عن {brand} {product}، بجد تحفة")
+
+    def _extract(self, prompt: str) -> list[dict]:
+        products = []
+        # The Monster numbers its posts as "Post N:" blocks and expects the number back.
+        blocks = re.split(r"(?m)(?=^Post \d+:)", prompt) if re.search(r"(?m)^Post \d+:", prompt) else [prompt]
+        for block in blocks:
+            number = re.match(r"Post (\d+):", block)
+            lowered = block.lower()
+            for brand, product, category, _ in self.products:
+                if product.lower() in lowered:
+                    found = {
+                        "product_name": product,
+                        "brand": brand,
+                        "category": category,
+                        "influencer_quote": f"I love the {product}",
+                        "quote": f"I love the {product}",
+                    }
+                    if number:
+                        found["post"] = int(number.group(1))
+                    products.append(found)
+        return products
+
+    @staticmethod
+    def _answer(prompt: str) -> str:
+        names = re.findall(r"^• (.+?)(?: by .+)? \(", prompt, flags=re.MULTILINE)
+        return json.dumps({
+            "answer": "Here are the favourites! دي أحلى حاجات عندنا 💄",
+            "recommended_products": names[:3],
+        }, ensure_ascii=False)
+
+
+class _Dataset:
+    def __init__(self, items: list[dict]):
+        self._items = items
+
+    def iterate_items(self) -> Iterator[dict]:
+        return iter(list(self._items))
+
+    def list_items(self, **kwargs: Any) -> SimpleNamespace:
+        return SimpleNamespace(items=list(self._items), count=len(self._items), total=len(self._items))
+
+
+class _Actor:
+    def __init__(self, apify: "FakeApify", name: str):
+        self._apify = apify
+        self._name = name
+
+    def call(self, run_input: Optional[dict] = None, **kwargs: Any) -> dict:
+        return self._apify._run(self._name, run_input or {})
+
+
+class FakeApify:
+    """Runs actors instantly (plus `latency`) against generated datasets.
+
+    Posts are generated deterministically per handle, so a second Monster cycle
+    sees the same captions and exercises the dedup path.
+    """
+
+    def __init__(
+        self,
+        latency: float = 1.0,
+        jitter: float = 0.2,
+        posts_per_run: int = 12,
+        seed: Optional[int] = 0,
+        products: Optional[list[tuple]] = None,
+    ):
+        self._latency = _Latency(latency, jitter, seed)
+        self.products = products or SAMPLE_PRODUCTS
+        self.posts_per_run = posts_per_run
+        self.runs = 0
+        self._datasets: dict[str, list[dict]] = {}
+        self._lock = threading.Lock()
+
+    def actor(self, name: str) -> _Actor:
+        return _Actor(self, name)
+
+    def dataset(self, dataset_id: str) -> _Dataset:
+        return _Dataset(self._datasets.get(dataset_id, []))
+
+    def _run(self, actor: str, run_input: dict) -> dict:
+        self._latency.wait()
+        handles = run_input.get("username") or run_input.get("usernames") or run_input.get("profiles") or []
+        if isinstance(handles, str):
+            handles = [handles]
+        limit = int(run_input.get("resultsLimit") or run_input.get("resultsPerPage") or self.posts_per_run)
+
+        items: list[dict] = []
+        for handle in handles:
+            if "profile" in actor:
+                items.append(self._profile(handle))
+            elif "tiktok" in actor:
+                items.extend(self._tiktok(handle, min(limit, self.posts_per_run)))
+            else:
+                items.extend(self._instagram(handle, min(limit, self.posts_per_run)))
+
+        dataset_id = uuid.uuid4().hex[:16]
+        with self._lock:
+            self.runs += 1
+            self._datasets[dataset_id] = items
+        return {"id": uuid.uuid4().hex[:16], "status": "SUCCEEDED", "defaultDatasetId": dataset_id}
+
+    def _captions(self, handle: str, count: int) -> Iterator[tuple[int, str]]:
+        rng = random.Random(handle)
+        for i in range(count):
+            brand, product, _, brand_handle = rng.choice(self.products)
+            template = rng.choice(_CAPTION_TEMPLATES)
+            yield i, template.format(brand=brand, product=product, handle=brand_handle)
+
+    def _instagram(self, handle: str, count: int) -> list[dict]:
+        return [
+            {
+                "caption": caption,
+                "shortCode": f"{handle[:4]}{i:05d}",
+                "url": f"https://www.instagram.com/p/{handle[:4]}{i:05d}/",
+                "videoUrl": f"https://cdn.example.com/{handle}/{i}.mp4",
+                "ownerUsername": handle,
+                "ownerFullName": handle.replace("_", " ").title(),
+                "ownerProfilePicUrl": f"https://cdn.example.com/{handle}/avatar.jpg",
+                "timestamp": f"2024-01-{i % 28 + 1:02d}T12:00:00.000Z",
+                "likesCount": 1000 + i,
+            }
+            for i, caption in self._captions(handle, count)
+        ]
+
+    def _tiktok(self, handle: str, count: int) -> list[dict]:
+        return [
+            {
+                "id": f"{zlib.crc32(handle.encode())}{i:04d}",
+                "text": caption,
+                "webVideoUrl": f"https://www.tiktok.com/@{handle}/video/{i}",
+                "videoUrl": f"https://cdn.example.com/{handle}/{i}.mp4",
+                "authorMeta": {
+                    "name": handle,
+                    "nickName": handle.title(),
+                    "avatar": f"https://cdn.example.com/{handle}/avatar.jpg",
+                },
+                "videoMeta": {"duration": 30},
+            }
+            for i, caption in self._captions(handle, count)
+        ]
+
+    @staticmethod
+    def _profile(handle: str) -> dict:
+        return {
+            "username": handle,
+            "fullName": handle.replace("_", " ").title(),
+            "profilePicUrl": f"https://cdn.example.com/{handle}/avatar.jpg",
+            "profilePicUrlHD": f"https://cdn.example.com/{handle}/avatar_hd.jpg",
+            "followersCount": 100000,
+        }
@@ -0,0 +1,90 @@
+"""
+Import-time benchmark for the FastAPI app.
+
+Runs `python -X importtime -c "import main"` in a clean subprocess and reports
+the total import cost plus the slowest modules, so cold-start regressions
+(e.g. an SDK creeping back into module scope) show up as numbers.
+
+Usage:
+    python -m bench.importtime [--module main] [--runs 5] [--top 15]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def measure(module: str) -> tuple[float, dict[str, int]]:
+    """Import `module` once in a fresh interpreter.
+
+    Returns (wall seconds, {module name: cumulative microseconds}).
+    """
+    env = dict(os.environ)
+    # The app must import without credentials; make sure we measure that path.
+    for var in ("SUPABASE_URL", "SUPABASE_KEY", "GROQ_API_KEY", "APIFY_API_TOKEN"):
+        env.pop(var, None)
+
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - start
+
+    if proc.returncode != 0:
+        tail = proc.stderr.strip().splitlines()[-1:] or ["unknown error"]
+        raise RuntimeError(f"import {module} failed: {tail[0]}")
+
+    cumulative: dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        # "import time:       self [us] |  cumulative | imported package"
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _self_us, cum_us, name = line[len("import time:"):].split("|")
+        cumulative[name.strip()] = int(cum_us)
+    return wall, cumulative
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    walls: list[float] = []
+    imports: list[float] = []
+    last: dict[str, int] = {}
+    for _ in range(args.runs):
+        wall, cumulative = measure(args.module)
+        walls.append(wall)
+        imports.append(cumulative.get(args.module, 0) / 1e6)
+        last = cumulative
+
+    print("=" * 60)
+    print(f"Import time: {args.module} ({args.runs} runs)")
+    print("=" * 60)
+    print(f"  import {args.module:<20} median {statistics.median(imports) * 1000:8.1f} ms")
+    print(f"  interpreter wall time    median {statistics.median(walls) * 1000:8.1f} ms")
+
+    # Only top-level packages, otherwise submodules crowd out the list.
+    roots = {name: us for name, us in last.items() if "." not in name and name != args.module}
+    print("\nSlowest top-level imports (last run):")
+    for name, us in sorted(roots.items(), key=lambda kv: kv[1], reverse=True)[: args.top]:
+        print(f"  {name:<30} {us / 1000:8.1f} ms")
+
+    heavy = [name for name in ("supabase", "groq", "apify_client", "httpx") if name in last]
+    print(f"\nHeavy SDKs loaded at import: {', '.join(heavy) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
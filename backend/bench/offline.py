@@ -0,0 +1,289 @@
+"""
+Offline benchmark: API routes and a Monster cycle against local stand-ins.
+
+Starts a PostgREST-compatible server over SQLite (`bench.postgrest`), installs
+`FakeGroq` / `FakeApify` as the shared clients, seeds a synthetic catalogue
+(`bench.catalogue`) if the database is empty, then drives the real FastAPI app
+in-process and `Monster.run_monitoring_cycle`. Reports latency percentiles,
+throughput and Supabase round trips per request, so a change to a query
+pattern shows up as numbers without touching production.
+
+Large catalogues take a while to generate; build them once with
+`python -m bench.catalogue --scale 100k --db ...` and pass the same `--db`.
+
+Usage:
+    python -m bench.offline [--products 500] [--requests 50] [--concurrency 4]
+                            [--routes search,products,ask,ask_stream,save,stats] [--influencers 10]
+                            [--cycles 2] [--groq-latency 0.5] [--apify-latency 1.0]
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from .catalogue import Catalogue, parse_scale
+from .fakes import SAMPLE_PRODUCTS, FakeApify, FakeGroq
+from . import rpc
+from .postgrest import LocalPostgREST
+
+SEARCH_QUERIES = [
+    "gloss", "sarah makeup", "skincare", "Huda Beauty", "mascara", "perfume",
+    "huda foundation", "haircare", "Charlotte Tilbury", "concealer", "عطر", "fragrance",
+]
+ASK_QUESTIONS = [
+    "What lipstick does Sarah use?",
+    "Best skincare products for dry skin?",
+    "ايه أحسن بيرفيوم؟",
+    "Which hair products does Huda recommend?",
+]
+
+
+# ── Workloads ──────────────────────────────────────────────────────────────────
+
+def _search(i: int, ctx: dict) -> tuple:
+    return "GET", f"/search?q={SEARCH_QUERIES[i % len(SEARCH_QUERIES)]}", None
+
+
+def _products(i: int, ctx: dict) -> tuple:
+    offset = ctx["rng"].randrange(max(1, ctx["products"] - 50))
+    return "GET", f"/products?limit=50&offset={offset}", None
+
+
+def _ask(i: int, ctx: dict) -> tuple:
+    return "POST", "/ask", {"question": ASK_QUESTIONS[i % len(ASK_QUESTIONS)]}
+
+
+def _ask_stream(i: int, ctx: dict) -> tuple:
+    return "POST", "/ask/stream", {"question": ASK_QUESTIONS[i % len(ASK_QUESTIONS)]}
+
+
+def _save(i: int, ctx: dict) -> tuple:
+    products = []
+    for j in range(3):
+        brand, name, category, handle = SAMPLE_PRODUCTS[(i * 3 + j) % len(SAMPLE_PRODUCTS)]
+        products.append({
+            "product_name": f"{name} (bench {i}-{j})",
+            "brand": brand,
+            "category": category,
+            "quote": f"Obsessed with this one @{handle}",
+            "buy_links": [],
+        })
+    return "POST", "/admin/save-products", {"influencer_name": "bench_influencer", "products": products}
+
+
+def _stats(i: int, ctx: dict) -> tuple:
+    return "GET", "/admin/monster/status", None
+
+
+WORKLOADS: dict[str, Callable[[int, dict], tuple]] = {
+    "search": _search,
+    "products": _products,
+    "ask": _ask,
+    "ask_stream": _ask_stream,
+    "save": _save,
+    "stats": _stats,
+}
+
+
+def _quiet(verbose: bool):
+    """Swallow the app's progress prints unless --verbose."""
+    return contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+
+
+def bench_route(client, name: str, n: int, concurrency: int, ctx: dict) -> dict:
+    server: LocalPostgREST = ctx["server"]
+    groq: FakeGroq = ctx["groq"]
+    make = WORKLOADS[name]
+
+    def one(i: int) -> tuple[float, int]:
+        method, path, body = make(i, ctx)
+        start = time.perf_counter()
+        response = client.request(method, path, json=body)
+        return time.perf_counter() - start, response.status_code
+
+    for i in range(ctx["warmup"]):
+        one(-1 - i)
+
+    trips_before, groq_before = server.round_trips, groq.calls
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(one, range(n)))
+    wall = time.perf_counter() - start
+
+    latencies = sorted(r[0] for r in results)
+    return {
+        "route": name,
+        "requests": n,
+        "errors": sum(1 for _, status in results if status >= 400),
+        "p50": statistics.median(latencies),
+        "p95": latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))],
+        "max": latencies[-1],
+        "rps": n / wall if wall else 0.0,
+        "round_trips": (server.round_trips - trips_before) / n,
+        "groq_calls": (groq.calls - groq_before) / n,
+    }
+
+
+def limit_watchlist(server: LocalPostgREST, n: int) -> int:
+    """Leave only the first `n` watchlist rows active, so a big catalogue still runs a short cycle."""
+    with server.lock:
+        server.conn.execute("UPDATE influencer_watchlist SET status = 'paused'")
+        server.conn.execute(
+            "UPDATE influencer_watchlist SET status = 'active' WHERE rowid IN "
+            "(SELECT rowid FROM influencer_watchlist ORDER BY rowid LIMIT ?)",
+            (n,),
+        )
+        server.conn.commit()
+    return min(n, server.count("influencer_watchlist"))
+
+
+def bench_monster(cycles: int, ctx: dict) -> list[dict]:
+    from monster import Monster
+
+    server: LocalPostgREST = ctx["server"]
+    groq: FakeGroq = ctx["groq"]
+    apify: FakeApify = ctx["apify"]
+    monster = Monster()
+
+    rows = []
+    for cycle in range(1, cycles + 1):
+        trips, groq_calls, apify_runs = server.round_trips, groq.calls, apify.runs
+        products_before = server.count("products")
+        start = time.perf_counter()
+        monster.run_monitoring_cycle()
+        rows.append({
+            "cycle": cycle,
+            "seconds": time.perf_counter() - start,
+            "saved": server.count("products") - products_before,
+            "round_trips": server.round_trips - trips,
+            "groq_calls": groq.calls - groq_calls,
+            "apify_runs": apify.runs - apify_runs,
+        })
+    return rows
+
+
+# ── Report ─────────────────────────────────────────────────────────────────────
+
+def print_routes(rows: list[dict], concurrency: int) -> None:
+    print(f"\nAPI routes (concurrency {concurrency})")
+    print(f"  {'route':<10} {'reqs':>5} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'req/s':>8} {'trips/req':>10} {'groq/req':>9}")
+    for r in rows:
+        print(
+            f"  {r['route']:<10} {r['requests']:>5} {r['errors']:>6} {r['p50'] * 1000:>9.1f} "
+            f"{r['p95'] * 1000:>9.1f} {r['max'] * 1000:>9.1f} {r['rps']:>8.1f} "
+            f"{r['round_trips']:>10.1f} {r['groq_calls']:>9.2f}"
+        )
+
+
+def print_monster(rows: list[dict], influencers: int) -> None:
+    from core import telemetry
+
+    print(f"\nMonster cycles ({influencers} influencers)")
+    print(f"  {'cycle':<6} {'seconds':>8} {'saved':>6} {'trips':>6} {'trips/infl':>11} {'groq':>5} {'apify':>6}")
+    for r in rows:
+        print(
+            f"  {r['cycle']:<6} {r['seconds']:>8.2f} {r['saved']:>6} {r['round_trips']:>6} "
+            f"{r['round_trips'] / max(1, influencers):>11.1f} {r['groq_calls']:>5} {r['apify_runs']:>6}"
+        )
+    stages = {k: v for k, v in telemetry.summary().items() if k.startswith("monster.")}
+    if stages:
+        print(f"\n  {'stage':<20} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'total s':>8}")
+        for name, snap in stages.items():
+            print(
+                f"  {name:<20} {snap['count']:>6} {snap['p50'] * 1000:>9.1f} "
+                f"{snap['p95'] * 1000:>9.1f} {snap['sum']:>8.2f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=500, help="catalogue size to seed into an empty --db")
+    parser.add_argument("--requests", type=int, default=50, help="requests per route")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--routes", default="search,products,ask,save,stats")
+    parser.add_argument("--influencers", type=int, default=10, help="watchlist size for the Monster cycle (0 = skip)")
+    parser.add_argument("--cycles", type=int, default=2)
+    parser.add_argument("--groq-latency", type=float, default=0.5)
+    parser.add_argument("--apify-latency", type=float, default=1.0)
+    parser.add_argument("--db", default=":memory:", help="SQLite path (reuse a seeded file across runs)")
+    parser.add_argument("--no-rpc", action="store_true", help="don't serve the migrations' SQL functions (measure the fallbacks)")
+    parser.add_argument("--keep-rate-limits", action="store_true", help="don't lift the *_RPM limits for the fakes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    routes = [r for r in args.routes.split(",") if r]
+    unknown = set(routes) - set(WORKLOADS)
+    if unknown:
+        parser.error(f"unknown routes: {', '.join(sorted(unknown))}")
+
+    server = LocalPostgREST(args.db).start()
+    if not args.no_rpc:
+        rpc.register(server)
+
+    # Must be set before `core` is imported: clients and limits read them once.
+    os.environ["SUPABASE_URL"] = server.url
+    os.environ["SUPABASE_KEY"] = "bench.local.key"  # supabase-py wants a JWT-shaped key
+    os.environ["MONSTER_INFLUENCER_DELAY"] = "0"
+    os.environ["DEAD_LETTER_DIR"] = tempfile.mkdtemp(prefix="bench-dead-letter-")
+    if not args.verbose:
+        os.environ.setdefault("LOG_LEVEL", "WARNING")
+    if not args.keep_rate_limits:
+        for service in ("GROQ", "APIFY", "SUPABASE"):
+            os.environ[f"{service}_RPM"] = "1000000"
+
+    from core.clients import set_client
+
+    influencers = max(args.influencers, parse_scale(str(args.products))[1])
+    catalogue = Catalogue(args.products, influencers, seed=args.seed)
+    if server.count("products") == 0 and args.products:
+        catalogue.load(server)
+    pool = SAMPLE_PRODUCTS + catalogue.caption_products()
+    groq = FakeGroq(latency=args.groq_latency, seed=args.seed, products=pool)
+    apify = FakeApify(latency=args.apify_latency, seed=args.seed, products=pool)
+    set_client("groq", groq)
+    set_client("apify", apify)
+
+    rng = random.Random(args.seed)
+    ctx = {
+        "server": server, "groq": groq, "apify": apify, "rng": rng,
+        "warmup": args.warmup, "products": server.count("products"),
+    }
+
+    print("=" * 60)
+    print(f"Offline benchmark: {ctx['products']} products, groq {args.groq_latency}s, apify {args.apify_latency}s")
+    print("=" * 60)
+
+    if routes:
+        from fastapi.testclient import TestClient
+
+        import main as api
+
+        route_rows = []
+        with TestClient(api.app) as client, _quiet(args.verbose):
+            for name in routes:
+                route_rows.append(bench_route(client, name, args.requests, args.concurrency, ctx))
+        print_routes(route_rows, args.concurrency)
+
+    if args.influencers:
+        active = limit_watchlist(server, args.influencers)
+        with _quiet(args.verbose):
+            monster_rows = bench_monster(args.cycles, ctx)
+        print_monster(monster_rows, active)
+
+    print("\nSupabase round trips (whole run)")
+    for (method, table), n in sorted(server.requests.items(), key=lambda kv: kv[1], reverse=True):
+        print(f"  {method:<7} {table:<24} {n:>8}")
+    server.stop()
+
+
+if __name__ == "__main__":
+    main()
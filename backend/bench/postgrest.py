@@ -0,0 +1,676 @@
+"""
+PostgREST-compatible stand-in over SQLite, for offline benchmarks.
+
+Speaks the subset of the PostgREST HTTP API that supabase-py's query builder
+emits in this repo, so the real `supabase` client (and the round-trip
+instrumentation in `core.clients`) can run against it unchanged:
+
+- GET/HEAD: `select` (columns, `alias:col`, one level of embedding such as
+  `*,buy_links(*)`), filters (`eq neq gt gte lt lte like ilike is in` and
+  `not.`), `or=(...)` / `and=(...)`, `order`, `limit`/`offset`, the `Range`
+  header and `Prefer: count=exact`
+- POST: single and bulk insert, upsert via `on_conflict` and
+  `Prefer: resolution=merge-duplicates|ignore-duplicates`
+- PATCH / DELETE with filters, `Prefer: return=representation|minimal`
+- `.single()` (`Accept: application/vnd.pgrst.object+json`)
+- `/rpc/<name>` for functions registered with `register_rpc()`
+
+All requests share one SQLite connection behind a lock, so writes are
+serialised; that's fine for measuring how many round trips a code path makes
+and how long it spends in them, not for measuring Postgres itself.
+
+    server = LocalPostgREST()          # in-memory database with SCHEMA
+    server.start()
+    os.environ["SUPABASE_URL"] = server.url
+"""
+
+import json
+import re
+import sqlite3
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Optional
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+_UUID = (
+    "(lower(hex(randomblob(4))) || '-' || lower(hex(randomblob(2))) || '-4' || "
+    "substr(lower(hex(randomblob(2))), 2) || '-a' || substr(lower(hex(randomblob(2))), 2) || "
+    "'-' || lower(hex(randomblob(6))))"
+)
+_NOW = "(strftime('%Y-%m-%dT%H:%M:%f', 'now'))"
+
+# database/schema.sql and backend/migrations/*.sql, translated to SQLite.
+SCHEMA = f"""
+CREATE TABLE influencers (
+    id TEXT PRIMARY KEY DEFAULT {_UUID},
+    name TEXT NOT NULL,
+    instagram_handle TEXT,
+    tiktok_handle TEXT,
+    platform TEXT DEFAULT 'tiktok',
+    followers INTEGER,
+    profile_image TEXT,
+    aliases JSON DEFAULT '[]',
+    created_at TIMESTAMP DEFAULT {_NOW},
+    updated_at TIMESTAMP DEFAULT {_NOW}
+);
+
+CREATE TABLE products (
+    id TEXT PRIMARY KEY DEFAULT {_UUID},
+    influencer_name TEXT NOT NULL,
+    product_name TEXT NOT NULL,
+    brand TEXT,
+    category TEXT,
+    quote TEXT,
+    video_url TEXT,
+    platform TEXT DEFAULT 'tiktok',
+    video_timestamp TEXT,
+    influencer_profile_pic TEXT,
+    influencer_id TEXT REFERENCES influencers(id) ON DELETE SET NULL,
+    created_at TIMESTAMP DEFAULT {_NOW}
+);
+
+CREATE TABLE buy_links (
+    id TEXT PRIMARY KEY DEFAULT {_UUID},
+    product_id TEXT REFERENCES products(id) ON DELETE CASCADE,
+    store_name TEXT,
+    price REAL,
+    currency TEXT DEFAULT 'EGP',
+    url TEXT,
+    in_stock BOOLEAN DEFAULT 1,
+    created_at TIMESTAMP DEFAULT {_NOW}
+);
+
+CREATE INDEX idx_products_influencer ON products(influencer_name);
+CREATE INDEX idx_products_category ON products(category);
+CREATE INDEX idx_products_brand ON products(brand);
+CREATE INDEX idx_buy_links_product ON buy_links(product_id);
+CREATE INDEX idx_products_influencer_id ON products(influencer_id);
+CREATE UNIQUE INDEX idx_influencers_name_lower ON influencers(lower(name));
+CREATE UNIQUE INDEX idx_influencers_name ON influencers(name);
+CREATE INDEX idx_influencers_instagram_lower ON influencers(lower(instagram_handle));
+CREATE INDEX idx_influencers_tiktok_lower ON influencers(lower(tiktok_handle));
+
+-- products_influencer_id.sql's triggers, as SQLite triggers.
+CREATE TRIGGER products_set_influencer_id AFTER INSERT ON products
+WHEN NEW.influencer_id IS NULL
+BEGIN
+    UPDATE products SET influencer_id = (
+        SELECT id FROM influencers
+        WHERE lower(name) = lower(ltrim(NEW.influencer_name, '@'))
+           OR lower(instagram_handle) = lower(ltrim(NEW.influencer_name, '@'))
+           OR lower(tiktok_handle) = lower(ltrim(NEW.influencer_name, '@'))
+        ORDER BY lower(name) = lower(ltrim(NEW.influencer_name, '@')) DESC, created_at
+        LIMIT 1
+    ) WHERE rowid = NEW.rowid;
+END;
+
+CREATE TRIGGER influencers_sync_product_names AFTER UPDATE OF name ON influencers
+WHEN OLD.name IS NOT NEW.name
+BEGIN
+    UPDATE products SET influencer_name = NEW.name WHERE influencer_id = NEW.id;
+END;
+
+CREATE TABLE influencer_watchlist (
+    id TEXT PRIMARY KEY DEFAULT {_UUID},
+    handle TEXT NOT NULL,
+    platform TEXT NOT NULL DEFAULT 'instagram',
+    status TEXT DEFAULT 'active',
+    last_checked_at TIMESTAMP,
+    total_products_found INTEGER DEFAULT 0,
+    added_by TEXT DEFAULT 'manual',
+    created_at TIMESTAMP DEFAULT {_NOW},
+    UNIQUE(handle, platform)
+);
+
+CREATE TABLE monster_config (
+    id TEXT PRIMARY KEY DEFAULT {_UUID},
+    is_active BOOLEAN DEFAULT 0,
+    monitoring_interval INTEGER DEFAULT 21600,
+    auto_discovery_enabled BOOLEAN DEFAULT 0,
+    max_influencers_to_monitor INTEGER DEFAULT 100,
+    platforms_enabled JSON DEFAULT '["instagram"]',
+    updated_at TIMESTAMP DEFAULT {_NOW}
+);
+
+CREATE TABLE processing_logs (
+    id TEXT PRIMARY KEY DEFAULT {_UUID},
+    influencer_handle TEXT,
+    platform TEXT,
+    action TEXT,
+    status TEXT,
+    products_found INTEGER DEFAULT 0,
+    products_saved INTEGER DEFAULT 0,
+    error_message TEXT,
+    execution_time_seconds REAL,
+    stage_timings JSON,
+    created_at TIMESTAMP DEFAULT {_NOW}
+);
+"""
+
+_OPERATORS = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+_OBJECT_MEDIA_TYPE = "application/vnd.pgrst.object+json"
+
+
+class PostgRESTError(Exception):
+    def __init__(self, status: int, code: str, message: str, details: Optional[str] = None):
+        super().__init__(message)
+        self.status = status
+        self.body = {"code": code, "message": message, "details": details, "hint": None}
+
+
+def _split_top_level(text: str, sep: str = ",") -> list[str]:
+    """Split on `sep` outside parentheses and double quotes."""
+    parts, depth, quoted, current = [], 0, False, []
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        if char == sep and depth == 0 and not quoted:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(char)
+    parts.append("".join(current))
+    return [p.strip() for p in parts if p.strip()]
+
+
+def _unquote_value(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1].replace('\\"', '"')
+    return value
+
+
+class _Table:
+    """Column metadata for one SQLite table."""
+
+    def __init__(self, conn: sqlite3.Connection, name: str):
+        self.name = name
+        info = conn.execute(f'PRAGMA table_info("{name}")').fetchall()
+        self.columns = [row[1] for row in info]
+        self.types = {row[1]: (row[2] or "").upper() for row in info}
+        self.primary_key = [row[1] for row in sorted(info, key=lambda r: r[5]) if row[5]]
+        # {column in this table: (parent table, parent column)}
+        self.foreign_keys = {
+            row[3]: (row[2], row[4])
+            for row in conn.execute(f'PRAGMA foreign_key_list("{name}")').fetchall()
+        }
+
+    def check(self, column: str) -> str:
+        if column not in self.types:
+            raise PostgRESTError(
+                400, "42703", f"column {self.name}.{column} does not exist"
+            )
+        return column
+
+    def to_db(self, column: str, value: Any) -> Any:
+        kind = self.types.get(column, "")
+        if kind == "BOOLEAN" and isinstance(value, str):
+            return {"true": 1, "false": 0}.get(value.lower(), value)
+        if kind == "JSON" and value is not None and not isinstance(value, str):
+            return json.dumps(value)
+        return value
+
+    def from_db(self, row: dict) -> dict:
+        for column, value in row.items():
+            kind = self.types.get(column, "")
+            if value is None:
+                continue
+            if kind == "BOOLEAN":
+                row[column] = bool(value)
+            elif kind == "JSON":
+                try:
+                    row[column] = json.loads(value)
+                except (TypeError, ValueError):
+                    pass
+        return row
+
+
+class LocalPostgREST:
+    """A threaded HTTP server answering PostgREST requests from a SQLite database."""
+
+    def __init__(self, path: str = ":memory:", schema: Optional[str] = SCHEMA, host: str = "127.0.0.1", port: int = 0):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        if schema and not self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' LIMIT 1"
+        ).fetchone():
+            self.conn.executescript(schema)
+        self.lock = threading.RLock()
+        self.requests: Counter = Counter()  # (method, table) -> count
+        self._rpc: dict[str, Callable[[sqlite3.Connection, dict], Any]] = {}
+        self._tables: dict[str, _Table] = {}
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    # ── Lifecycle ──────────────────────────────────────────────────────────────
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "LocalPostgREST":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="local-postgrest", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "LocalPostgREST":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # ── Direct access (seeding, assertions) ────────────────────────────────────
+
+    @property
+    def round_trips(self) -> int:
+        return sum(self.requests.values())
+
+    def register_rpc(self, name: str, fn: Callable[[sqlite3.Connection, dict], Any]) -> None:
+        """Serve `POST /rest/v1/rpc/<name>`; `fn(conn, params)` returns rows or a value."""
+        self._rpc[name] = fn
+
+    def insert_many(self, table: str, rows: list[dict]) -> None:
+        """Bulk-load rows without going through HTTP (not counted as round trips)."""
+        if not rows:
+            return
+        meta = self.table(table)
+        columns = [meta.check(c) for c in rows[0]]
+        sql = f'INSERT INTO "{table}" ({", ".join(columns)}) VALUES ({", ".join("?" for _ in columns)})'
+        with self.lock:
+            self.conn.executemany(sql, ([meta.to_db(c, row.get(c)) for c in columns] for row in rows))
+            self.conn.commit()
+
+    def count(self, table: str) -> int:
+        with self.lock:
+            return self.conn.execute(f'SELECT COUNT(*) FROM "{self.table(table).name}"').fetchone()[0]
+
+    def table(self, name: str) -> _Table:
+        meta = self._tables.get(name)
+        if meta is None:
+            exists = self.conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type IN ('table', 'view') AND name = ?", (name,)
+            ).fetchone()
+            if not exists:
+                raise PostgRESTError(404, "42P01", f'relation "public.{name}" does not exist')
+            meta = self._tables[name] = _Table(self.conn, name)
+        return meta
+
+    # ── Filters ────────────────────────────────────────────────────────────────
+
+    def _condition(self, meta: _Table, column: str, expr: str) -> tuple[str, list]:
+        """Translate `column=<expr>` (e.g. `ilike.*foo*`, `not.in.(a,b)`) to SQL."""
+        negate = expr.startswith("not.")
+        if negate:
+            expr = expr[4:]
+        op, _, value = expr.partition(".")
+        col = f'"{meta.name}"."{meta.check(column)}"'
+
+        if op in _OPERATORS:
+            sql, params = f"{col} {_OPERATORS[op]} ?", [meta.to_db(column, _unquote_value(value))]
+        elif op in ("like", "ilike"):
+            pattern = _unquote_value(value).replace("*", "%")
+            if op == "like":
+                sql, params = f"{col} GLOB ?", [pattern.replace("%", "*").replace("_", "?")]
+            else:
+                # SQLite's LIKE is already case-insensitive (ASCII), like ILIKE here.
+                sql, params = f"{col} LIKE ? ESCAPE '\\'", [pattern]
+        elif op == "is":
+            literal = {"null": "NULL", "true": "1", "false": "0"}.get(value.lower())
+            if literal is None:
+                raise PostgRESTError(400, "PGRST100", f"unknown value for is: {value}")
+            sql, params = (f"{col} IS NULL" if literal == "NULL" else f"{col} = {literal}"), []
+        elif op == "in":
+            if not (value.startswith("(") and value.endswith(")")):
+                raise PostgRESTError(400, "PGRST100", f"in filter needs a list: {value}")
+            items = [meta.to_db(column, _unquote_value(v)) for v in _split_top_level(value[1:-1])]
+            if not items:
+                sql, params = "0", []
+            else:
+                sql, params = f"{col} IN ({', '.join('?' for _ in items)})", items
+        else:
+            raise PostgRESTError(400, "PGRST100", f"unsupported operator: {op}")
+
+        return (f"NOT ({sql})" if negate else sql), params
+
+    def _logic(self, meta: _Table, op: str, expr: str) -> tuple[str, list]:
+        """Translate an `or=(...)` / `and=(...)` tree to SQL."""
+        if not (expr.startswith("(") and expr.endswith(")")):
+            raise PostgRESTError(400, "PGRST100", f"{op} filter needs parentheses: {expr}")
+        clauses, params = [], []
+        for item in _split_top_level(expr[1:-1]):
+            negate = item.startswith("not.")
+            body = item[4:] if negate else item
+            nested = re.match(r"^(and|or)(\(.*\))$", body)
+            if nested:
+                sql, item_params = self._logic(meta, nested.group(1), nested.group(2))
+            else:
+                column, _, condition = body.partition(".")
+                sql, item_params = self._condition(meta, column, condition)
+            clauses.append(f"NOT ({sql})" if negate else sql)
+            params.extend(item_params)
+        joiner = " OR " if op == "or" else " AND "
+        return "(" + joiner.join(clauses) + ")", params
+
+    def _where(self, meta: _Table, query: list[tuple[str, str]]) -> tuple[str, list]:
+        clauses, params = [], []
+        for key, value in query:
+            if key in ("select", "order", "limit", "offset", "on_conflict", "columns"):
+                continue
+            if key in ("or", "and", "not.or", "not.and"):
+                negate = key.startswith("not.")
+                sql, item_params = self._logic(meta, key.split(".")[-1], value)
+                sql = f"NOT {sql}" if negate else sql
+            elif "." in key:
+                raise PostgRESTError(400, "PGRST100", f"filters on embedded resources are not supported: {key}")
+            else:
+                sql, item_params = self._condition(meta, key, value)
+            clauses.append(sql)
+            params.extend(item_params)
+        return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+    def _order(self, meta: _Table, order: Optional[str]) -> str:
+        if not order:
+            return ""
+        terms = []
+        for term in _split_top_level(order):
+            column, *modifiers = term.split(".")
+            sql = f'"{meta.name}"."{meta.check(column)}"'
+            sql += " DESC" if "desc" in modifiers else " ASC"
+            if "nullsfirst" in modifiers:
+                sql += " NULLS FIRST"
+            elif "nullslast" in modifiers:
+                sql += " NULLS LAST"
+            terms.append(sql)
+        return " ORDER BY " + ", ".join(terms)
+
+    # ── Select and embedding ───────────────────────────────────────────────────
+
+    def _parse_select(self, meta: _Table, select: str) -> tuple[list, list]:
+        """Return ([(alias, column)], [(alias, table, sub-select)])."""
+        columns, embeds = [], []
+        for item in _split_top_level(select or "*"):
+            alias = None
+            match = re.match(r"^(?:(\w+):)?([\w!]+)\((.*)\)$", item)
+            if match:
+                alias, name, sub = match.groups()
+                name = name.split("!")[0]
+                embeds.append((alias or name, name, sub))
+                continue
+            if ":" in item.split("::")[0]:
+                alias, item = item.split(":", 1)
+            item = item.split("::")[0]
+            if item == "*":
+                columns.extend((c, c) for c in meta.columns)
+            else:
+                columns.append((alias or item, meta.check(item)))
+        return columns, embeds
+
+    def _embed(self, meta: _Table, rows: list[dict], alias: str, name: str, sub: str) -> None:
+        child = self.table(name)
+
+        def fetch(key_column: str, keys: list) -> list[dict]:
+            if not keys:
+                return []
+            in_list = ",".join(json.dumps(k) for k in keys)
+            # The join key is always fetched, then dropped if it wasn't asked for.
+            found = self._select_rows(child, f"{sub},{key_column}", [(key_column, f"in.({in_list})")])
+            keep_key = key_column in {c for _, c in self._parse_select(child, sub)[0]}
+            pairs = []
+            for item in found:
+                key = item[key_column] if keep_key else item.pop(key_column)
+                pairs.append((key, item))
+            return pairs
+
+        # One-to-many: the embedded table points at us (products -> buy_links).
+        for fk_column, (parent, parent_column) in child.foreign_keys.items():
+            if parent == meta.name:
+                grouped: dict = {}
+                keys = list({row[parent_column] for row in rows if row.get(parent_column) is not None})
+                for key, item in fetch(fk_column, keys):
+                    grouped.setdefault(key, []).append(item)
+                for row in rows:
+                    row[alias] = grouped.get(row.get(parent_column), [])
+                return
+        # Many-to-one: we point at the embedded table (buy_links -> products).
+        for fk_column, (parent, parent_column) in meta.foreign_keys.items():
+            if parent == child.name:
+                keys = list({row[fk_column] for row in rows if row.get(fk_column) is not None})
+                by_key = dict(fetch(parent_column, keys))
+                for row in rows:
+                    row[alias] = by_key.get(row.get(fk_column))
+                return
+        raise PostgRESTError(
+            400, "PGRST200", f"Could not find a relationship between '{meta.name}' and '{name}'"
+        )
+
+    def _select_rows(
+        self,
+        meta: _Table,
+        select: str,
+        query: list[tuple[str, str]],
+        order: Optional[str] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        rowids: Optional[list[int]] = None,
+    ) -> list[dict]:
+        columns, embeds = self._parse_select(meta, select)
+        # Keys needed to attach embeds are fetched even if not selected.
+        fetch = sorted({c for _, c in columns} | set(meta.columns if embeds else []))
+        where, params = self._where(meta, query)
+        if rowids is not None:
+            marks = ", ".join("?" for _ in rowids)
+            where = f"{where} AND rowid IN ({marks})" if where else f" WHERE rowid IN ({marks})"
+            params = params + list(rowids)
+        column_list = ", ".join(f'"{c}"' for c in fetch)
+        sql = f'SELECT {column_list} FROM "{meta.name}"{where}'
+        sql += self._order(meta, order) if order else (" ORDER BY rowid" if rowids is not None else "")
+        if limit is not None:
+            sql += f" LIMIT {int(limit)} OFFSET {int(offset)}"
+        elif offset:
+            sql += f" LIMIT -1 OFFSET {int(offset)}"
+
+        raw = [meta.from_db(dict(row)) for row in self.conn.execute(sql, params).fetchall()]
+        for alias, name, sub in embeds:
+            self._embed(meta, raw, alias, name, sub)
+        return [
+            {**{a: row.get(c) for a, c in columns}, **{alias: row[alias] for alias, _, _ in embeds}}
+            for row in raw
+        ]
+
+    # ── Request handling ───────────────────────────────────────────────────────
+
+    def handle(self, method: str, path: str, headers: dict, body: bytes) -> tuple[int, dict, Any]:
+        """Answer one request; returns (status, headers, JSON-able body or None)."""
+        parts = urlsplit(path)
+        segments = [unquote(s) for s in parts.path.split("/") if s]
+        if segments[:2] != ["rest", "v1"] or len(segments) < 3:
+            raise PostgRESTError(404, "PGRST125", f"invalid path: {parts.path}")
+        query = parse_qsl(parts.query, keep_blank_values=True)
+        prefer = {
+            k.strip(): v.strip()
+            for k, _, v in (p.partition("=") for p in headers.get("prefer", "").split(","))
+            if k.strip()
+        }
+        payload = json.loads(body) if body else None
+
+        if segments[2] == "rpc":
+            name = segments[3] if len(segments) > 3 else ""
+            self.requests[(method, f"rpc/{name}")] += 1
+            fn = self._rpc.get(name)
+            if fn is None:
+                raise PostgRESTError(404, "PGRST202", f"Could not find the function public.{name}")
+            params = payload if method == "POST" else dict(query)
+            with self.lock:
+                return 200, {}, fn(self.conn, params or {})
+
+        table = segments[2]
+        self.requests[(method, table)] += 1
+        with self.lock:
+            meta = self.table(table)
+            try:
+                if method in ("GET", "HEAD"):
+                    result = self._get(meta, query, headers, prefer)
+                elif method == "POST":
+                    result = self._post(meta, query, payload, prefer)
+                elif method == "PATCH":
+                    result = self._patch(meta, query, payload, prefer)
+                elif method == "DELETE":
+                    result = self._delete(meta, query, prefer)
+                else:
+                    raise PostgRESTError(405, "PGRST117", f"unsupported method {method}")
+                self.conn.commit()
+            except sqlite3.IntegrityError as exc:
+                self.conn.rollback()
+                message = str(exc)
+                if "UNIQUE" in message:
+                    raise PostgRESTError(409, "23505", f"duplicate key value violates unique constraint ({message})")
+                if "NOT NULL" in message:
+                    raise PostgRESTError(400, "23502", message)
+                raise PostgRESTError(409, "23503", message)
+            except sqlite3.OperationalError as exc:
+                self.conn.rollback()
+                if "ON CONFLICT" in str(exc):
+                    raise PostgRESTError(400, "42P10", "there is no unique or exclusion constraint matching the ON CONFLICT specification")
+                raise PostgRESTError(400, "PGRST100", str(exc))
+            except Exception:
+                self.conn.rollback()
+                raise
+
+        status, extra_headers, rows = result
+        if _OBJECT_MEDIA_TYPE in headers.get("accept", "") and isinstance(rows, list):
+            if len(rows) != 1:
+                raise PostgRESTError(
+                    406, "PGRST116", "JSON object requested, multiple (or no) rows returned",
+                    f"The result contains {len(rows)} rows",
+                )
+            rows = rows[0]
+        return status, extra_headers, rows
+
+    def _get(self, meta: _Table, query: list, headers: dict, prefer: dict) -> tuple[int, dict, Any]:
+        params = dict(query)
+        limit = int(params["limit"]) if "limit" in params else None
+        offset = int(params.get("offset", 0))
+        range_header = headers.get("range", "")
+        match = re.match(r"^(\d+)-(\d*)$", range_header.strip())
+        if match and "limit" not in params:
+            offset = int(match.group(1))
+            if match.group(2):
+                limit = int(match.group(2)) - offset + 1
+
+        rows = self._select_rows(meta, params.get("select", "*"), query, params.get("order"), limit, offset)
+
+        total = "*"
+        if prefer.get("count") in ("exact", "planned", "estimated"):
+            where, where_params = self._where(meta, query)
+            total = self.conn.execute(f'SELECT COUNT(*) FROM "{meta.name}"{where}', where_params).fetchone()[0]
+        content_range = f"{offset}-{offset + len(rows) - 1}/{total}" if rows else f"*/{total}"
+        return 200, {"Content-Range": content_range}, rows
+
+    def _returning(self, meta: _Table, query: list, prefer: dict, rowids: list[int], created: bool) -> tuple[int, dict, Any]:
+        if prefer.get("return") != "representation":
+            return (201 if created else 204), {}, None
+        select = dict(query).get("select", "*")
+        rows = self._select_rows(meta, select, [], rowids=rowids) if rowids else []
+        return (201 if created else 200), {}, rows
+
+    def _post(self, meta: _Table, query: list, payload: Any, prefer: dict) -> tuple[int, dict, Any]:
+        rows = payload if isinstance(payload, list) else [payload]
+        params = dict(query)
+        resolution = prefer.get("resolution")
+        on_conflict = [meta.check(c) for c in params["on_conflict"].split(",")] if params.get("on_conflict") else meta.primary_key
+
+        rowids = []
+        for row in rows:
+            columns = [meta.check(c) for c in row]
+            sql = f'INSERT INTO "{meta.name}" ({", ".join(columns)}) VALUES ({", ".join("?" for _ in columns)})'
+            if resolution == "merge-duplicates":
+                updates = [c for c in columns if c not in on_conflict]
+                target = ", ".join(on_conflict)
+                sql += f" ON CONFLICT({target}) DO " + (
+                    "UPDATE SET " + ", ".join(f"{c} = excluded.{c}" for c in updates) if updates else "NOTHING"
+                )
+            elif resolution == "ignore-duplicates":
+                sql += f" ON CONFLICT({', '.join(on_conflict)}) DO NOTHING"
+            cursor = self.conn.execute(sql, [meta.to_db(c, row[c]) for c in columns])
+            if cursor.rowcount and resolution is None:
+                rowids.append(cursor.lastrowid)
+            elif resolution and on_conflict and all(c in row for c in on_conflict):
+                found = self.conn.execute(
+                    f'SELECT rowid FROM "{meta.name}" WHERE '
+                    + " AND ".join(f"{c} = ?" for c in on_conflict),
+                    [meta.to_db(c, row[c]) for c in on_conflict],
+                ).fetchone()
+                if found:
+                    rowids.append(found[0])
+            elif cursor.rowcount:
+                rowids.append(cursor.lastrowid)
+        return self._returning(meta, query, prefer, rowids, created=True)
+
+    def _matching_rowids(self, meta: _Table, query: list) -> list[int]:
+        where, params = self._where(meta, query)
+        return [row[0] for row in self.conn.execute(f'SELECT rowid FROM "{meta.name}"{where}', params).fetchall()]
+
+    def _patch(self, meta: _Table, query: list, payload: dict, prefer: dict) -> tuple[int, dict, Any]:
+        rowids = self._matching_rowids(meta, query)
+        if rowids and payload:
+            columns = [meta.check(c) for c in payload]
+            marks = ", ".join("?" for _ in rowids)
+            self.conn.execute(
+                f'UPDATE "{meta.name}" SET {", ".join(f"{c} = ?" for c in columns)} WHERE rowid IN ({marks})',
+                [meta.to_db(c, payload[c]) for c in columns] + rowids,
+            )
+        return self._returning(meta, query, prefer, rowids, created=False)
+
+    def _delete(self, meta: _Table, query: list, prefer: dict) -> tuple[int, dict, Any]:
+        rowids = self._matching_rowids(meta, query)
+        status, headers, rows = self._returning(meta, query, prefer, rowids, created=False)
+        if rowids:
+            marks = ", ".join("?" for _ in rowids)
+            self.conn.execute(f'DELETE FROM "{meta.name}" WHERE rowid IN ({marks})', rowids)
+        return status, headers, rows
+
+    def _handler(self) -> type:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real thing behind a pooler
+            disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+            def _respond(self) -> None:
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                headers = {k.lower(): v for k, v in self.headers.items()}
+                try:
+                    status, extra, data = server.handle(self.command, self.path, headers, body)
+                except PostgRESTError as exc:
+                    status, extra, data = exc.status, {}, exc.body
+                except Exception as exc:  # a bug here should look like a 500, not a hang
+                    status, extra, data = 500, {}, {"code": "XX000", "message": repr(exc), "details": None, "hint": None}
+                payload = b"" if data is None else json.dumps(data, default=str).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                for key, value in extra.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(payload)
+
+            do_GET = do_HEAD = do_POST = do_PATCH = do_DELETE = _respond
+
+            def log_message(self, *args) -> None:
+                pass
+
+        return Handler
@@ -0,0 +1,106 @@
+"""
+SQLite stand-ins for the SQL functions in backend/migrations, for the local
+PostgREST server.
+
+They return what the Postgres functions return, in one round trip, so a
+benchmark measures the same request pattern. They don't reproduce Postgres
+ranking: trigram similarity is computed in Python and `ts_rank` becomes a
+count of query words found.
+
+    server = LocalPostgREST().start()
+    rpc.register(server)
+"""
+
+import sqlite3
+from typing import Optional
+
+from .postgrest import LocalPostgREST
+
+SIMILARITY_THRESHOLD = 0.3  # pg_trgm's default for `%`
+
+
+def _trigrams(text: str) -> set:
+    """pg_trgm's trigrams: per lowercased word, padded with two spaces in front and one behind."""
+    grams = set()
+    for word in "".join(c if c.isalnum() else " " for c in (text or "").lower()).split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def similarity(a: Optional[str], b: Optional[str]) -> float:
+    ta, tb = _trigrams(a), _trigrams(b)
+    return len(ta & tb) / len(ta | tb) if ta and tb else 0.0
+
+
+def _words_found(text: Optional[str], q: str) -> int:
+    words = set((text or "").lower().split())
+    return sum(1 for w in q.lower().split() if w in words)
+
+
+def _like_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def search_products(conn: sqlite3.Connection, params: dict) -> list[dict]:
+    """migrations/search_products.sql"""
+    q = (params.get("q") or "").strip()
+    where, args = [], []
+    if params.get("influencer"):
+        where.append("p.influencer_id = ?")
+        args.append(params["influencer"])
+    if params.get("category"):
+        where.append("p.category LIKE ? ESCAPE '\\'")
+        args.append(f"%{_like_escape(params['category'])}%")
+    if q:
+        where.append(
+            "(similarity(p.product_name, ?) >= ? OR similarity(p.brand, ?) >= ?"
+            " OR p.product_name LIKE ? ESCAPE '\\' OR p.brand LIKE ? ESCAPE '\\' OR words_found(p.product_name || ' ' ||"
+            " COALESCE(p.brand, '') || ' ' || COALESCE(p.quote, ''), ?) > 0)"
+        )
+        args += [q, SIMILARITY_THRESHOLD, q, SIMILARITY_THRESHOLD, f"%{_like_escape(q)}%", f"%{_like_escape(q)}%", q]
+        rank = (
+            "MAX(similarity(p.product_name, ?), similarity(p.brand, ?)) + 0.1 * words_found("
+            "p.product_name || ' ' || COALESCE(p.brand, '') || ' ' || COALESCE(p.quote, ''), ?)"
+        )
+        rank_args = [q, q, q]
+    else:
+        rank, rank_args = "0.0", []
+
+    page, page_args = "", []
+    if params.get("page_cursor"):
+        after_rank, _, after_id = params["page_cursor"].partition(",")
+        page = "WHERE rank < ? OR (rank = ? AND id > ?)"
+        page_args = [float(after_rank), float(after_rank), after_id]
+
+    sql = (
+        f"SELECT * FROM (SELECT p.*, {rank} AS rank FROM products p"
+        f"{' WHERE ' + ' AND '.join(where) if where else ''}) {page}"
+        " ORDER BY rank DESC, id LIMIT ?"
+    )
+    rows = [dict(r) for r in conn.execute(sql, rank_args + args + page_args + [int(params.get("max_rows") or 50)])]
+
+    links: dict[str, list[dict]] = {}
+    ids = [r["id"] for r in rows]
+    if ids:
+        for link in conn.execute(
+            "SELECT id, product_id, store_name, price, currency, url, in_stock FROM buy_links"
+            f" WHERE product_id IN ({', '.join('?' for _ in ids)}) ORDER BY created_at",
+            ids,
+        ):
+            link = dict(link)
+            links.setdefault(link.pop("product_id"), []).append(dict(link, in_stock=bool(link["in_stock"])))
+    columns = ("id", "influencer_name", "influencer_profile_pic", "product_name", "brand",
+               "category", "quote", "video_url", "platform")
+    return [
+        dict({c: r[c] for c in columns}, buy_links=links.get(r["id"], []), rank=r["rank"],
+             next_cursor=f"{r['rank']},{r['id']}")
+        for r in rows
+    ]
+
+
+def register(server: LocalPostgREST) -> None:
+    """Serve every stand-in from `server`."""
+    server.conn.create_function("similarity", 2, similarity, deterministic=True)
+    server.conn.create_function("words_found", 2, _words_found, deterministic=True)
+    server.register_rpc("search_products", search_products)
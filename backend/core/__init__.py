@@ -0,0 +1,57 @@
+"""
+Shared backend core: process-wide clients, rate limiting and resilience.
+
+Every entry point (API, Monster, Telegram bot, pipeline scripts) gets its
+clients from here, so connections are pooled and limits are enforced across
+the whole process instead of per call site. Outbound calls go through
+`call()`, which adds retries with backoff and per-endpoint circuit breakers;
+items that still fail are kept in `deadletter` for replay. `telemetry`
+provides timing spans, JSON logs and latency histograms; `metrics` exposes
+them with counters and gauges in the Prometheus text format. `audio` turns
+videos into trimmed, cached speech audio for transcription, and
+`transcripts` keeps every finished transcript so it's never redone;
+`download` fetches videos concurrently with resume, `jsonl` streams
+records between pipeline steps, and `bulkload` writes products to the
+database in chunks. `prompts` compacts LLM prompts to a token budget, and
+`llmjson` parses their JSON replies, keeping what it can from broken ones;
+`matching` resolves the product names they recommend to catalogue rows, and
+`influencers` spots which influencer a query names.
+"""
+
+from . import audio, bulkload, deadletter, influencers, jsonl, llmjson, matching, metrics, prompts, telemetry
+from .circuit import CircuitBreaker, CircuitOpenError, get_breaker
+from .clients import get_apify, get_groq, get_http_session, get_supabase
+from .ratelimit import RateLimiter, get_limiter
+from .retry import DEFAULT_RETRY, RetryPolicy, call, is_transient
+from .telemetry import log_event, request_scope, span
+from .transcripts import TranscriptStore
+
+__all__ = [
+    "audio",
+    "bulkload",
+    "deadletter",
+    "influencers",
+    "jsonl",
+    "llmjson",
+    "matching",
+    "metrics",
+    "prompts",
+    "telemetry",
+    "CircuitBreaker",
+    "CircuitOpenError",
+    "get_breaker",
+    "get_apify",
+    "get_groq",
+    "get_http_session",
+    "get_supabase",
+    "RateLimiter",
+    "get_limiter",
+    "DEFAULT_RETRY",
+    "RetryPolicy",
+    "call",
+    "is_transient",
+    "log_event",
+    "request_scope",
+    "span",
+    "TranscriptStore",
+]
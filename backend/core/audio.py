@@ -0,0 +1,205 @@
+"""
+Audio preprocessing before transcription: extract, trim, cache.
+
+`prepare(video)` decodes a video's soundtrack with ffmpeg to mono 16 kHz PCM,
+drops the stretches without speech and writes what's left as WAV (for local
+Whisper) or Opus in Ogg (for upload to Groq), typically a few percent of the
+MP4's size. Results are cached under `AUDIO_CACHE_DIR` by a hash of the source
+file, so re-running a pipeline step doesn't decode anything twice.
+
+Voice activity detection uses `webrtcvad` when it's installed (which also drops
+music-only stretches) and a simple energy gate otherwise (silence only).
+`AUDIO_VAD=0` keeps the whole soundtrack.
+"""
+
+import array
+import hashlib
+import json
+import math
+import os
+import shutil
+import subprocess
+import wave
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from . import metrics
+from .telemetry import span
+
+AUDIO_CACHE_DIR = Path(os.getenv("AUDIO_CACHE_DIR", Path(__file__).resolve().parents[1] / "data" / "audio_cache"))
+AUDIO_VAD = os.getenv("AUDIO_VAD", "1") != "0"
+AUDIO_VAD_AGGRESSIVENESS = int(os.getenv("AUDIO_VAD_AGGRESSIVENESS", 2))  # webrtcvad: 0 (lenient) … 3 (strict)
+
+SAMPLE_RATE = 16000
+FRAME_MS = 30  # webrtcvad accepts 10, 20 or 30 ms frames
+FRAME_BYTES = SAMPLE_RATE * FRAME_MS // 1000 * 2  # s16le mono
+PADDING_FRAMES = 10  # keep 300 ms either side of speech so words aren't clipped
+ENERGY_THRESHOLD_DB = -45.0
+OPUS_BITRATE = "24k"
+FORMATS = {"wav": ".wav", "opus": ".ogg"}
+
+
+@dataclass
+class PreparedAudio:
+    path: Path
+    source_seconds: float
+    speech_seconds: float
+    cached: bool
+
+    @property
+    def empty(self) -> bool:
+        """True when VAD found no speech at all (music-only or silent video)."""
+        return self.speech_seconds <= 0
+
+
+def available() -> bool:
+    """Whether ffmpeg is on PATH; callers fall back to the raw video without it."""
+    return shutil.which("ffmpeg") is not None
+
+
+def file_hash(path) -> str:
+    """SHA-256 of a file, read in 1 MiB chunks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# ── Voice activity ─────────────────────────────────────────────────────────────
+
+def _is_loud(frame: bytes) -> bool:
+    samples = array.array("h", frame)
+    if not samples:
+        return False
+    rms = math.sqrt(sum(s * s for s in samples) / len(samples))
+    return rms > 0 and 20 * math.log10(rms / 32768) > ENERGY_THRESHOLD_DB
+
+
+def _detector() -> Optional[tuple[str, Callable[[bytes], bool]]]:
+    """(cache variant, is_speech(frame)) for the configured VAD, or None to keep everything."""
+    if not AUDIO_VAD:
+        return None
+    try:
+        import webrtcvad
+    except ImportError:
+        return "energy", _is_loud
+    vad = webrtcvad.Vad(AUDIO_VAD_AGGRESSIVENESS)
+    return f"vad{AUDIO_VAD_AGGRESSIVENESS}", lambda frame: vad.is_speech(frame, SAMPLE_RATE)
+
+
+def _voiced(frames: Iterator[bytes], is_speech: Callable[[bytes], bool]) -> Iterator[bytes]:
+    """Yield the frames inside speech, switching on/off when 90% of a padding window agrees."""
+    window: deque = deque(maxlen=PADDING_FRAMES)
+    triggered = False
+    for frame in frames:
+        if len(frame) < FRAME_BYTES:
+            continue  # trailing partial frame
+        speech = is_speech(frame)
+        if not triggered:
+            window.append((frame, speech))
+            if sum(s for _, s in window) > 0.9 * PADDING_FRAMES:
+                triggered = True
+                yield from (f for f, _ in window)
+                window.clear()
+        else:
+            yield frame
+            window.append((frame, speech))
+            if sum(not s for _, s in window) > 0.9 * PADDING_FRAMES:
+                triggered = False
+                window.clear()
+
+
+# ── ffmpeg ─────────────────────────────────────────────────────────────────────
+
+def _frames(video_path) -> Iterator[bytes]:
+    """Stream the soundtrack as mono 16 kHz s16le frames, without loading the file."""
+    proc = subprocess.Popen(
+        ["ffmpeg", "-nostdin", "-loglevel", "error", "-i", str(video_path),
+         "-vn", "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "-"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    try:
+        while True:
+            frame = proc.stdout.read(FRAME_BYTES)
+            if not frame:
+                break
+            yield frame
+    finally:
+        proc.stdout.close()
+        stderr = proc.stderr.read().decode(errors="replace")
+        proc.stderr.close()
+        if proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed on {video_path}: {stderr.strip()[-300:]}")
+
+
+def _encode_opus(wav_path: Path, out_path: Path) -> None:
+    subprocess.run(
+        ["ffmpeg", "-nostdin", "-loglevel", "error", "-y", "-i", str(wav_path),
+         "-c:a", "libopus", "-b:a", OPUS_BITRATE, "-application", "voip", "-f", "ogg", str(out_path)],
+        check=True,
+        capture_output=True,
+    )
+
+
+# ── Public API ─────────────────────────────────────────────────────────────────
+
+def prepare(video_path, fmt: str = "wav") -> PreparedAudio:
+    """Extract (and VAD-trim) the speech in `video_path` as `fmt` ("wav" or "opus"), cached by file hash."""
+    detector = _detector()
+    variant = detector[0] if detector else "full"
+    out = AUDIO_CACHE_DIR / f"{file_hash(video_path)[:32]}.{variant}{FORMATS[fmt]}"
+    meta_path = out.with_suffix(".json")  # shared by the wav and opus outputs
+
+    if out.exists() and meta_path.exists():
+        metrics.cache_lookup("audio", True)
+        meta = json.loads(meta_path.read_text())
+        return PreparedAudio(out, meta["source_seconds"], meta["speech_seconds"], cached=True)
+    metrics.cache_lookup("audio", False)
+
+    AUDIO_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_wav = out.with_name(f"{out.name}.{os.getpid()}.tmp.wav")
+    tmp_out = out.with_name(f"{out.name}.{os.getpid()}.tmp")
+    total = kept = 0
+
+    def counted() -> Iterator[bytes]:
+        nonlocal total
+        for frame in _frames(video_path):
+            total += len(frame)
+            yield frame
+
+    with span("audio.prepare", format=fmt, vad=variant) as s:
+        try:
+            with wave.open(str(tmp_wav), "wb") as w:
+                w.setnchannels(1)
+                w.setsampwidth(2)
+                w.setframerate(SAMPLE_RATE)
+                for frame in _voiced(counted(), detector[1]) if detector else counted():
+                    w.writeframes(frame)
+                    kept += len(frame)
+            if not kept:
+                tmp_out.write_bytes(b"")
+            elif fmt == "opus":
+                _encode_opus(tmp_wav, tmp_out)
+            else:
+                os.replace(tmp_wav, tmp_out)
+            os.replace(tmp_out, out)
+        finally:
+            tmp_wav.unlink(missing_ok=True)
+            tmp_out.unlink(missing_ok=True)
+
+        source_seconds = total / 2 / SAMPLE_RATE
+        speech_seconds = kept / 2 / SAMPLE_RATE
+        meta_tmp = meta_path.with_name(f"{meta_path.name}.{os.getpid()}.tmp")
+        meta_tmp.write_text(json.dumps({"source_seconds": source_seconds, "speech_seconds": speech_seconds}))
+        os.replace(meta_tmp, meta_path)
+        s.set(
+            source_seconds=round(source_seconds, 1),
+            speech_seconds=round(speech_seconds, 1),
+            bytes_in=os.path.getsize(video_path),
+            bytes_out=out.stat().st_size,
+        )
+    return PreparedAudio(out, source_seconds, speech_seconds, cached=False)
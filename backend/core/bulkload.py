@@ -0,0 +1,354 @@
+"""
+Bulk loading of extracted products and their placeholder buy links.
+
+Product ids are generated here rather than by the database, so a chunk of
+products and all of its buy links go out as two multi-row inserts with no
+round trip in between to learn the new ids. Two back ends:
+
+- `load_rest(products, insert)` posts `BULK_CHUNK` rows at a time through
+  PostgREST; `supabase_insert(client)` and `rest_insert(url, key)` adapt the
+  supabase client or a pooled `requests.Session` to `insert(table, rows)`.
+- `load_copy(products, dsn)` streams rows into a Postgres you can reach
+  directly (local or the Supabase pooler) with `COPY`, one transaction per
+  chunk. Needs `psycopg` (pip install "psycopg[binary]").
+
+Both take an optional `resolve(influencer_name) -> influencer_id`
+(`influencers.resolver(client)`) that fills `products.influencer_id`; without
+it, the insert trigger from migrations/products_influencer_id.sql looks the
+id up in the database.
+
+Inserts skip ids that already exist, so a retry after a timeout that had
+in fact committed is harmless. A chunk that fails is dead-lettered product
+by product as `products_insert` (with its links), so
+`replay_dead_letters.py products_insert` can retry it.
+
+`backfill_links(client, make_links)` adds links to products that already
+exist, a page of products at a time: it finds the link-less ones with one
+anti-join (the `products_without_links` RPC from
+migrations/products_without_links.sql, or an embedded select without it) and
+bulk-inserts their links. Pages are walked by id, so a run can stop anywhere
+and pick up from its checkpoint, and products that already have links are
+never touched twice.
+"""
+
+import os
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+from urllib.parse import quote_plus
+
+from . import deadletter
+from .ratelimit import get_limiter
+from .retry import call
+
+BULK_CHUNK = int(os.getenv("BULK_CHUNK", 500))
+
+PRODUCT_COLUMNS = ("id", "influencer_name", "product_name", "brand", "category", "quote", "video_url", "platform")
+LINK_COLUMNS = ("id", "product_id", "store_name", "url", "price", "currency", "in_stock")
+
+# Search pages on the Egyptian stores, until real links are found for a product.
+PLACEHOLDER_STORES = (
+    ("Amazon.eg", "https://www.amazon.eg/s?k={}"),
+    ("Noon Egypt", "https://www.noon.com/egypt-en/search/?q={}"),
+    ("Jumia Egypt", "https://www.jumia.com.eg/catalog/?q={}"),
+)
+
+
+Resolver = Callable[[str], Optional[str]]
+
+
+def product_row(product: dict, product_id: Optional[str] = None, resolve: Optional[Resolver] = None) -> dict:
+    """The `products` row for one extracted product, with a fresh id unless given one."""
+    row = {
+        "id": product_id or str(uuid.uuid4()),
+        "influencer_name": product.get("influencer") or "Unknown",
+        "product_name": product.get("product_name", ""),
+        "brand": product.get("brand", ""),
+        "category": product.get("category", "other"),
+        "quote": product.get("quote", ""),
+        "video_url": product.get("video_url", ""),
+        "platform": product.get("platform", "tiktok"),
+    }
+    if resolve:
+        # No name means no influencer: leave the id NULL rather than linking to "Unknown".
+        row["influencer_id"] = resolve(product["influencer"]) if product.get("influencer") else None
+    return row
+
+
+def placeholder_links(row: dict) -> list[dict]:
+    """Store search links for a product row."""
+    query = quote_plus(row["product_name"])
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "product_id": row["id"],
+            "store_name": store,
+            "url": url.format(query),
+            "price": None,
+            "currency": "EGP",
+            "in_stock": True,
+        }
+        for store, url in PLACEHOLDER_STORES
+    ]
+
+
+@dataclass
+class LoadStats:
+    products: int = 0
+    links: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rate(self) -> float:
+        """Products loaded per second."""
+        return self.products / self.seconds if self.seconds else 0.0
+
+
+def chunked(items: Iterable, size: int) -> Iterator[list]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _rows(batch: list[dict], resolve: Optional[Resolver] = None) -> tuple[list[dict], list[dict]]:
+    rows = [product_row(p, resolve=resolve) for p in batch if p.get("product_name")]
+    return rows, [link for row in rows for link in placeholder_links(row)]
+
+
+def _dead_letter(rows: list[dict], links: list[dict], exc: Exception) -> None:
+    by_product: dict[str, list[dict]] = {}
+    for link in links:
+        by_product.setdefault(link["product_id"], []).append(link)
+    for row in rows:
+        deadletter.record("products_insert", {"product": row, "buy_links": by_product.get(row["id"], [])}, exc)
+
+
+def _progress(stats: LoadStats, started: float) -> None:
+    stats.seconds = time.perf_counter() - started
+    print(f"  … {stats.products} products, {stats.links} links ({stats.rate:.0f} products/s)")
+
+
+# ── PostgREST ─────────────────────────────────────────────────────────────────
+
+def supabase_insert(client) -> Callable[..., None]:
+    """`insert(table, rows)` over the supabase client, retried and metered like other calls.
+
+    Rows carry their own ids, so rows that already exist are skipped: a retry
+    after a timeout that had in fact committed succeeds instead of failing
+    with a duplicate key. Tables keyed by something else (influencers, by
+    name) pass `on_conflict`.
+    """
+
+    def insert(table: str, rows: list[dict], on_conflict: str = "id") -> None:
+        call(
+            "supabase",
+            client.table(table).upsert(rows, on_conflict=on_conflict, ignore_duplicates=True).execute,
+            endpoint=f"supabase.{table}",
+        )
+
+    return insert
+
+
+def rest_insert(url: str, key: str, session=None) -> Callable[..., None]:
+    """`insert(table, rows)` as raw PostgREST POSTs on one pooled session (existing ids skipped, as above)."""
+    from .clients import get_http_session
+
+    session = session or get_http_session()
+    headers = {
+        "apikey": key,
+        "Authorization": f"Bearer {key}",
+        "Content-Type": "application/json",
+        "Prefer": "return=minimal,resolution=ignore-duplicates",
+    }
+
+    def post(table: str, rows: list[dict], on_conflict: str) -> None:
+        get_limiter("supabase").acquire()  # a plain session: no client hook takes the token
+        response = session.post(
+            f"{url}/rest/v1/{table}", params={"on_conflict": on_conflict}, headers=headers, json=rows
+        )
+        response.raise_for_status()
+
+    def insert(table: str, rows: list[dict], on_conflict: str = "id") -> None:
+        call("supabase", post, table, rows, on_conflict, endpoint=f"supabase.{table}")
+
+    return insert
+
+
+def load_rest(
+    products: Iterable[dict],
+    insert: Callable[[str, list[dict]], None],
+    chunk: int = BULK_CHUNK,
+    progress: bool = True,
+    resolve: Optional[Resolver] = None,
+) -> LoadStats:
+    """Insert products and their placeholder links, two requests per `chunk` products."""
+    stats = LoadStats()
+    started = time.perf_counter()
+    for batch in chunked(products, chunk):
+        rows, links = _rows(batch, resolve)
+        if not rows:
+            continue
+        try:
+            insert("products", rows)
+        except Exception as exc:
+            print(f"  [WARN] Could not insert {len(rows)} products: {exc}")
+            _dead_letter(rows, links, exc)
+            stats.failed += len(rows)
+            continue
+        stats.products += len(rows)
+        try:
+            insert("buy_links", links)
+            stats.links += len(links)
+        except Exception as exc:
+            print(f"  [WARN] Could not insert {len(links)} buy links: {exc}")
+            for link in links:
+                deadletter.record("buy_links_insert", link, exc)
+        if progress:
+            _progress(stats, started)
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+
+# ── COPY ──────────────────────────────────────────────────────────────────────
+
+def load_copy(
+    products: Iterable[dict],
+    dsn: str,
+    chunk: int = BULK_CHUNK * 10,
+    progress: bool = True,
+    resolve: Optional[Resolver] = None,
+) -> LoadStats:
+    """COPY products and links straight into Postgres at `dsn`, committing every `chunk` products."""
+    try:
+        import psycopg
+    except ImportError:
+        raise RuntimeError('psycopg not installed. Run: pip install "psycopg[binary]"') from None
+
+    product_columns = PRODUCT_COLUMNS + (("influencer_id",) if resolve else ())
+    products_sql = f"COPY products ({', '.join(product_columns)}) FROM STDIN"
+    links_sql = f"COPY buy_links ({', '.join(LINK_COLUMNS)}) FROM STDIN"
+    stats = LoadStats()
+    started = time.perf_counter()
+    with psycopg.connect(dsn) as conn:
+        for batch in chunked(products, chunk):
+            rows, links = _rows(batch, resolve)
+            if not rows:
+                continue
+            try:
+                with conn.transaction(), conn.cursor() as cur:
+                    with cur.copy(products_sql) as copy:
+                        for row in rows:
+                            copy.write_row([row[c] for c in product_columns])
+                    with cur.copy(links_sql) as copy:
+                        for link in links:
+                            copy.write_row([link[c] for c in LINK_COLUMNS])
+            except Exception as exc:
+                print(f"  [WARN] COPY of {len(rows)} products failed: {exc}")
+                _dead_letter(rows, links, exc)
+                stats.failed += len(rows)
+                continue
+            stats.products += len(rows)
+            stats.links += len(links)
+            if progress:
+                _progress(stats, started)
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+
+# ── Backfill ──────────────────────────────────────────────────────────────────
+
+_FIRST_ID = "00000000-0000-0000-0000-000000000000"
+_DELETE_CHUNK = 100  # ids per `in.(...)` filter, to keep URLs short
+_rpc_missing = False
+
+
+def _is_missing_rpc(exc: Exception) -> bool:
+    return getattr(exc, "code", None) == "PGRST202" or "PGRST202" in str(exc)
+
+
+def _products_page(client, after: str, limit: int, missing_only: bool) -> tuple[list[dict], Optional[str]]:
+    """Products with id > `after` (only link-less ones if `missing_only`), and the last id scanned."""
+    global _rpc_missing
+    if missing_only and not _rpc_missing:
+        try:
+            rows = call(
+                "supabase",
+                client.rpc("products_without_links", {"after_id": after, "max_rows": limit}).execute,
+                endpoint="supabase.rpc",
+            ).data
+            return rows, rows[-1]["id"] if rows else None
+        except Exception as exc:
+            if not _is_missing_rpc(exc):
+                raise
+            print("  [WARN] products_without_links() not installed — falling back to an embedded select")
+            _rpc_missing = True
+
+    rows = call(
+        "supabase",
+        client.table("products").select("id,product_name,brand,buy_links(id)")
+        .gt("id", after).order("id").limit(limit).execute,
+        endpoint="supabase.products",
+    ).data
+    last = rows[-1]["id"] if rows else None
+    if missing_only:
+        rows = [r for r in rows if not r.get("buy_links")]
+    return rows, last
+
+
+def backfill_links(
+    client,
+    make_links: Callable[[dict], list[dict]],
+    replace: bool = False,
+    page: int = BULK_CHUNK,
+    checkpoint: Optional[Path] = None,
+    progress: bool = True,
+) -> LoadStats:
+    """Give products the links `make_links(product)` returns, `page` products per round trip.
+
+    By default only products without any buy link are touched. `replace=True`
+    deletes and rewrites the links of every product instead. The last id done
+    is kept in `checkpoint` (if given) until the run completes, so an
+    interrupted run resumes after it.
+    """
+    insert = supabase_insert(client)
+    after = checkpoint.read_text().strip() if checkpoint and checkpoint.exists() else _FIRST_ID
+    if after != _FIRST_ID:
+        print(f"  ↻ Resuming after product {after}")
+    stats = LoadStats()
+    started = time.perf_counter()
+    while True:
+        rows, last = _products_page(client, after, page, missing_only=not replace)
+        if last is None:
+            break
+        if rows:
+            if replace:
+                for ids in chunked([r["id"] for r in rows], _DELETE_CHUNK):
+                    call("supabase", client.table("buy_links").delete().in_("product_id", ids).execute,
+                         endpoint="supabase.buy_links")
+            links = [
+                dict(link, id=str(uuid.uuid4()), product_id=row["id"])
+                for row in rows
+                for link in make_links(row)
+            ]
+            if links:
+                insert("buy_links", links)
+            stats.products += len(rows)
+            stats.links += len(links)
+        after = last
+        if checkpoint:
+            checkpoint.parent.mkdir(parents=True, exist_ok=True)
+            checkpoint.write_text(after)
+        if progress:
+            _progress(stats, started)
+    if checkpoint:
+        checkpoint.unlink(missing_ok=True)
+    stats.seconds = time.perf_counter() - started
+    return stats
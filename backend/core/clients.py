@@ -0,0 +1,162 @@
+"""
+Process-wide clients for Supabase, Groq, Apify and plain HTTP.
+
+Each client is created on first use behind a lock and then shared by every
+caller in the process. SDK imports happen inside the factories so importing
+this module stays cheap.
+"""
+
+import logging
+import os
+import threading
+from typing import TYPE_CHECKING, Any, Callable
+
+from dotenv import load_dotenv
+
+if TYPE_CHECKING:
+    import requests
+    from apify_client import ApifyClient
+    from groq import Groq
+    from supabase import Client
+
+load_dotenv()
+
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", 20))
+
+_lock = threading.Lock()
+_clients: dict[str, Any] = {}
+
+
+def _shared(name: str, build: Callable[[], Any]) -> Any:
+    client = _clients.get(name)
+    if client is None:
+        with _lock:
+            client = _clients.get(name)
+            if client is None:
+                client = build()
+                _clients[name] = client
+    return client
+
+
+def _build_supabase() -> "Client":
+    url = os.getenv("SUPABASE_URL", "")
+    key = os.getenv("SUPABASE_KEY", "")
+    if not url or not key:
+        raise RuntimeError("SUPABASE_URL and SUPABASE_KEY environment variables must be set.")
+
+    from supabase import create_client
+
+    client = create_client(url, key)
+    _instrument_postgrest(client)
+    return client
+
+
+def _instrument_postgrest(client: "Client") -> None:
+    """Throttle, time and count every PostgREST request.
+
+    Each request goes through the shared "supabase" rate limiter, its latency
+    lands in the `supabase.<table>` histogram and it counts as one round trip
+    on the current request scope. supabase-py rebuilds its PostgREST client on
+    auth events, so the hooks are attached to each new session.
+    """
+    import time
+    import weakref
+
+    from .ratelimit import get_limiter
+    from . import metrics
+    from .telemetry import count, log_event, observe
+
+    init_postgrest = client._init_postgrest_client
+    started: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+    def on_request(request):
+        get_limiter("supabase").acquire()
+        started[request] = time.perf_counter()
+
+    def on_response(response):
+        start = started.pop(response.request, None)
+        if start is None:
+            return
+        duration = time.perf_counter() - start
+        # /rest/v1/<table> or /rest/v1/rpc/<function>
+        target = response.request.url.path.split("/rest/v1/", 1)[-1].strip("/") or "root"
+        name = f"supabase.{target.replace('/', '.')}"
+        observe(name, duration)
+        count("supabase_round_trips")
+        metrics.inc("influencer_supabase_requests_total", table=target, status=response.status_code)
+        log_event(
+            "supabase",
+            level=logging.DEBUG,  # one line per round trip
+            target=target,
+            method=response.request.method,
+            status=response.status_code,
+            duration_ms=round(duration * 1000, 2),
+        )
+
+    def init_instrumented(*args, **kwargs):
+        postgrest = init_postgrest(*args, **kwargs)
+        hooks = postgrest.session.event_hooks
+        hooks["request"].append(on_request)
+        hooks["response"].append(on_response)
+        postgrest.session.event_hooks = hooks
+        return postgrest
+
+    client._init_postgrest_client = init_instrumented
+
+
+def _build_groq() -> "Groq":
+    api_key = os.getenv("GROQ_API_KEY", "")
+    if not api_key:
+        raise RuntimeError("GROQ_API_KEY environment variable must be set.")
+
+    from groq import Groq
+
+    # Retries are handled by core.call (backoff, Retry-After, circuit breakers);
+    # SDK-level retries would multiply them.
+    return Groq(api_key=api_key, max_retries=0)
+
+
+def _build_apify() -> "ApifyClient":
+    from apify_client import ApifyClient
+
+    return ApifyClient(os.getenv("APIFY_API_TOKEN"))
+
+
+def _build_http_session() -> "requests.Session":
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=HTTP_POOL_SIZE, pool_maxsize=HTTP_POOL_SIZE)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def set_client(name: str, client: Any) -> None:
+    """Install `client` as the shared "supabase", "groq", "apify" or "http" client.
+
+    For local stand-ins such as the fakes in `bench/`; the app never calls this.
+    """
+    with _lock:
+        _clients[name] = client
+
+
+def get_supabase() -> "Client":
+    """Return the process-wide Supabase client."""
+    return _shared("supabase", _build_supabase)
+
+
+def get_groq() -> "Groq":
+    """Return the process-wide Groq client."""
+    return _shared("groq", _build_groq)
+
+
+def get_apify() -> "ApifyClient":
+    """Return the process-wide Apify client. `apify_client` is only imported here."""
+    return _shared("apify", _build_apify)
+
+
+def get_http_session() -> "requests.Session":
+    """Return a pooled `requests.Session` for raw REST calls."""
+    return _shared("http", _build_http_session)
@@ -0,0 +1,67 @@
+"""
+Dead-letter records for work that failed after all retries.
+
+Each failed item is appended as one JSON line to `<DEAD_LETTER_DIR>/<kind>.jsonl`
+together with the error, so it can be inspected and replayed later
+(see `scripts/replay_dead_letters.py`) instead of being lost.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator
+
+DEAD_LETTER_DIR = Path(os.getenv("DEAD_LETTER_DIR", Path(__file__).resolve().parents[1] / "data" / "dead_letter"))
+
+_lock = threading.Lock()
+
+
+def record(kind: str, payload: Any, error: BaseException) -> None:
+    """Append one failed item of `kind` with the error that killed it."""
+    entry = {
+        "kind": kind,
+        "failed_at": datetime.utcnow().isoformat(),
+        "error": f"{type(error).__name__}: {error}",
+        "payload": payload,
+    }
+    line = json.dumps(entry, ensure_ascii=False, default=str)
+    with _lock:
+        DEAD_LETTER_DIR.mkdir(parents=True, exist_ok=True)
+        with open(DEAD_LETTER_DIR / f"{kind}.jsonl", "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+    print(f"  📮 Dead-lettered {kind}: {entry['error'][:100]}")
+
+
+def read(kind: str) -> Iterator[dict]:
+    """Yield the dead-letter entries recorded for `kind`."""
+    path = DEAD_LETTER_DIR / f"{kind}.jsonl"
+    if not path.exists():
+        return
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def rewrite(kind: str, entries: list[dict]) -> None:
+    """Replace the entries for `kind`, e.g. with the ones that failed replay again."""
+    path = DEAD_LETTER_DIR / f"{kind}.jsonl"
+    with _lock:
+        if not entries:
+            path.unlink(missing_ok=True)
+            return
+        tmp = path.with_suffix(".jsonl.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+        os.replace(tmp, path)
+
+
+def kinds() -> list[str]:
+    """List the kinds that currently have dead-letter entries."""
+    if not DEAD_LETTER_DIR.exists():
+        return []
+    return sorted(p.stem for p in DEAD_LETTER_DIR.glob("*.jsonl"))
@@ -0,0 +1,174 @@
+"""
+Concurrent file downloads with resume and integrity checks.
+
+`download_all(jobs)` fetches `(url, path)` pairs over one pooled
+`httpx.AsyncClient`, at most `DOWNLOAD_CONCURRENCY` at a time. Bytes are
+written to `<path>.part` in 1 MiB chunks; an interrupted transfer resumes from
+where it stopped with an HTTP `Range` request, and the file is only renamed to
+`path` once its size matches what the server announced. A file at `path` is
+therefore always complete, and a re-run skips it. Transient failures retry with
+the shared `RetryPolicy` backoff.
+
+    results = download_all([(video_url, VIDEOS_DIR / f"{video_id}.mp4"), ...])
+"""
+
+import asyncio
+import os
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from . import metrics
+from .retry import DEFAULT_RETRY, RetryPolicy, is_transient
+from .telemetry import observe
+
+DOWNLOAD_CONCURRENCY = int(os.getenv("DOWNLOAD_CONCURRENCY", 8))
+CHUNK_SIZE = 1 << 20
+TIMEOUT = 60.0
+
+_CONTENT_RANGE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+_UNSATISFIED_RANGE = re.compile(r"bytes \*/(\d+)")
+
+
+class IncompleteDownload(Exception):
+    """The connection ended before the announced size arrived; retried by resuming."""
+
+
+@dataclass
+class DownloadResult:
+    url: str
+    path: Path
+    status: str  # "downloaded", "exists" or "failed"
+    bytes: int = 0
+    resumed: bool = False
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status != "failed"
+
+
+def _expected_size(response, offset: int) -> Optional[int]:
+    """Total file size from Content-Range (206) or Content-Length (200)."""
+    match = _CONTENT_RANGE.match(response.headers.get("content-range", ""))
+    if match and match.group(3) != "*":
+        return int(match.group(3))
+    length = response.headers.get("content-length")
+    return offset + int(length) if length and length.isdigit() else None
+
+
+async def _fetch(client, url: str, path: Path) -> DownloadResult:
+    """One attempt: resume `<path>.part` if present, rename to `path` when complete."""
+    part = path.with_name(path.name + ".part")
+    offset = part.stat().st_size if part.exists() else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+    async with client.stream("GET", url, headers=headers) as response:
+        if response.status_code == 416 and offset:
+            # Nothing left to send: the .part may already be whole, or the file changed.
+            match = _UNSATISFIED_RANGE.match(response.headers.get("content-range", ""))
+            if match and int(match.group(1)) == offset:
+                os.replace(part, path)
+                return DownloadResult(url, path, "downloaded", offset, resumed=True)
+            part.unlink()
+            raise IncompleteDownload("range not satisfiable; restarting")
+        response.raise_for_status()
+
+        resumed = response.status_code == 206
+        if not resumed:
+            offset = 0  # server ignored Range: start over
+        expected = _expected_size(response, offset)
+        received = 0
+        with open(part, "ab" if resumed else "wb") as f:
+            async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                f.write(chunk)
+                received += len(chunk)
+
+    size = part.stat().st_size
+    if expected is not None and size != expected:
+        if size > expected:
+            part.unlink()
+        raise IncompleteDownload(f"got {size} of {expected} bytes")
+    if size == 0:
+        part.unlink()
+        raise IncompleteDownload("empty response")
+    os.replace(part, path)
+    return DownloadResult(url, path, "downloaded", received, resumed=resumed)
+
+
+async def _download(client, semaphore, url: str, path: Path, retry: RetryPolicy, on_done) -> DownloadResult:
+    if path.exists() and path.stat().st_size > 0:
+        result = DownloadResult(url, path, "exists", path.stat().st_size)
+    else:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        async with semaphore:
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            for attempt in range(1, retry.attempts + 1):
+                try:
+                    result = await _fetch(client, url, path)
+                    break
+                except Exception as exc:
+                    if attempt == retry.attempts or not (is_transient(exc) or isinstance(exc, IncompleteDownload)):
+                        result = DownloadResult(url, path, "failed", error=f"{type(exc).__name__}: {exc}")
+                        break
+                    await asyncio.sleep(retry.delay(attempt, exc))
+            observe("download", loop.time() - start)
+    metrics.inc("influencer_downloads_total", result=result.status)
+    if result.status == "downloaded":
+        metrics.inc("influencer_download_bytes_total", result.bytes)
+    if on_done:
+        on_done(result)
+    return result
+
+
+async def download_many(
+    jobs: Iterable[tuple[str, Path]],
+    concurrency: int = DOWNLOAD_CONCURRENCY,
+    retry: RetryPolicy = DEFAULT_RETRY,
+    on_done: Optional[Callable[[DownloadResult], None]] = None,
+) -> list[DownloadResult]:
+    """Download every `(url, path)` job, `concurrency` at a time, in job order."""
+    import httpx
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=TIMEOUT, follow_redirects=True) as client:
+        return await asyncio.gather(*(
+            _download(client, semaphore, url, Path(path), retry, on_done) for url, path in jobs
+        ))
+
+
+class Downloader:
+    """A blocking download session for one worker thread: its own event loop and pooled client."""
+
+    def __init__(self, retry: RetryPolicy = DEFAULT_RETRY):
+        import httpx
+
+        self._loop = asyncio.new_event_loop()
+        self._retry = retry
+        # Python 3.9 binds asyncio primitives to the loop current at creation.
+        self._semaphore = self._loop.run_until_complete(self._make_semaphore())
+        self._client = httpx.AsyncClient(timeout=TIMEOUT, follow_redirects=True)
+
+    @staticmethod
+    async def _make_semaphore() -> asyncio.Semaphore:
+        return asyncio.Semaphore(1)
+
+    def fetch(self, url: str, path: Path) -> DownloadResult:
+        return self._loop.run_until_complete(_download(self._client, self._semaphore, url, Path(path), self._retry, None))
+
+    def close(self) -> None:
+        self._loop.run_until_complete(self._client.aclose())
+        self._loop.close()
+
+
+def download_all(
+    jobs: Iterable[tuple[str, Path]],
+    concurrency: int = DOWNLOAD_CONCURRENCY,
+    retry: RetryPolicy = DEFAULT_RETRY,
+    on_done: Optional[Callable[[DownloadResult], None]] = None,
+) -> list[DownloadResult]:
+    """Blocking wrapper around `download_many` for the pipeline scripts."""
+    return asyncio.run(download_many(jobs, concurrency, retry, on_done))
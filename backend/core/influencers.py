@@ -0,0 +1,305 @@
+"""
+Influencer alias index: which influencer a search or question is about.
+
+Built from the `influencers` table (name, Instagram and TikTok handles, and
+the `aliases` column from migrations/influencer_aliases.sql for Arabic
+spellings and nicknames) plus `influencer_watchlist` handles. Every alias is
+normalized like product names (`matching.normalize_name`), also indexed with
+its spaces removed ("sarahhany"), and a first name is an alias too when no
+other influencer shares it. All of them go into one Aho-Corasick automaton,
+so `detect(query)` finds any influencer in a single pass over the query.
+
+A hit resolves to an `Influencer`, and `index.filter_products(query, hit)`
+narrows a products query to them: `influencer_id = ...` once
+migrations/products_influencer_id.sql has added that foreign key, and before
+that an `in_()` on the exact `products.influencer_name` values used for them
+(the display name, and the handle the Monster saves). Either way it's an
+index lookup, not `ilike '%name%'`.
+
+Writers get the id for a product's influencer from `resolver(client)`, which
+adds an `influencers` row the first time it meets a new name, and
+`rename(client, old, new)` renames an influencer in one or two requests.
+
+The index reloads itself every `INFLUENCER_INDEX_TTL` seconds (default 300)
+in whichever request finds it stale, while other requests keep using the
+previous one; `invalidate()` forces a reload after a known change.
+
+    index = influencers.get_index(supabase)
+    influencer = index.detect("what does huda use for skin?")
+    if influencer:
+        query = index.filter_products(query, influencer)
+"""
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from .matching import Automaton, normalize_name
+from .retry import call
+
+INDEX_TTL = float(os.getenv("INFLUENCER_INDEX_TTL", 300))
+RETRY_AFTER = 30.0  # seconds before retrying a failed reload
+MIN_ALIAS_LENGTH = 3
+
+
+@dataclass(frozen=True)
+class Influencer:
+    name: str
+    id: Optional[str] = None
+    product_names: tuple = ()  # products.influencer_name values for this influencer
+
+
+def _compact(alias: str) -> str:
+    return alias.replace(" ", "")
+
+
+class InfluencerIndex:
+    """Aliases of every known influencer, searchable in one pass."""
+
+    def __init__(self, influencers: list[dict], watchlist: list[dict] = (), has_fk: bool = False):
+        self.has_fk = has_fk  # products.influencer_id exists
+        people: list[dict] = []
+        by_handle: dict[str, dict] = {}
+        for row in influencers:
+            if not row.get("name"):
+                continue
+            person = {"row": row, "names": [row["name"]], "aliases": list(row.get("aliases") or [])}
+            for handle in (row.get("instagram_handle"), row.get("tiktok_handle")):
+                if handle:
+                    person["names"].append(handle)
+                    by_handle[handle.lower().lstrip("@")] = person
+            people.append(person)
+        for row in watchlist:
+            handle = (row.get("handle") or "").lstrip("@")
+            if not handle:
+                continue
+            person = by_handle.get(handle.lower())
+            if person is None:
+                # Watched but never loaded into `influencers`: the handle is the name.
+                person = {"row": {"name": handle}, "names": [handle], "aliases": []}
+                people.append(person)
+                by_handle[handle.lower()] = person
+            elif handle not in person["names"]:
+                person["names"].append(handle)
+
+        first_names: dict[str, int] = {}
+        for person in people:
+            first = normalize_name(person["row"]["name"]).split(" ")[0]
+            first_names[first] = first_names.get(first, 0) + 1
+
+        self._aliases: dict[str, Influencer] = {}
+        self._names: dict[str, Influencer] = {}  # names, handles and listed aliases only
+        self.influencers: list[Influencer] = []
+        for person in people:
+            row = person["row"]
+            influencer = Influencer(
+                name=row["name"],
+                id=row.get("id"),
+                product_names=tuple(dict.fromkeys(person["names"])),
+            )
+            self.influencers.append(influencer)
+            for alias in person["names"] + person["aliases"]:
+                normalized = normalize_name(alias)
+                for form in (normalized, _compact(normalized)):
+                    if len(form) >= MIN_ALIAS_LENGTH:
+                        self._aliases.setdefault(form, influencer)
+                        self._names.setdefault(form, influencer)
+            first = normalize_name(row["name"]).split(" ")[0]
+            if first_names.get(first) == 1 and len(first) >= MIN_ALIAS_LENGTH:
+                self._aliases.setdefault(first, influencer)
+
+        # Padded with spaces so an alias only matches whole words.
+        self._automaton = Automaton({f" {alias} ": influencer for alias, influencer in self._aliases.items()})
+
+    def __len__(self) -> int:
+        return len(self.influencers)
+
+    def detect(self, text: str) -> Optional[Influencer]:
+        """The influencer `text` mentions, by its longest alias (earliest on a tie), or None."""
+        hits = self._automaton.find(f" {normalize_name(text)} ")
+        if not hits:
+            return None
+        start, end, influencer = max(hits, key=lambda hit: (hit[1] - hit[0], -hit[0]))
+        return influencer
+
+    def lookup(self, name: str, strict: bool = False) -> Optional[Influencer]:
+        """The influencer with exactly this name, handle or alias (`strict`: not by first name alone)."""
+        aliases = self._names if strict else self._aliases
+        normalized = normalize_name(name)
+        return aliases.get(normalized) or aliases.get(_compact(normalized))
+
+    def filter_products(self, query, influencer: Influencer):
+        """`query` on `products` narrowed to `influencer`, by foreign key when there is one."""
+        if self.has_fk and influencer.id:
+            return query.eq("influencer_id", influencer.id)
+        return query.in_("influencer_name", list(influencer.product_names))
+
+
+# ── Shared index ──────────────────────────────────────────────────────────────
+
+_index: Optional[InfluencerIndex] = None
+_loaded_at = 0.0
+_reload_lock = threading.Lock()
+_aliases_column = True
+
+
+def _is_missing_column(exc: Exception) -> bool:
+    return "42703" in str(exc) or getattr(exc, "code", None) == "42703"
+
+
+def _has_fk(client) -> bool:
+    try:
+        call("supabase", client.table("products").select("influencer_id").limit(1).execute, endpoint="supabase.products")
+        return True
+    except Exception as exc:
+        if _is_missing_column(exc):
+            return False
+        raise
+
+
+def load(client) -> InfluencerIndex:
+    """Build an index from the database (three small queries)."""
+    global _aliases_column
+    columns = "id,name,instagram_handle,tiktok_handle"
+    try:
+        influencers = call(
+            "supabase",
+            client.table("influencers").select(columns + (",aliases" if _aliases_column else "")).execute,
+            endpoint="supabase.influencers",
+        ).data or []
+    except Exception as exc:
+        if not (_aliases_column and _is_missing_column(exc)):
+            raise
+        print("  [WARN] influencers.aliases missing — run migrations/influencer_aliases.sql")
+        _aliases_column = False
+        influencers = call(
+            "supabase", client.table("influencers").select(columns).execute, endpoint="supabase.influencers"
+        ).data or []
+    watchlist = call(
+        "supabase",
+        client.table("influencer_watchlist").select("handle").execute,
+        endpoint="supabase.influencer_watchlist",
+    ).data or []
+    return InfluencerIndex(influencers, watchlist, has_fk=_has_fk(client))
+
+
+def get_index(client=None) -> InfluencerIndex:
+    """The shared index, reloaded when older than `INFLUENCER_INDEX_TTL`."""
+    global _index, _loaded_at
+    if _index is not None and time.monotonic() - _loaded_at < INDEX_TTL:
+        return _index
+    # One request reloads; the rest carry on with the old index meanwhile.
+    if not _reload_lock.acquire(blocking=_index is None):
+        return _index
+    try:
+        if _index is None or time.monotonic() - _loaded_at >= INDEX_TTL:
+            if client is None:
+                from .clients import get_supabase
+
+                client = get_supabase()
+            try:
+                _index = load(client)
+                _loaded_at = time.monotonic()
+            except Exception as exc:
+                print(f"  [WARN] Could not load the influencer index: {exc}")
+                if _index is None:
+                    _index = InfluencerIndex([])
+                _loaded_at = time.monotonic() - INDEX_TTL + RETRY_AFTER
+        return _index
+    finally:
+        _reload_lock.release()
+
+
+def invalidate() -> None:
+    """Reload the index on its next use (after influencers or the watchlist change)."""
+    global _loaded_at
+    _loaded_at = 0.0
+
+
+# ── Writers ───────────────────────────────────────────────────────────────────
+
+def _like_literal(text: str) -> str:
+    """`text` as an ilike pattern that matches only itself (case aside)."""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def influencer_id(client, name: str, platform: Optional[str] = None) -> Optional[str]:
+    """`influencers.id` for a product's `influencer_name`, adding the influencer if it's new.
+
+    A name that looks like a handle on `platform` ("instagram"/"tiktok") is
+    stored as that handle too. None for an empty name. The insert ignores a
+    row that already exists (names are unique, see
+    migrations/products_influencer_id.sql), so concurrent writers in other
+    processes all end up with the same id.
+    """
+    if not name:
+        return None
+    found = get_index(client).lookup(name, strict=True)
+    if found is not None and found.id:
+        return found.id
+    row = {"name": found.name if found else name}
+    if platform in ("instagram", "tiktok") and " " not in name:
+        row[f"{platform}_handle"] = name.lstrip("@")
+    try:
+        data = call(
+            "supabase",
+            client.table("influencers").upsert(row, on_conflict="name", ignore_duplicates=True).execute,
+            endpoint="supabase.influencers",
+        ).data
+    except Exception as exc:
+        # The same name in another case: unique on lower(name), not on name.
+        if "23505" not in str(exc) and getattr(exc, "code", None) != "23505":
+            raise
+        data = []
+    invalidate()
+    if data:
+        return data[0]["id"]
+    existing = call(
+        "supabase",
+        client.table("influencers").select("id").ilike("name", _like_literal(row["name"])).limit(1).execute,
+        endpoint="supabase.influencers",
+    ).data
+    return existing[0]["id"] if existing else None
+
+
+def resolver(client, platform: Optional[str] = None) -> Optional[Callable[[str], Optional[str]]]:
+    """`name -> influencer_id` for writers, or None until products have the influencer_id column."""
+    if not get_index(client).has_fk:
+        return None
+    return lambda name: influencer_id(client, name, platform)
+
+
+def rename(client, old: str, new: str) -> int:
+    """Rename an influencer everywhere; returns the requests it took.
+
+    With `products.influencer_id` this updates the one `influencers` row (the
+    migration's trigger renames its products), or merges it into an existing
+    `new` influencer by repointing its products in one update. Without the
+    column it's one set-based update of `products.influencer_name`.
+    """
+    index = get_index(client)
+    source = index.lookup(old, strict=True)
+    if not index.has_fk or source is None or not source.id:
+        call("supabase", client.table("products").update({"influencer_name": new}).eq("influencer_name", old).execute,
+             endpoint="supabase.products")
+        invalidate()
+        return 1
+
+    target = index.lookup(new, strict=True)
+    if target is None or not target.id or target.id == source.id:
+        call("supabase", client.table("influencers").update({"name": new}).eq("id", source.id).execute,
+             endpoint="supabase.influencers")
+        invalidate()
+        return 1
+    call(
+        "supabase",
+        client.table("products").update({"influencer_id": target.id, "influencer_name": target.name})
+        .eq("influencer_id", source.id).execute,
+        endpoint="supabase.products",
+    )
+    call("supabase", client.table("influencers").delete().eq("id", source.id).execute,
+         endpoint="supabase.influencers")
+    invalidate()
+    return 2
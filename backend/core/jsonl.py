@@ -0,0 +1,120 @@
+"""
+Append-only JSONL files for passing records between pipeline stages.
+
+A stage writes one JSON object per line as soon as each record is ready and
+flushes it, so a crash keeps everything finished so far and memory doesn't
+grow with the run. Closing a `Writer` drops a `<file>.done` marker next to
+it; a reader with `follow=True` keeps tailing the file until that marker
+appears, so the next stage can start on partial output.
+
+    with jsonl.Writer(DATA_DIR / "transcripts.jsonl") as out:
+        for video in jsonl.read(DATA_DIR / "tiktok_videos.jsonl", follow=True):
+            out.write(transcribe(video))
+"""
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Union
+
+PathLike = Union[str, Path]
+
+
+def done_marker(path: PathLike) -> Path:
+    path = Path(path)
+    return path.with_name(path.name + ".done")
+
+
+def is_done(path: PathLike) -> bool:
+    """True once the writer of `path` has closed it cleanly."""
+    return done_marker(path).exists()
+
+
+class Writer:
+    """Write records to `path` one line at a time.
+
+    `append=False` (the default) starts a new file; `append=True` adds to an
+    existing one, e.g. when a stage resumes. Either way the `.done` marker is
+    removed until `close()`.
+    """
+
+    def __init__(self, path: PathLike, append: bool = False):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        done_marker(self.path).unlink(missing_ok=True)
+        self._file = open(self.path, "a" if append else "w", encoding="utf-8")
+        self._lock = threading.Lock()  # pipeline stages write from several threads
+        self.count = 0
+
+    def write(self, record: Any) -> None:
+        line = json.dumps(record, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self.count += 1
+
+    def write_many(self, records: Iterable[Any]) -> None:
+        for record in records:
+            self.write(record)
+
+    def close(self, done: bool = True) -> None:
+        if self._file.closed:
+            return
+        self._file.close()
+        if done:
+            done_marker(self.path).touch()
+
+    def __enter__(self) -> "Writer":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        # A stage that crashed leaves no marker, so followers don't mistake its output for complete.
+        self.close(done=exc_type is None)
+
+
+def read(path: PathLike, follow: bool = False, poll: float = 1.0) -> Iterator[Any]:
+    """Yield the records in `path`, skipping a torn last line.
+
+    With `follow=True`, wait for the file to appear and keep reading new lines
+    until the writer marks it done.
+    """
+    path = Path(path)
+    while follow and not path.exists():
+        time.sleep(poll)
+    if not path.exists():
+        return
+
+    with open(path, encoding="utf-8") as f:
+        buffer = ""
+        finishing = not follow
+        while True:
+            chunk = f.readline()
+            if chunk:
+                buffer += chunk
+                if buffer.endswith("\n"):
+                    line, buffer = buffer, ""
+                    if line.strip():
+                        try:
+                            yield json.loads(line)
+                        except json.JSONDecodeError:
+                            print(f"  [WARN] Skipping corrupt line in {path.name}")
+                continue
+            # End of file. A line without "\n" is mid-write (or torn by a crash).
+            if finishing:
+                break
+            if is_done(path):
+                finishing = True  # one more pass for lines written before the marker
+            else:
+                time.sleep(poll)
+
+
+def read_records(path: PathLike, follow: bool = False) -> Iterator[Any]:
+    """Like `read`, but falls back to a legacy `<name>.json` array written by older runs."""
+    path = Path(path)
+    legacy = path.with_suffix(".json")
+    if not path.exists() and not follow and legacy.exists():
+        with open(legacy, encoding="utf-8") as f:
+            yield from json.load(f)
+        return
+    yield from read(path, follow=follow)
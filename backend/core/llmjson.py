@@ -0,0 +1,330 @@
+"""
+Tolerant JSON parsing of LLM output.
+
+Models wrap JSON in ```json fences, add a sentence before it, leave trailing
+commas, or stop mid-array when they hit `max_tokens`. `parse_array()` reads a
+list of objects out of any of that, and when the array is cut short it keeps
+every object that was completed instead of losing the whole batch;
+`parse_object()` does the same for a single object by closing what was left
+open. `ArrayParser` is the incremental scanner underneath: feed it text as it
+arrives and it returns each object as soon as its closing brace does.
+`FieldReader` does the same for one string member, which is how /ask/stream
+shows its answer while the model is still writing it.
+
+Two opt-in request modes, both set through `request()`:
+
+- `LLM_JSON_MODE=1` asks Groq for `response_format={"type": "json_object"}`.
+  JSON mode only returns objects, so array prompts are told to wrap the array
+  in `{"<wrap>": [...]}`, which `parse_array()` unwraps.
+- `LLM_STREAM=1` streams array completions; `read_array()` parses objects
+  while they arrive, and a stream that breaks off keeps the complete ones.
+  Groq doesn't stream in JSON mode, so JSON mode wins when both are set.
+
+    response = call("groq", groq.chat.completions.create, endpoint="groq.chat",
+                    model=..., **llmjson.request(messages, wrap="products", stream=llmjson.STREAM))
+    products = llmjson.read_array(response, "groq.chat.monster")
+
+Every parse is counted in `influencer_llm_json_total{endpoint, result}` with
+result `ok`, `recovered` (partial or repaired) or `failed`.
+"""
+
+import json
+import os
+import re
+from types import SimpleNamespace
+from typing import Callable, Iterable, Iterator, Optional
+
+from . import metrics
+
+JSON_MODE = os.getenv("LLM_JSON_MODE", "0") == "1"
+STREAM = os.getenv("LLM_STREAM", "0") == "1"
+
+_FENCE = re.compile(r"```[ \t]*(?:json|JSON)?[ \t]*\n?")
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+class ArrayParser:
+    """Incremental scanner: `feed()` text, get back the objects completed by it.
+
+    An object is returned when it closes and sits directly in an array, so
+    `[{...}, {...}]` and `{"products": [{...}]}` both yield the records, not
+    the wrapper. Text outside any bracket (fences, prose) is skipped.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._stack: list[str] = []
+        self._in_string = False
+        self._escape = False
+        self._start: Optional[int] = None  # where the record being read began
+        self._record_depth = 0
+
+    def feed(self, chunk: str) -> list[dict]:
+        self.text += chunk
+        found = []
+        text = self.text
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif not self._stack and ch not in "[{":
+                continue
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "[{":
+                if ch == "{" and self._start is None and self._stack and self._stack[-1] == "[":
+                    self._start = i
+                    self._record_depth = len(self._stack)
+                self._stack.append(ch)
+            elif ch in "]}":
+                if self._stack:
+                    self._stack.pop()
+                if ch == "}" and self._start is not None and len(self._stack) == self._record_depth:
+                    record = _loads(text[self._start:i + 1])
+                    if isinstance(record, dict):
+                        found.append(record)
+                    self._start = None
+        self._pos = len(text)
+        return found
+
+
+class FieldReader:
+    """Incremental reader for one string member of a streamed object.
+
+    `feed()` returns the newly decoded text of `"<key>": "..."`, so an answer
+    can be shown while the rest of the object is still being generated. An
+    escape split across chunks is held back until it's complete.
+    """
+
+    def __init__(self, key: str):
+        self._pattern = re.compile(r'"%s"\s*:\s*"' % re.escape(key))
+        self._buffer = ""
+        self._pos: Optional[int] = None  # next undecoded character of the value
+        self.done = False
+
+    def feed(self, chunk: str) -> str:
+        if self.done:
+            return ""
+        self._buffer += chunk
+        if self._pos is None:
+            match = self._pattern.search(self._buffer)
+            if not match:
+                return ""
+            self._pos = match.end()
+        buf, start, i = self._buffer, self._pos, self._pos
+        while i < len(buf):
+            ch = buf[i]
+            if ch == '"':
+                self.done = True
+                break
+            if ch == "\\":
+                width = 2
+                if buf[i + 1:i + 2] == "u":
+                    # A high surrogate needs its low half in the same decode.
+                    width = 12 if buf[i + 2:i + 4].lower() in ("d8", "d9", "da", "db") else 6
+                if i + width > len(buf):
+                    break
+                i += width
+                continue
+            i += 1
+        self._pos = i + 1 if self.done else i
+        return json.loads(f'"{buf[start:i]}"', strict=False) if i > start else ""
+
+
+def _loads(text: str):
+    """`json.loads`, retried once without trailing commas; None if still invalid."""
+    for candidate in (text, _TRAILING_COMMA.sub(r"\1", text)):
+        try:
+            return json.loads(candidate)
+        except ValueError:
+            continue
+    return None
+
+
+def strip_fences(text: str) -> str:
+    """Remove markdown code fences around (or inside) a model reply."""
+    return _FENCE.sub("", text or "").strip()
+
+
+def _records(value, key: Optional[str]) -> Optional[list[dict]]:
+    """The list of objects in a parsed value: the list itself, or the array a wrapper object holds."""
+    if isinstance(value, list):
+        return [v for v in value if isinstance(v, dict)]
+    if isinstance(value, dict):
+        lists = [item for item in value.values() if isinstance(item, list)]
+        if key and isinstance(value.get(key), list):
+            return _records(value[key], None)
+        if len(value) == 1 and lists:  # a wrapper under some other key
+            return _records(lists[0], None)
+        for item in lists:
+            if item and all(isinstance(v, dict) for v in item):
+                return item
+        return [value]
+    return None
+
+
+def parse_array(text: str, endpoint: str = "groq.chat", key: Optional[str] = "products") -> list[dict]:
+    """The objects in a JSON array reply, recovering the complete ones from a truncated or malformed reply.
+
+    A reply with no JSON at all ("No products mentioned.") is an empty list.
+    Raises ValueError only when a reply that does hold JSON is too broken to
+    recover a single object from.
+    """
+    cleaned = strip_fences(text)
+    start = min((i for i in (cleaned.find("["), cleaned.find("{")) if i != -1), default=-1)
+    if start == -1:
+        metrics.inc("influencer_llm_json_total", endpoint=endpoint, result="ok")
+        return []
+    end = max(cleaned.rfind("]"), cleaned.rfind("}")) + 1
+    records = _records(_loads(cleaned[start:end]), key) if end > start else None
+    if records is not None:
+        metrics.inc("influencer_llm_json_total", endpoint=endpoint, result="ok")
+        return records
+
+    parser = ArrayParser()
+    records = parser.feed(cleaned)
+    if records:
+        metrics.inc("influencer_llm_json_total", endpoint=endpoint, result="recovered")
+        print(f"  ⚠️ Recovered {len(records)} objects from malformed/truncated JSON ({endpoint})")
+        return records
+    metrics.inc("influencer_llm_json_total", endpoint=endpoint, result="failed")
+    raise ValueError(f"no JSON objects in model output: {cleaned[:80]!r}")
+
+
+def _close(fragment: str) -> str:
+    """`fragment` with its open string, trailing separator and open brackets closed."""
+    stack: list[str] = []
+    in_string = escape = False
+    for ch in fragment:
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch in "[{":
+            stack.append("]" if ch == "[" else "}")
+        elif ch in "]}" and stack:
+            stack.pop()
+    if in_string:
+        fragment += '"'
+    fragment = fragment.rstrip()
+    if fragment.endswith(":"):
+        fragment += " null"
+    fragment = fragment.rstrip(",")
+    return fragment + "".join(reversed(stack))
+
+
+def parse_object(text: str, endpoint: str = "groq.chat") -> dict:
+    """The JSON object in a reply, completing it if the reply was cut off; ValueError if there is none."""
+    cleaned = strip_fences(text)
+    start = cleaned.find("{")
+    if start == -1:
+        # Some replies drop the opening brace but keep the keys: "answer": "...", ...
+        quote = cleaned.find('"')
+        if quote == -1:
+            metrics.inc("influencer_llm_json_total", endpoint=endpoint, result="failed")
+            raise ValueError(f"no JSON object in model output: {cleaned[:80]!r}")
+        cleaned, start = "{" + cleaned[quote:], 0
+    end = cleaned.rfind("}") + 1
+    value = _loads(cleaned[start:end]) if end > start else None
+    if isinstance(value, dict):
+        metrics.inc("influencer_llm_json_total", endpoint=endpoint, result="ok")
+        return value
+
+    # Truncated: close it, dropping trailing members until what's left parses.
+    fragment = cleaned[start:]
+    while fragment:
+        value = _loads(_close(fragment))
+        if isinstance(value, dict):
+            metrics.inc("influencer_llm_json_total", endpoint=endpoint, result="recovered")
+            return value
+        cut = fragment.rfind(",")
+        fragment = fragment[:cut] if cut > 0 else ""
+    metrics.inc("influencer_llm_json_total", endpoint=endpoint, result="failed")
+    raise ValueError(f"unparseable JSON object in model output: {cleaned[:80]!r}")
+
+
+# ── Requests ──────────────────────────────────────────────────────────────────
+
+def request(messages: list[dict], wrap: Optional[str] = None, stream: bool = False) -> dict:
+    """Keyword arguments for `chat.completions.create`: `messages`, plus JSON mode or streaming when enabled.
+
+    `wrap` names the key an array prompt's answer is wrapped in under JSON
+    mode; leave it None for prompts that already ask for an object.
+    """
+    if JSON_MODE:
+        if wrap:
+            last = messages[-1]
+            note = f'\n\nRespond with a JSON object whose "{wrap}" key holds the array: {{"{wrap}": [...]}}'
+            messages = messages[:-1] + [dict(last, content=last["content"] + note)]
+        return {"messages": messages, "response_format": {"type": "json_object"}}
+    if stream:
+        return {"messages": messages, "stream": True}
+    return {"messages": messages}
+
+
+def _is_stream(response) -> bool:
+    return not hasattr(response, "choices")
+
+
+def iter_text(chunks: Iterable) -> Iterator[str]:
+    """The content deltas of a streamed completion, counting its token usage when the last chunk reports it."""
+    for chunk in chunks:
+        usage = getattr(chunk, "usage", None) or getattr(getattr(chunk, "x_groq", None), "usage", None)
+        if usage is not None:
+            metrics.record_usage("groq", "groq.chat", SimpleNamespace(usage=usage))
+        if getattr(chunk, "choices", None) and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
+
+
+def _stream(chunks: Iterable, on_object: Optional[Callable[[dict], None]]) -> tuple[list[dict], str, Optional[Exception]]:
+    """Feed streamed deltas to an `ArrayParser`: the objects found, the full text, and the error that cut it short."""
+    parser = ArrayParser()
+    found: list[dict] = []
+    try:
+        for text in iter_text(chunks):
+            for record in parser.feed(text):
+                found.append(record)
+                if on_object:
+                    on_object(record)
+    except Exception as exc:
+        return found, parser.text, exc
+    return found, parser.text, None
+
+
+def read_array(response, endpoint: str = "groq.chat", key: Optional[str] = "products",
+               on_object: Optional[Callable[[dict], None]] = None) -> list[dict]:
+    """The objects in a completion or a completion stream (see `parse_array`).
+
+    With a stream, `on_object` is called for each object as it completes; if
+    the stream breaks, the objects already received are returned.
+    """
+    if not _is_stream(response):
+        return parse_array(response.choices[0].message.content or "", endpoint, key)
+    found, text, error = _stream(response, on_object)
+    if error is None:
+        return parse_array(text, endpoint, key)
+    if not found:
+        raise error
+    metrics.inc("influencer_llm_json_total", endpoint=endpoint, result="recovered")
+    print(f"  ⚠️ Stream broke after {len(found)} objects ({endpoint}): {error}")
+    return found
+
+
+def read_object(response, endpoint: str = "groq.chat") -> dict:
+    """The object in a completion (see `parse_object`)."""
+    if _is_stream(response):
+        text = "".join(iter_text(response))
+    else:
+        text = response.choices[0].message.content or ""
+    return parse_object(text, endpoint)
@@ -0,0 +1,183 @@
+"""
+Resolving product names the LLM recommends back to catalogue products.
+
+`ProductMatcher(products)` indexes names once: a hash of normalized names
+(case, punctuation, Arabic diacritics and letter variants folded) for exact
+hits, and an inverted token index for the rest. A name that isn't an exact
+hit is scored only against products sharing its rarest tokens, and matches
+when most of the shorter name's tokens are shared, which covers "name inside
+product name" either way round plus small rewordings. A lookup costs the same
+with 300 products or 100k.
+
+`Automaton` is an Aho-Corasick automaton over normalized phrases: it finds
+every phrase occurring in a text in one pass over the text, however many
+phrases there are (used by `core.influencers` to spot influencer names).
+
+`matcher_for(products)` keeps the last few matchers keyed by a fingerprint
+of the product ids and names, so /ask only rebuilds one when the catalogue
+(or the influencer subset it asked about) actually changed.
+
+    matcher = matching.matcher_for(products)
+    recommended = matcher.resolve(["Gloss Bomb", "Pillow Talk lipstick"], products)
+"""
+
+import re
+import threading
+import unicodedata
+import zlib
+from collections import OrderedDict, defaultdict, deque
+from typing import Any, Iterable, Optional
+
+from . import metrics
+
+MIN_SHARED = 0.6  # share of the shorter name's tokens that must match
+MAX_CANDIDATES = 2000  # products scored per lookup, from the rarest tokens' postings
+CACHE_SIZE = 8
+
+_ARABIC_MARKS = re.compile("[\u064B-\u065F\u0670\u0640]")  # harakat, dagger alef, tatweel
+# Alef with hamza/madda → alef, alef maqsura → yeh, teh marbuta → heh
+_ARABIC_LETTERS = str.maketrans({
+    "\u0623": "\u0627", "\u0625": "\u0627", "\u0622": "\u0627", "\u0649": "\u064A", "\u0629": "\u0647",
+})
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize_name(name: str) -> str:
+    """Case-, punctuation- and spelling-folded form of a product name."""
+    text = unicodedata.normalize("NFKC", name or "").casefold()
+    text = _ARABIC_MARKS.sub("", text).translate(_ARABIC_LETTERS)
+    return " ".join(_NON_WORD.sub(" ", text).split())
+
+
+class ProductMatcher:
+    """Name → index lookups over a fixed list of products (the matcher keeps only their names)."""
+
+    def __init__(self, products: list[dict]):
+        self._exact: dict[str, int] = {}
+        self._tokens: list[frozenset] = []
+        self._postings: dict[str, list[int]] = defaultdict(list)
+        for i, product in enumerate(products):
+            name = normalize_name(product.get("product_name") or "")
+            tokens = frozenset(name.split())
+            self._tokens.append(tokens)
+            if not name:
+                continue
+            self._exact.setdefault(name, i)
+            for token in tokens:
+                self._postings[token].append(i)
+
+    def find(self, name: str) -> Optional[int]:
+        """Index of the product best matching `name`, or None."""
+        normalized = normalize_name(name)
+        if not normalized:
+            return None
+        exact = self._exact.get(normalized)
+        if exact is not None:
+            return exact
+
+        tokens = set(normalized.split())
+        postings = sorted((self._postings[t] for t in tokens if t in self._postings), key=len)
+        if not postings:
+            return None
+        candidates = sorted(set().union(*postings[:2]))[:MAX_CANDIDATES]
+
+        best, best_score = None, None
+        for i in candidates:
+            other = self._tokens[i]
+            shorter = min(len(tokens), len(other))
+            shared = len(tokens & other)
+            if shared < min(2, shorter) or shared / shorter < MIN_SHARED:
+                continue
+            score = (shared / shorter, shared / len(tokens | other))
+            if best_score is None or score > best_score:  # ties keep the earlier product
+                best, best_score = i, score
+        return best
+
+    def resolve(self, names: Iterable, products: list[dict]) -> list[dict]:
+        """The `products` (the list this matcher was built from) for `names`, in order, each at most once."""
+        seen: set[int] = set()
+        found = []
+        for name in names:
+            if not isinstance(name, str):
+                continue
+            i = self.find(name)
+            if i is not None and i not in seen:
+                seen.add(i)
+                found.append(products[i])
+        return found
+
+
+class Automaton:
+    """Aho-Corasick over `phrases` (phrase → value): `find(text)` returns every occurrence."""
+
+    def __init__(self, phrases: dict[str, Any]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail = [0]
+        self._out: list[list[tuple[int, Any]]] = [[]]
+        for phrase, value in phrases.items():
+            node = 0
+            for ch in phrase:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                    self._goto[node][ch] = nxt
+                node = nxt
+            if phrase:
+                self._out[node].append((len(phrase), value))
+
+        # Breadth-first, so a node's failure link is final before its children need it.
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self._goto[node].items():
+                queue.append(nxt)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                target = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = target if target != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text: str) -> list[tuple[int, int, Any]]:
+        """(start, end, value) of every phrase in `text`, in order of where they end."""
+        hits = []
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            for length, value in self._out[node]:
+                hits.append((i + 1 - length, i + 1, value))
+        return hits
+
+
+def fingerprint(products: list[dict]) -> tuple[int, int]:
+    """Cheap identity of a product list: its length and a CRC of ids and names."""
+    crc = 0
+    for product in products:
+        crc = zlib.crc32(f"{product.get('id')}\t{product.get('product_name')}\n".encode(), crc)
+    return len(products), crc
+
+
+_cache: "OrderedDict[tuple, ProductMatcher]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def matcher_for(products: list[dict]) -> ProductMatcher:
+    """A matcher over `products`, reused until their ids or names change."""
+    key = fingerprint(products)
+    with _lock:
+        matcher = _cache.get(key)
+        if matcher is not None:
+            _cache.move_to_end(key)
+    metrics.cache_lookup("product_matcher", matcher is not None)
+    if matcher is None:
+        matcher = ProductMatcher(products)
+        with _lock:
+            _cache[key] = matcher
+            while len(_cache) > CACHE_SIZE:
+                _cache.popitem(last=False)
+    return matcher
@@ -0,0 +1,228 @@
+"""
+Prometheus-compatible metrics, rendered in-process.
+
+    metrics.inc("influencer_outbound_calls_total", service="groq", outcome="ok")
+    metrics.gauge_callback("influencer_queue_depth", lambda: {(("queue", "scrape"),): 3})
+
+`render()` returns the text exposition format (version 0.0.4), so any scraper
+(Prometheus, Grafana Agent, `curl`) can read it without a client library or
+an external collector. Every `telemetry` span histogram is exported as
+`influencer_span_seconds{span="..."}`, which covers routes (`http.*`),
+outbound calls (`outbound.*`, `supabase.*`) and Monster stages (`monster.*`).
+"""
+
+import threading
+from typing import Callable, Optional
+
+from . import telemetry
+
+# Buckets for count-valued histograms (e.g. Supabase round trips per request).
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+LabelKey = tuple  # sorted ((label, value), ...) pairs
+
+_lock = threading.Lock()
+_counters: dict[str, dict[LabelKey, float]] = {}
+_gauges: dict[str, dict[LabelKey, float]] = {}
+_gauge_callbacks: dict[str, list] = {}
+_histograms: dict[str, dict[LabelKey, telemetry.Histogram]] = {}
+_help: dict[str, str] = {}
+
+
+def _key(labels: dict) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def describe(name: str, text: str) -> None:
+    """Set the `# HELP` line for a metric."""
+    _help[name] = text
+
+
+def inc(name: str, amount: float = 1, **labels) -> None:
+    """Add to a monotonically increasing counter."""
+    key = _key(labels)
+    with _lock:
+        series = _counters.setdefault(name, {})
+        series[key] = series.get(key, 0) + amount
+
+
+def set_gauge(name: str, value: float, **labels) -> None:
+    key = _key(labels)
+    with _lock:
+        _gauges.setdefault(name, {})[key] = value
+
+
+def gauge_callback(name: str, fn: Callable[[], dict]) -> None:
+    """Register `fn` to compute a gauge at scrape time; it returns {label key: value}.
+
+    Use for values that already live elsewhere (queue lengths, breaker states)
+    so they're never stale. Several callbacks may feed one gauge.
+    """
+    with _lock:
+        _gauge_callbacks.setdefault(name, []).append(fn)
+
+
+def observe(name: str, value: float, buckets: tuple = telemetry.BUCKETS, **labels) -> None:
+    """Record a value in a labelled histogram (seconds by default)."""
+    key = _key(labels)
+    with _lock:
+        series = _histograms.setdefault(name, {})
+        hist = series.get(key)
+        if hist is None:
+            hist = series[key] = telemetry.Histogram(buckets)
+    hist.observe(value)
+
+
+TOKEN_BUCKETS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+
+
+def record_usage(service: str, endpoint: str, result) -> None:
+    """Count LLM tokens from an OpenAI-style `usage` block, if the result has one."""
+    usage = getattr(result, "usage", None)
+    if usage is None:
+        return
+    for kind in ("prompt_tokens", "completion_tokens"):
+        tokens = getattr(usage, kind, None)
+        if tokens:
+            inc("influencer_llm_tokens_total", tokens, service=service, endpoint=endpoint, kind=kind.split("_")[0])
+            observe("influencer_llm_tokens_per_call", tokens, TOKEN_BUCKETS, endpoint=endpoint, kind=kind.split("_")[0])
+
+
+def cache_lookup(cache: str, hit: bool) -> None:
+    """Count a cache hit or miss; the hit ratio is derived at query time."""
+    inc("influencer_cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+
+# ── Exposition ─────────────────────────────────────────────────────────────────
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(key: LabelKey, extra: Optional[tuple] = None) -> str:
+    pairs = list(key) + list(extra or ())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _render_histogram(lines: list, name: str, key: LabelKey, hist: telemetry.Histogram) -> None:
+    bucket_counts, count, total = hist.cumulative()
+    for bound, n in zip(hist.buckets, bucket_counts):
+        lines.append(f"{name}_bucket{_labels(key, (('le', _number(float(bound))),))} {n}")
+    lines.append(f"{name}_bucket{_labels(key, (('le', '+Inf'),))} {count}")
+    lines.append(f"{name}_sum{_labels(key)} {_number(total)}")
+    lines.append(f"{name}_count{_labels(key)} {count}")
+
+
+def _header(lines: list, name: str, kind: str) -> None:
+    if name in _help:
+        lines.append(f"# HELP {name} {_help[name]}")
+    lines.append(f"# TYPE {name} {kind}")
+
+
+def render() -> str:
+    """Render all metrics in the Prometheus text format."""
+    with _lock:
+        counters = {n: dict(s) for n, s in _counters.items()}
+        gauges = {n: dict(s) for n, s in _gauges.items()}
+        callbacks = {n: list(fns) for n, fns in _gauge_callbacks.items()}
+        histograms = {n: dict(s) for n, s in _histograms.items()}
+
+    for name, fns in callbacks.items():
+        for fn in fns:
+            try:
+                gauges.setdefault(name, {}).update(fn())
+            except Exception as exc:
+                telemetry.log_event("metrics gauge failed", gauge=name, error=str(exc))
+
+    lines: list[str] = []
+    for name in sorted(counters):
+        _header(lines, name, "counter")
+        for key, value in sorted(counters[name].items()):
+            lines.append(f"{name}{_labels(key)} {_number(value)}")
+    for name in sorted(gauges):
+        _header(lines, name, "gauge")
+        for key, value in sorted(gauges[name].items()):
+            lines.append(f"{name}{_labels(key)} {_number(value)}")
+    for name in sorted(histograms):
+        _header(lines, name, "histogram")
+        for key, hist in sorted(histograms[name].items()):
+            _render_histogram(lines, name, key, hist)
+
+    _header(lines, "influencer_span_seconds", "histogram")
+    for span_name, hist in telemetry.histograms().items():
+        _render_histogram(lines, "influencer_span_seconds", (("span", span_name),), hist)
+
+    return "\n".join(lines) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def serve(port: int) -> threading.Thread:
+    """Serve `render()` at http://0.0.0.0:<port>/metrics from a daemon thread.
+
+    For processes without a web app, like the Monster worker.
+    """
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass  # scrapes every few seconds would drown the worker's output
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    thread = threading.Thread(target=server.serve_forever, name="metrics", daemon=True)
+    thread.start()
+    print(f"📈 Metrics on http://0.0.0.0:{port}/metrics")
+    return thread
+
+
+# ── Built-in gauges and help text ──────────────────────────────────────────────
+
+def _circuit_states() -> dict:
+    from .circuit import _breakers
+
+    return {
+        (("endpoint", endpoint),): 0 if breaker.state == breaker.CLOSED else 1
+        for endpoint, breaker in list(_breakers.items())
+    }
+
+
+gauge_callback("influencer_circuit_open", _circuit_states)
+
+describe("influencer_http_requests_total", "API requests by route, method and status code.")
+describe("influencer_request_supabase_round_trips", "Supabase round trips per API request or Monster run.")
+describe("influencer_outbound_calls_total", "Calls made through core.call by service, endpoint and outcome.")
+describe("influencer_supabase_requests_total", "PostgREST requests by table and status code.")
+describe("influencer_llm_tokens_total", "LLM tokens used, by kind (prompt/completion).")
+describe("influencer_llm_tokens_per_call", "LLM tokens per call as reported by the API, by endpoint and kind.")
+describe("influencer_llm_prompt_tokens", "Estimated prompt tokens per LLM call, measured before sending (core.prompts).")
+describe("influencer_llm_json_total", "LLM JSON replies parsed, by endpoint and result (ok/recovered/failed).")
+describe("influencer_cache_requests_total", "Cache lookups by cache and result (hit/miss).")
+describe("influencer_products_saved_total", "Products saved to the database.")
+describe("influencer_downloads_total", "Video downloads by result (downloaded/exists/failed).")
+describe("influencer_download_bytes_total", "Bytes written by core.download.")
+describe("influencer_monster_runs_total", "Monster influencer runs by status.")
+describe("influencer_monster_last_cycle_products_saved", "Products saved in the last completed Monster cycle.")
+describe("influencer_monster_last_cycle_timestamp_seconds", "Unix time the last Monster cycle finished.")
+describe("influencer_queue_depth", "Items waiting or in progress, by queue.")
+describe("influencer_circuit_open", "1 while an endpoint's circuit breaker is open or half-open.")
+describe("influencer_span_seconds", "Duration of telemetry spans (routes, outbound calls, pipeline stages).")
@@ -0,0 +1,133 @@
+"""
+Prompt compaction and token budgeting for LLM calls.
+
+Captions arrive with hashtag walls, emoji runs, links and the same sign-off
+on every post; none of it helps extraction and all of it is billed.
+`clean_caption()` strips that, `strip_boilerplate()` drops lines repeated
+across a batch, and `fit()` keeps as many blocks as a token budget allows
+(`LLM_PROMPT_BUDGET`, default 3000; one caption is capped at
+`LLM_CAPTION_TOKENS`, default 300). `measure()` records each prompt's size
+per endpoint next to the real `usage` counts from `call()`.
+
+Token counts use `tiktoken` when it's installed (cl100k is close enough to
+Llama 3's tokenizer for budgeting) and a character estimate otherwise.
+"""
+
+import math
+import os
+import re
+from collections import Counter
+from typing import Iterable, Optional
+
+from . import metrics
+
+LLM_PROMPT_BUDGET = int(os.getenv("LLM_PROMPT_BUDGET", 3000))
+CAPTION_TOKENS = int(os.getenv("LLM_CAPTION_TOKENS", 300))  # longest single caption or transcript sent
+
+_URL = re.compile(r"(?:https?://|www\.)\S+", re.IGNORECASE)
+_HASHTAG = re.compile(r"#\w+")  # \w covers Arabic letters too
+# Three or more hashtags in a row (the wall at the end of a caption)
+_HASHTAG_WALL = re.compile(r"(?:#\w+[\s.,|•·]*){3,}")
+_EMOJI = (
+    "\U0001F000-\U0001FAFF"  # pictographs, emoticons, transport, symbols & pictographs
+    "\u2600-\u27BF"  # misc symbols, dingbats
+    "\u2B00-\u2BFF"  # arrows, stars
+    "\uFE0F\u200D"  # variation selector, zero-width joiner
+)
+_EMOJI_RUN = re.compile(f"([{_EMOJI}])[{_EMOJI}\\s]*[{_EMOJI}]")
+_REPEATED_PUNCT = re.compile(r"([!?.…~_\-=*])\1{2,}")
+_SPACES = re.compile(r"[ \t\u00A0]+")
+_BLANK_LINES = re.compile(r"\n\s*\n+")
+
+_encoder = None
+
+
+def _tiktoken():
+    global _encoder
+    if _encoder is None:
+        try:
+            import tiktoken
+
+            _encoder = tiktoken.get_encoding("cl100k_base")
+        except Exception:  # not installed, or no cached vocabulary offline
+            _encoder = False
+    return _encoder or None
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count of `text`: exact with tiktoken, else ~4 chars/token (ASCII) and ~2 (Arabic, emoji)."""
+    if not text:
+        return 0
+    encoder = _tiktoken()
+    if encoder is not None:
+        return len(encoder.encode(text, disallowed_special=()))
+    ascii_chars = sum(1 for ch in text if ch < "\x80")
+    return math.ceil(ascii_chars / 4 + (len(text) - ascii_chars) / 2)
+
+
+def clean_caption(text: str, max_tokens: Optional[int] = None) -> str:
+    """Drop links, hashtag walls and emoji runs, squeeze whitespace; optionally cap the length."""
+    if not text:
+        return ""
+    text = _URL.sub("", text)
+    text = _HASHTAG_WALL.sub(" ", text)
+    text = _HASHTAG.sub(lambda m: m.group(0)[1:], text)  # a lone #brand still names the brand
+    text = _EMOJI_RUN.sub(r"\1", text)
+    text = _REPEATED_PUNCT.sub(r"\1", text)
+    text = _SPACES.sub(" ", text)
+    text = _BLANK_LINES.sub("\n", text)
+    text = "\n".join(line.strip() for line in text.splitlines() if line.strip())
+    return truncate(text, max_tokens) if max_tokens else text
+
+
+def truncate(text: str, max_tokens: int) -> str:
+    """Cut `text` to about `max_tokens`, at a word boundary."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    # Scale by the measured chars/token ratio, then trim back to a space.
+    cut = max(1, int(len(text) * max_tokens / estimate_tokens(text)))
+    head = text[:cut]
+    space = head.rfind(" ")
+    return (head[:space] if space > cut // 2 else head).rstrip() + "…"
+
+
+def strip_boilerplate(texts: list[str], min_repeats: int = 3) -> list[str]:
+    """Remove lines that recur in `min_repeats`+ texts (sign-offs, "link in bio"), keeping the first."""
+    counts = Counter(line for text in texts for line in {l.strip().lower() for l in text.splitlines()} if line)
+    common = {line for line, n in counts.items() if n >= min_repeats}
+    if not common:
+        return texts
+    seen: set[str] = set()
+    result = []
+    for text in texts:
+        lines = []
+        for line in text.splitlines():
+            key = line.strip().lower()
+            if key in common:
+                if key in seen:
+                    continue
+                seen.add(key)
+            lines.append(line)
+        result.append("\n".join(lines))
+    return result
+
+
+def fit(blocks: Iterable[str], budget: int = LLM_PROMPT_BUDGET, separator: str = "\n\n") -> list[str]:
+    """The leading `blocks` whose combined size stays within `budget` tokens (at least one)."""
+    kept: list[str] = []
+    used = 0
+    sep_tokens = estimate_tokens(separator)
+    for block in blocks:
+        tokens = estimate_tokens(block) + (sep_tokens if kept else 0)
+        if kept and used + tokens > budget:
+            break
+        kept.append(block)
+        used += tokens
+    return kept
+
+
+def measure(endpoint: str, messages: list[dict]) -> int:
+    """Estimate the prompt tokens in `messages` and record them for `endpoint`."""
+    tokens = sum(estimate_tokens(m.get("content") or "") for m in messages)
+    metrics.observe("influencer_llm_prompt_tokens", tokens, buckets=metrics.TOKEN_BUCKETS, endpoint=endpoint)
+    return tokens
@@ -0,0 +1,74 @@
+"""
+Token-bucket rate limiting shared across the process.
+
+Limits are per service name and read from `<SERVICE>_RPM` environment
+variables (requests per minute), e.g. `GROQ_RPM=30`.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from typing import Optional
+
+# Requests per minute when no `<SERVICE>_RPM` override is set.
+DEFAULT_RPM = {
+    "groq": 30,
+    "apify": 30,
+    "supabase": 3000,
+}
+
+
+class RateLimiter:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: float) -> float:
+        """Take `tokens` from the bucket and return how long the caller must wait."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """Block until `tokens` are available. Returns the seconds spent waiting."""
+        wait = self._reserve(tokens)
+        if wait:
+            time.sleep(wait)
+        return wait
+
+    async def acquire_async(self, tokens: float = 1.0) -> float:
+        """Async variant of `acquire` that doesn't block the event loop."""
+        wait = self._reserve(tokens)
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+
+_lock = threading.Lock()
+_limiters: dict[str, RateLimiter] = {}
+
+
+def get_limiter(service: str) -> RateLimiter:
+    """Return the process-wide limiter for `service`."""
+    limiter = _limiters.get(service)
+    if limiter is None:
+        with _lock:
+            limiter = _limiters.get(service)
+            if limiter is None:
+                rpm = float(os.getenv(f"{service.upper()}_RPM", DEFAULT_RPM.get(service, 60)))
+                limiter = RateLimiter(rate=rpm / 60.0, capacity=max(1.0, rpm / 60.0 * 5))
+                _limiters[service] = limiter
+    return limiter
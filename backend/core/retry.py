@@ -0,0 +1,153 @@
+"""
+Shared retry policy for outbound calls.
+
+`call()` is the single entry point every pipeline uses for Groq, Apify and
+Supabase work: it applies the service's rate limiter, the endpoint's circuit
+breaker and jittered exponential backoff that honours `Retry-After`. Only
+transient failures (timeouts, connection errors, 408/425/429/5xx) are
+retried; anything else is raised straight away.
+"""
+
+import random
+import time
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Optional
+
+from . import metrics
+from .circuit import CircuitOpenError, get_breaker
+from .ratelimit import get_limiter
+from .telemetry import count, observe
+
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+# Services whose client takes a rate-limiter token per HTTP request itself
+# (the supabase client's request hook, core.clients), so `call()` mustn't
+# take a second one.
+SELF_THROTTLED = {"supabase"}
+
+
+def status_code(exc: BaseException) -> Optional[int]:
+    """Best-effort HTTP status for exceptions from httpx/requests/groq/apify."""
+    for attr in ("status_code", "status"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(exc, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds the server asked us to wait, from a `Retry-After` header."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_transient(exc: BaseException) -> bool:
+    """True for failures worth retrying: throttling, 5xx, timeouts, dropped connections."""
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return True
+    status = status_code(exc)
+    if status is not None:
+        return status in RETRYABLE_STATUS
+    # SDK exceptions (httpx, requests, groq) name their transport errors consistently.
+    name = type(exc).__name__
+    return any(marker in name for marker in ("Timeout", "Connect", "RemoteProtocol", "ReadError"))
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Exponential backoff with full jitter: uniform(0, min(max_delay, base_delay * 2**n))."""
+
+    attempts: int = 4
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+
+    def delay(self, attempt: int, exc: Optional[BaseException] = None) -> float:
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+        hinted = retry_after(exc) if exc is not None else None
+        if hinted is not None:
+            return min(self.max_delay, max(hinted, backoff))
+        return backoff
+
+    def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        for attempt in range(1, self.attempts + 1):
+            try:
+                return fn(*args, **kwargs)
+            except Exception as exc:
+                if attempt == self.attempts or not is_transient(exc):
+                    raise
+                time.sleep(self.delay(attempt, exc))
+
+
+DEFAULT_RETRY = RetryPolicy()
+
+
+def call(
+    service: str,
+    fn: Callable[..., Any],
+    *args,
+    endpoint: Optional[str] = None,
+    retry: RetryPolicy = DEFAULT_RETRY,
+    **kwargs,
+) -> Any:
+    """Call `fn` under the rate limiter for `service` and the breaker for `endpoint`.
+
+    `endpoint` defaults to `service`; use finer names ("apify.instagram-reel-scraper",
+    "supabase.products") so one failing endpoint doesn't trip the others. The
+    limiter is re-acquired on every attempt so retries spend the same budget as
+    first tries (for services in `SELF_THROTTLED` the client does that).
+    Raises `CircuitOpenError` without calling `fn` while the endpoint's
+    circuit is open.
+    """
+    limiter = None if service in SELF_THROTTLED else get_limiter(service)
+    endpoint = endpoint or service
+    breaker = get_breaker(endpoint)
+
+    for attempt in range(1, retry.attempts + 1):
+        try:
+            breaker.allow()
+        except CircuitOpenError:
+            metrics.inc("influencer_outbound_calls_total", service=service, endpoint=endpoint, outcome="circuit_open")
+            raise
+        if limiter is not None:
+            limiter.acquire()
+        count(f"{service}_calls")
+        start = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as exc:
+            observe(f"outbound.{endpoint}", time.perf_counter() - start)
+            if not is_transient(exc):
+                # A bad request says nothing about the endpoint's health.
+                breaker.record_success()
+                metrics.inc("influencer_outbound_calls_total", service=service, endpoint=endpoint, outcome="error")
+                raise
+            breaker.record_failure()
+            if attempt == retry.attempts:
+                metrics.inc("influencer_outbound_calls_total", service=service, endpoint=endpoint, outcome="error")
+                raise
+            metrics.inc("influencer_outbound_calls_total", service=service, endpoint=endpoint, outcome="retry")
+            wait = retry.delay(attempt, exc)
+            print(f"  ↻ {endpoint} failed ({type(exc).__name__}), retry {attempt}/{retry.attempts - 1} in {wait:.1f}s")
+            time.sleep(wait)
+        else:
+            observe(f"outbound.{endpoint}", time.perf_counter() - start)
+            breaker.record_success()
+            metrics.inc("influencer_outbound_calls_total", service=service, endpoint=endpoint, outcome="ok")
+            metrics.record_usage(service, endpoint, result)
+            return result
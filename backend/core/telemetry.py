@@ -0,0 +1,270 @@
+"""
+Timing spans, structured JSON logs and latency histograms.
+
+    with span("monster.extract", handle=handle) as sp:
+        ...
+        sp.set(products=len(products))
+
+Every span is emitted as one JSON log line on the `influencer` logger and
+its duration is added to a histogram named after the span, so `summary()`
+can report count / p50 / p95 / max per stage. `request_scope()` tracks
+per-request counters (e.g. Supabase round trips) across nested calls.
+"""
+
+import contextvars
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+# Upper bounds (seconds) for histogram buckets, Prometheus style.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 1800)
+RESERVOIR_SIZE = 2048
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "msg": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def _build_logger() -> logging.Logger:
+    logger = logging.getLogger("influencer")
+    if not logger.handlers:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(JsonFormatter())
+        logger.addHandler(handler)
+        logger.setLevel(LOG_LEVEL)
+        logger.propagate = False
+    return logger
+
+
+logger = _build_logger()
+
+
+def log_event(msg: str, level: int = logging.INFO, **fields: Any) -> None:
+    """Emit one structured log line with `fields` merged into the JSON object."""
+    if logger.isEnabledFor(level):
+        logger.log(level, msg, extra={"fields": fields})
+
+
+# ── Histograms ─────────────────────────────────────────────────────────────────
+
+class Histogram:
+    """Thread-safe latency histogram: cumulative buckets plus a recent-sample reservoir."""
+
+    def __init__(self, buckets: tuple = BUCKETS):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._recent: deque = deque(maxlen=RESERVOIR_SIZE)
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.count += 1
+            self.sum += value
+            self.max = max(self.max, value)
+            self._recent.append(value)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    self.bucket_counts[i] += 1
+
+    def quantile(self, q: float) -> float:
+        with self._lock:
+            samples = sorted(self._recent)
+        if not samples:
+            return 0.0
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def cumulative(self) -> tuple:
+        """Return (bucket_counts, count, sum) read atomically, for exposition."""
+        with self._lock:
+            return list(self.bucket_counts), self.count, self.sum
+
+    def snapshot(self) -> dict:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "p50": round(self.quantile(0.50), 6),
+            "p95": round(self.quantile(0.95), 6),
+            "max": round(self.max, 6),
+        }
+
+
+_histograms: dict[str, Histogram] = {}
+_histograms_lock = threading.Lock()
+
+
+def histogram(name: str) -> Histogram:
+    hist = _histograms.get(name)
+    if hist is None:
+        with _histograms_lock:
+            hist = _histograms.setdefault(name, Histogram())
+    return hist
+
+
+def histograms() -> dict[str, Histogram]:
+    """Return every span histogram by name, sorted."""
+    with _histograms_lock:
+        return {name: _histograms[name] for name in sorted(_histograms)}
+
+
+def summary() -> dict[str, dict]:
+    """Return {span name: {count, sum, p50, p95, max}} in seconds."""
+    with _histograms_lock:
+        names = sorted(_histograms)
+    return {name: _histograms[name].snapshot() for name in names}
+
+
+def format_summary() -> str:
+    rows = [f"  {'span':<32} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}"]
+    for name, snap in summary().items():
+        rows.append(
+            f"  {name:<32} {snap['count']:>7} {snap['p50'] * 1000:>9.1f} "
+            f"{snap['p95'] * 1000:>9.1f} {snap['max'] * 1000:>9.1f}"
+        )
+    return "\n".join(rows)
+
+
+# ── Request scope ──────────────────────────────────────────────────────────────
+
+class RequestStats:
+    """Mutable per-request counters; shared by reference with worker threads."""
+
+    def __init__(self, name: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.counters: dict[str, int] = {}
+        self.timings: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def incr(self, counter: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def add_timing(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+
+
+_current_request: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar(
+    "current_request", default=None
+)
+
+
+def current_request() -> Optional[RequestStats]:
+    return _current_request.get()
+
+
+def count(counter: str, amount: int = 1) -> None:
+    """Add to a counter on the current request, if there is one."""
+    stats = _current_request.get()
+    if stats is not None:
+        stats.incr(counter, amount)
+
+
+@contextmanager
+def request_scope(name: str) -> Iterator[RequestStats]:
+    """Open a request (or job) scope; spans and counters inside are attributed to it."""
+    stats = RequestStats(name)
+    token = _current_request.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_request.reset(token)
+
+
+def scoped_iter(stats: RequestStats, iterator: Iterator[Any]) -> Iterator[Any]:
+    """Iterate `iterator` inside the scope of `stats`, one step at a time.
+
+    For a streaming response body, which runs after the route has returned and
+    whose steps may each run in a different thread (and context).
+    """
+    iterator = iter(iterator)
+    try:
+        while True:
+            token = _current_request.set(stats)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                _current_request.reset(token)
+            yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            token = _current_request.set(stats)
+            try:
+                close()
+            finally:
+                _current_request.reset(token)
+
+
+# ── Spans ──────────────────────────────────────────────────────────────────────
+
+class Span:
+    def __init__(self, name: str, fields: dict):
+        self.name = name
+        self.fields = fields
+        self.duration = 0.0
+
+    def set(self, **fields: Any) -> None:
+        """Attach fields (e.g. row counts) to be logged with the span."""
+        self.fields.update(fields)
+
+
+@contextmanager
+def span(name: str, level: int = logging.INFO, **fields: Any) -> Iterator[Span]:
+    """Time a block, log it as JSON and record it in the `name` histogram.
+
+    The duration is also added to the current request scope's timings and is
+    available as `.duration` on the yielded span once the block exits. `.name`
+    may be reassigned inside the block, e.g. once an HTTP route is resolved.
+    """
+    current = Span(name, dict(fields))
+    start = time.perf_counter()
+    status = "ok"
+    try:
+        yield current
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        current.duration = time.perf_counter() - start
+        histogram(current.name).observe(current.duration)
+        stats = _current_request.get()
+        if stats is not None:
+            stats.add_timing(current.name, current.duration)
+        log_event(
+            "span",
+            level=level,
+            span=current.name,
+            duration_ms=round(current.duration * 1000, 2),
+            status=status,
+            request_id=stats.id if stats else None,
+            **current.fields,
+        )
+
+
+def observe(name: str, seconds: float) -> None:
+    """Record a duration measured elsewhere (e.g. in an HTTP hook)."""
+    histogram(name).observe(seconds)
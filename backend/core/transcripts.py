@@ -0,0 +1,115 @@
+"""
+Persistent transcript store, so a video is only ever transcribed once.
+
+Transcripts live in one SQLite file (`TRANSCRIPT_DB`, default
+`backend/data/transcripts.sqlite`) keyed by (platform, video id, model,
+language); switching Whisper model or language is a cache miss, re-running
+the same step is not. Each `put()` commits on its own, so a crash loses at
+most the video in flight, and WAL mode lets several scripts read while one
+writes.
+
+    store = TranscriptStore()
+    done = store.keys(model, language)
+    todo = [v for v in videos if (v["platform"], v["id"]) not in done]
+"""
+
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Optional
+
+from . import metrics
+
+TRANSCRIPT_DB = Path(os.getenv("TRANSCRIPT_DB", Path(__file__).resolve().parents[1] / "data" / "transcripts.sqlite"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transcripts (
+    platform TEXT NOT NULL,
+    video_id TEXT NOT NULL,
+    model TEXT NOT NULL,
+    language TEXT NOT NULL,
+    text TEXT NOT NULL,
+    source TEXT,
+    audio_seconds REAL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (platform, video_id, model, language)
+)
+"""
+
+
+class TranscriptStore:
+    def __init__(self, path=TRANSCRIPT_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode = WAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+        self._lock = threading.Lock()
+
+    def get(self, platform: str, video_id: str, model: str, language: str) -> Optional[dict]:
+        """The stored transcript row, or None if this video hasn't been done with this model."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM transcripts WHERE platform = ? AND video_id = ? AND model = ? AND language = ?",
+                (platform, str(video_id), model, language),
+            ).fetchone()
+        metrics.cache_lookup("transcripts", row is not None)
+        return dict(row) if row else None
+
+    def keys(self, model: str, language: str) -> set[tuple[str, str]]:
+        """(platform, video_id) of everything already transcribed with `model` / `language`."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT platform, video_id FROM transcripts WHERE model = ? AND language = ?",
+                (model, language),
+            ).fetchall()
+        return {(r["platform"], r["video_id"]) for r in rows}
+
+    def rows(self, model: str, language: str) -> dict[tuple[str, str], dict]:
+        """All transcripts for `model` / `language`, keyed by (platform, video_id)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM transcripts WHERE model = ? AND language = ?", (model, language)
+            ).fetchall()
+        return {(r["platform"], r["video_id"]): dict(r) for r in rows}
+
+    def put(
+        self,
+        platform: str,
+        video_id: str,
+        model: str,
+        language: str,
+        text: str,
+        source: Optional[str] = None,
+        audio_seconds: Optional[float] = None,
+    ) -> None:
+        """Store (or replace) one transcript and commit immediately."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO transcripts "
+                "(platform, video_id, model, language, text, source, audio_seconds) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (platform, str(video_id), model, language, text, source, audio_seconds),
+            )
+            self._conn.commit()
+
+    def delete(self, model: str, language: str) -> int:
+        """Forget every transcript for `model` / `language` (a `--fresh` run)."""
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM transcripts WHERE model = ? AND language = ?", (model, language)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "TranscriptStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
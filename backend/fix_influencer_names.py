@@ -1,16 +1,15 @@
 """
 Fix influencer_name column - replace IDs with actual names
+
+Same as scripts/fix_influencer_names.py, for this shorter map.
 """
-import os
 from dotenv import load_dotenv
-from supabase import create_client
+
+from core import get_supabase, influencers
 
 load_dotenv()
 
-supabase = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_KEY")
-)
+supabase = get_supabase()
 
 # Mapping of IDs to actual names
 INFLUENCER_MAP = {
@@ -20,26 +19,11 @@ INFLUENCER_MAP = {
 }
 
 def fix_names():
-    # Get all products
-    response = supabase.table("products").select("*").execute()
-    products = response.data
-    
-    fixed = 0
-    for product in products:
-        old_name = product["influencer_name"]
-        
-        # Check if it's an ID (all digits)
-        if old_name.isdigit() and old_name in INFLUENCER_MAP:
-            new_name = INFLUENCER_MAP[old_name]
-            
-            supabase.table("products").update({
-                "influencer_name": new_name
-            }).eq("id", product["id"]).execute()
-            
-            print(f"✅ Fixed: {old_name} → {new_name}")
-            fixed += 1
+    for old_name, new_name in INFLUENCER_MAP.items():
+        influencers.rename(supabase, old_name, new_name)
+        print(f"✅ Fixed: {old_name} → {new_name}")
     
-    print(f"\n✅ Fixed {fixed} products")
+    print(f"\n✅ Fixed {len(INFLUENCER_MAP)} influencers")
 
 if __name__ == "__main__":
-    fix_names()
\ No newline at end of file
+    fix_names()
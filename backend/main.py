@@ -8,42 +8,83 @@ import re
 import subprocess
 import sys
 import threading
+import time
 import uuid
-from typing import Optional
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Iterator, Optional
 
-import httpx
 from dotenv import load_dotenv
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import Depends, FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
-from groq import Groq
+from fastapi.responses import Response, StreamingResponse
 from pydantic import BaseModel
 
+from core import (
+    bulkload,
+    call,
+    deadletter,
+    get_apify,
+    get_groq,
+    get_supabase,
+    influencers,
+    llmjson,
+    matching,
+    metrics,
+    prompts,
+    request_scope,
+    span,
+    telemetry,
+)
+
 load_dotenv()
 
-# ── Supabase client ────────────────────────────────────────────────────────────
-SUPABASE_URL = os.getenv("SUPABASE_URL", "")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY", "")
+# /ask context: product entries are added until this many tokens, each quote capped.
+ASK_CONTEXT_BUDGET = int(os.getenv("ASK_CONTEXT_BUDGET", 1500))
+ASK_QUOTE_TOKENS = 40
+
+# ── Clients ────────────────────────────────────────────────────────────────────
+# Shared process-wide clients from `core`, built on first use so importing the
+# app (and answering the `/` health check on a cold start) doesn't pay for the
+# SDK imports, and missing credentials surface as a 503 instead of a crash.
+
+def _dependency(factory):
+    """Wrap a client factory as a FastAPI dependency that maps missing config to 503."""
+    def dependency():
+        try:
+            return factory()
+        except RuntimeError as exc:
+            raise HTTPException(status_code=503, detail=str(exc))
+    return dependency
+
+
+supabase_dep = _dependency(get_supabase)
+groq_dep = _dependency(get_groq)
+apify_dep = _dependency(get_apify)
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    raise RuntimeError("SUPABASE_URL and SUPABASE_KEY environment variables must be set.")
 
-from supabase import create_client, Client
+def _warm_clients():
+    """Build the Supabase and Groq clients off the request path."""
+    for factory in (get_supabase, get_groq):
+        try:
+            factory()
+        except Exception as exc:
+            print(f"⚠️ Client warm-up failed: {exc}")
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
 
-# ── Groq AI client ─────────────────────────────────────────────────────────────
-GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
-if not GROQ_API_KEY:
-    raise RuntimeError("GROQ_API_KEY environment variable must be set.")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Don't block startup: the health check must answer before the SDKs load.
+    threading.Thread(target=_warm_clients, name="client-warmup", daemon=True).start()
+    yield
 
-groq_client = Groq(api_key=GROQ_API_KEY)
 
 # ── App ────────────────────────────────────────────────────────────────────────
 app = FastAPI(
     title="Influencer Product Search API",
     description="Search for products used by Egyptian/MENA influencers",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 app.add_middleware(
@@ -55,6 +96,60 @@ app.add_middleware(
 )
 
 
+# Routes whose work runs while the body streams, after call_next has returned;
+# they open their own scope and span (see _timed_stream).
+STREAMED_ROUTES = {"/ask/stream"}
+
+
+@app.middleware("http")
+async def timing_middleware(request: Request, call_next):
+    """Time every request as an `http.<route>` span and count its Supabase round trips."""
+    if request.url.path in STREAMED_ROUTES:
+        return await call_next(request)
+    with request_scope(request.url.path) as stats:
+        with span("http", method=request.method) as sp:
+            response = await call_next(request)
+            # Name by route template (/admin/task/{task_id}), not raw path, to keep
+            # the number of histograms bounded.
+            route = getattr(request.scope.get("route"), "path", "unmatched")
+            round_trips = stats.counters.get("supabase_round_trips", 0)
+            sp.name = f"http.{route}"
+            sp.set(status_code=response.status_code, supabase_round_trips=round_trips)
+        _record_request(route, request.method, response.status_code, round_trips)
+        response.headers["X-Request-ID"] = stats.id
+        return response
+
+
+def _record_request(route: str, method: str, status: int, round_trips: int) -> None:
+    metrics.inc(
+        "influencer_http_requests_total",
+        route=route,
+        method=method,
+        status=status,
+    )
+    metrics.observe(
+        "influencer_request_supabase_round_trips",
+        round_trips,
+        buckets=metrics.COUNT_BUCKETS,
+        route=route,
+    )
+
+
+def _timed_stream(stats: telemetry.RequestStats, method: str, events: Iterator[str]) -> Iterator[str]:
+    """`events` as a streamed body, timed like timing_middleware times other routes, until the last chunk."""
+    route = stats.name
+    round_trips = 0
+    try:
+        with span(f"http.{route}", method=method, status_code=200) as sp:
+            try:
+                yield from events
+            finally:
+                round_trips = stats.counters.get("supabase_round_trips", 0)
+                sp.set(supabase_round_trips=round_trips)
+    finally:
+        _record_request(route, method, 200, round_trips)
+
+
 # ── Image proxy ────────────────────────────────────────────────────────────────
 
 @app.get("/api/proxy-image")
@@ -67,6 +162,8 @@ async def proxy_image(url: str):
         if not url.startswith("https://scontent") and not url.startswith("https://instagram"):
             return Response(status_code=400, content="Invalid image URL")
 
+        import httpx
+
         async with httpx.AsyncClient() as client:
             response = await client.get(
                 url,
@@ -122,21 +219,22 @@ class SaveProductsRequest(BaseModel):
 
 # ── Helpers ────────────────────────────────────────────────────────────────────
 
+BUY_LINKS_CHUNK = 200  # product ids per `in.(...)` filter, to keep URLs short
+
+
 def fetch_buy_links(product_ids: list[str]) -> dict[str, list[dict]]:
-    """Return a mapping of product_id → list of buy links."""
-    if not product_ids:
-        return {}
-
-    resp = (
-        supabase.table("buy_links")
-        .select("*")
-        .in_("product_id", product_ids)
-        .execute()
-    )
+    """Return a mapping of product_id → list of buy links (one query per 200 products)."""
     links: dict[str, list[dict]] = {}
-    for row in resp.data:
-        pid = row["product_id"]
-        links.setdefault(pid, []).append(row)
+    for chunk in bulkload.chunked(product_ids, BUY_LINKS_CHUNK):
+        resp = (
+            get_supabase().table("buy_links")
+            .select("*")
+            .in_("product_id", chunk)
+            .execute()
+        )
+        for row in resp.data:
+            pid = row["product_id"]
+            links.setdefault(pid, []).append(row)
     return links
 
 
@@ -144,10 +242,14 @@ def enrich_products(products: list[dict]) -> list[dict]:
     """Enrich products with buy links."""
     from urllib.parse import quote_plus
     
+    # One query for every product whose links the search_products RPC didn't already aggregate
+    fetched = fetch_buy_links([p["id"] for p in products if not isinstance(p.get("buy_links"), list)])
     enriched = []
     for product in products:
-        # Fetch buy links for this product
-        resp = supabase.table("buy_links").select("*").eq("product_id", product["id"]).execute()
+        if isinstance(product.get("buy_links"), list):
+            links = product["buy_links"]
+        else:
+            links = fetched.get(product["id"], [])
         
         buy_links = [
             {
@@ -158,7 +260,7 @@ def enrich_products(products: list[dict]) -> list[dict]:
                 "url": link.get("url"),
                 "in_stock": link.get("in_stock"),
             }
-            for link in (resp.data or [])
+            for link in (links or [])
         ]
         
         # ✅ AUTO-GENERATE FALLBACK LINKS IF NONE EXIST
@@ -225,6 +327,50 @@ def detect_category(query: str) -> Optional[str]:
     return None
 
 
+SEARCH_LIMIT = 50
+_search_rpc_missing = False
+
+
+def search_rpc(
+    supabase,
+    q: str,
+    influencer: Optional[influencers.Influencer],
+    category: Optional[str],
+    cursor: Optional[str] = None,
+) -> Optional[list[dict]]:
+    """Products (with their buy links) from the `search_products` RPC, or None when it can't be used.
+
+    The free text only filters when no influencer or category was detected,
+    as in the REST fallback. `cursor` is a previous page's `next_cursor`.
+    """
+    global _search_rpc_missing
+    if _search_rpc_missing or (influencer is not None and not influencer.id):
+        return None
+    params = {
+        "q": "" if influencer or category else q,
+        "influencer": influencer.id if influencer else None,
+        "category": category,
+        "max_rows": SEARCH_LIMIT,
+        "page_cursor": cursor,
+    }
+    try:
+        return supabase.rpc("search_products", params).execute().data or []
+    except Exception as exc:
+        if getattr(exc, "code", None) != "PGRST202" and "PGRST202" not in str(exc):
+            raise
+        print("  [WARN] search_products() not installed — run migrations/search_products.sql")
+        _search_rpc_missing = True
+        return None
+
+
+def or_filter(query_builder, filters: str):
+    """`.or_()` for postgrest-py releases that predate it (supabase 2.0.x pins < 0.14)."""
+    if hasattr(query_builder, "or_"):
+        return query_builder.or_(filters)
+    query_builder.params = query_builder.params.add("or", f"({filters})")
+    return query_builder
+
+
 # ── Routes ─────────────────────────────────────────────────────────────────────
 
 @app.get("/")
@@ -233,43 +379,57 @@ def health_check():
 
 
 @app.get("/search")
-def search(q: str = Query(..., min_length=1, description="Search query")):
-    """Smart search endpoint with STRICT influencer filtering."""
+def search(
+    q: str = Query(..., min_length=1, description="Search query"),
+    cursor: Optional[str] = Query(None, description="`next_cursor` of the previous page"),
+    supabase=Depends(supabase_dep),
+):
+    """Smart search endpoint with STRICT influencer filtering.
+
+    Results come in pages of 50; `next_cursor` is set when there may be more.
+    """
     try:
-        query_lower = q.lower()
-        
-        # DETECT SPECIFIC INFLUENCER
-        target_influencer = None
-        if any(word in query_lower for word in ['sarah', 'sarah hany', 'sarahhany']):
-            target_influencer = 'sarah'
-        elif any(word in query_lower for word in ['huda', 'huda beauty', 'hudabeauty']):
-            target_influencer = 'huda'
+        # DETECT SPECIFIC INFLUENCER (any name, handle or alias, in one pass)
+        index = influencers.get_index(supabase)
+        target_influencer = index.detect(q)
         
         category = detect_category(q)
         
-        query_builder = supabase.table("products").select("*")
+        with span("search.rpc", category=category):
+            products = search_rpc(supabase, q, target_influencer, category, cursor)
+        next_cursor = products[-1].get("next_cursor") if products and len(products) == SEARCH_LIMIT else None
         
-        if target_influencer:
-            query_builder = query_builder.ilike("influencer_name", f"%{target_influencer}%")
-        
-        if category:
-            query_builder = query_builder.ilike("category", f"%{category}%")
-        
-        if not target_influencer and not category:
-            query_builder = query_builder.or_(
-                f"product_name.ilike.%{q}%,brand.ilike.%{q}%,quote.ilike.%{q}%"
-            )
+        if products is None and cursor:
+            products = []  # the fallback returns a single page
+        elif products is None:
+            query_builder = supabase.table("products").select("*")
+            
+            if target_influencer:
+                query_builder = index.filter_products(query_builder, target_influencer)
+            
+            if category:
+                query_builder = query_builder.ilike("category", f"%{category}%")
+            
+            if not target_influencer and not category:
+                query_builder = or_filter(
+                    query_builder,
+                    f"product_name.ilike.%{q}%,brand.ilike.%{q}%,quote.ilike.%{q}%",
+                )
+            
+            with span("search.query", category=category):
+                resp = query_builder.limit(SEARCH_LIMIT).execute()
+            products = resp.data or []
         
-        resp = query_builder.limit(50).execute()
-        products = resp.data or []
-        products = enrich_products(products)
+        with span("search.enrich", products=len(products)):
+            products = enrich_products(products)
         
         return {
             "query": q,
-            "detected_influencer": target_influencer,
+            "detected_influencer": target_influencer.name if target_influencer else None,
             "detected_category": category,
             "count": len(products),
             "results": products,
+            "next_cursor": next_cursor,
         }
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
@@ -279,6 +439,7 @@ def search(q: str = Query(..., min_length=1, description="Search query")):
 def list_products(
     limit: int = Query(50, ge=1, le=1000),  # ✅ Max 1000
     offset: int = Query(0, ge=0),
+    supabase=Depends(supabase_dep),
 ):
     """List all products with buy links."""
     try:
@@ -295,7 +456,7 @@ def list_products(
 
 
 @app.get("/influencers")
-def list_influencers():
+def list_influencers(supabase=Depends(supabase_dep)):
     """List all influencers."""
     try:
         resp = supabase.table("influencers").select("*").execute()
@@ -305,7 +466,7 @@ def list_influencers():
 
 
 @app.get("/categories")
-def list_categories():
+def list_categories(supabase=Depends(supabase_dep)):
     """List all distinct product categories."""
     try:
         resp = supabase.table("products").select("category").execute()
@@ -317,68 +478,54 @@ def list_categories():
         raise HTTPException(status_code=500, detail=str(exc))
 
 
-@app.post("/ask")
-def ask_ai(req: QuestionRequest):
-    """AI-powered Q&A endpoint with STRICT influencer filtering"""
-    raw = ""
-    try:
-        print(f"\n🔍 Question: {req.question}")
-        
-        resp = supabase.table("products").select("*").execute()
-        products = resp.data or []
-        print(f"✅ Found {len(products)} products")
-        
-        if not products:
-            return {
-                "question": req.question,
-                "answer": "No products in the database yet! Add some influencers first.",
-                "products": [],
-                "total_products": 0
-            }
-        
-        products = enrich_products(products)
+ASK_FALLBACK_ANSWER = "I found some products for you! 💄"
 
-        question_lower = req.question.lower()
-        target_influencer = None
-        
-        if any(word in question_lower for word in ['sarah', 'sarah hany', 'sarahhany']):
-            target_influencer = 'sarah'
-        elif any(word in question_lower for word in ['huda', 'huda beauty', 'hudabeauty']):
-            target_influencer = 'huda'
-        
-        filtered_products = products
-        if req.influencer_name:
-            filtered_products = [
-                p for p in products
-                if req.influencer_name.lower() in p['influencer_name'].lower()
-            ]
-        elif target_influencer:
-            filtered_products = [
-                p for p in products 
-                if target_influencer in p['influencer_name'].lower()
-            ]
-        
-        if not filtered_products:
-            return {
-                "question": req.question,
-                "answer": f"I couldn't find any products from that influencer yet.",
-                "products": [],
-                "total_products": 0
-            }
 
-        context = f"Products from {filtered_products[0]['influencer_name']}:\n\n" if target_influencer else "Products:\n\n"
-        
-        for p in filtered_products[:30]:
-            context += f"• {p['product_name']}"
-            if p.get('brand'):
-                context += f" by {p['brand']}"
-            context += f" ({p.get('category', 'other')})\n"
-            context += f"  By: {p['influencer_name']}\n"
-            if p.get('quote'):
-                context += f"  \"{p['quote'][:150]}\"\n"
-            context += "\n"
-
-        system_prompt = """You are a friendly Egyptian shopping assistant for beauty and lifestyle products.
+@dataclass
+class AskPrompt:
+    """What /ask sends the model; `messages` is None when the reply needs no model call."""
+    products: list[dict]
+    messages: Optional[list[dict]] = None
+    answer: str = ""
+    context_products: int = 0
+
+
+def _ask_prompt(req: QuestionRequest, supabase) -> AskPrompt:
+    """Pick the candidate products for a question and build the Groq messages."""
+    print(f"\n🔍 Question: {req.question}")
+
+    index = influencers.get_index(supabase)
+    target_influencer = index.lookup(req.influencer_name) if req.influencer_name else index.detect(req.question)
+
+    query = supabase.table("products").select("*")
+    if target_influencer:
+        query = index.filter_products(query, target_influencer)
+    elif req.influencer_name:  # not a known influencer: fall back to a name match
+        query = query.ilike("influencer_name", f"%{req.influencer_name}%")
+    with span("ask.query", influencer=target_influencer.name if target_influencer else None):
+        resp = query.execute()
+    filtered_products = resp.data or []
+    print(f"✅ Found {len(filtered_products)} products")
+
+    if not filtered_products:
+        if target_influencer or req.influencer_name:
+            return AskPrompt(products=[], answer="I couldn't find any products from that influencer yet.")
+        return AskPrompt(products=[], answer="No products in the database yet! Add some influencers first.")
+
+    header = f"Products from {target_influencer.name}:" if target_influencer else "Products:"
+    entries = []
+    for p in filtered_products[:30]:
+        lines = [f"• {p['product_name']}" + (f" by {p['brand']}" if p.get('brand') else "") + f" ({p.get('category', 'other')})"]
+        if not target_influencer:
+            lines.append(f"  By: {p['influencer_name']}")
+        quote = prompts.clean_caption(p.get('quote') or "", ASK_QUOTE_TOKENS)
+        if quote:
+            lines.append(f"  \"{quote}\"")
+        entries.append("\n".join(lines))
+    entries = prompts.fit(entries, ASK_CONTEXT_BUDGET)
+    context = header + "\n\n" + "\n\n".join(entries) + "\n"
+
+    system_prompt = """You are a friendly Egyptian shopping assistant for beauty and lifestyle products.
 
 CRITICAL LANGUAGE RULES:
 - Answer in BOTH English AND Egyptian Arabic (العامية المصرية)
@@ -401,106 +548,164 @@ Return ONLY valid JSON:
 
 No markdown, no extra text. Just JSON starting with { and ending with }."""
 
-        completion = groq_client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {
-                    "role": "system",
-                    "content": "You are a friendly Egyptian shopping assistant. Always respond in conversational Egyptian Arabic (عامية مصرية), NOT formal Arabic. Use Egyptian slang, expressions, and speak like a Cairo local. Be helpful and friendly!"
-                },
-                {"role": "user", "content": f"{context}\n\nQuestion: {req.question}"}
-            ],
-            temperature=0.5,
-            max_tokens=800,
-        )
-        
-        raw = completion.choices[0].message.content.strip()
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": f"{context}\n\nQuestion: {req.question}"}
+    ]
+    return AskPrompt(products=filtered_products, messages=messages, context_products=len(entries))
 
-        if raw.startswith("```"):
-            lines = raw.split("\n")
-            raw = "\n".join(lines[1:-1])
-            if raw.startswith("json"):
-                raw = raw[4:].strip()
 
-        json_start = raw.find('{')
-        json_end = raw.rfind('}') + 1
-        
-        if json_start == -1 or json_end == 0:  # ✅ ADD 8 SPACES HERE!
-            if '"answer":' in raw and '"recommended_products":' in raw:
-                answer_start = raw.find('"answer":')
-                products_end = raw.rfind(']')
-                if answer_start != -1 and products_end != -1:
-                    json_str = '{' + raw[answer_start:products_end+1] + '}'
-                else:
-                    return {
-                        "question": req.question,
-                        "answer": "Here are some products! 💄",
-                        "products": filtered_products,
-                        "total_products": len(filtered_products)
-                    }
-            else:
-                return {
-                    "question": req.question,
-                    "answer": "Here are some products! 💄",
-                    "products": filtered_products,
-                    "total_products": len(filtered_products)
-                }
-        else:
-            json_str = raw[json_start:json_end]
-        
+def _ask_reply(req: QuestionRequest, products: list[dict], answer: str = ASK_FALLBACK_ANSWER) -> dict:
+    """The /ask response body; buy links are only looked up for the products returned."""
+    with span("ask.enrich", products=len(products)):
+        products = enrich_products(products)
+    return {
+        "question": req.question,
+        "answer": answer,
+        "products": products,
+        "total_products": len(products)
+    }
+
+
+def _ask_answer(req: QuestionRequest, products: list[dict], ai_response: dict) -> dict:
+    """Resolve the model's recommended product names against the candidates."""
+    recommended_names = ai_response.get("recommended_products") or []
+    if not isinstance(recommended_names, list):
+        recommended_names = [recommended_names]
+    with span("ask.match", names=len(recommended_names)):
+        recommended = matching.matcher_for(products).resolve(recommended_names, products)
+
+    if not recommended:
+        recommended = products
+
+    return _ask_reply(req, recommended, ai_response.get("answer") or "Here are some products!")
+
+
+@app.post("/ask")
+def ask_ai(
+    req: QuestionRequest,
+    supabase=Depends(supabase_dep),
+    groq_client=Depends(groq_dep),
+):
+    """AI-powered Q&A endpoint with STRICT influencer filtering"""
+    plan = None
+    try:
+        plan = _ask_prompt(req, supabase)
+        if plan.messages is None:
+            return _ask_reply(req, plan.products, plan.answer)
+
+        prompt_tokens = prompts.measure("groq.chat.ask", plan.messages)
+        with span("ask.groq", context_products=plan.context_products, prompt_tokens=prompt_tokens):
+            completion = call(
+                "groq",
+                groq_client.chat.completions.create,
+                endpoint="groq.chat",
+                model="llama-3.3-70b-versatile",
+                temperature=0.5,
+                max_tokens=800,
+                **llmjson.request(plan.messages),
+            )
+
         try:
-            ai_response = json.loads(json_str)
-        except json.JSONDecodeError:
-            return {
-                "question": req.question,
-                "answer": "I found some products for you! 💄",
-                "products": filtered_products,
-                "total_products": len(filtered_products)
-            }
+            # A reply cut off mid-answer is closed and kept rather than discarded.
+            ai_response = llmjson.read_object(completion, "groq.chat.ask")
+        except ValueError:
+            return _ask_reply(req, plan.products)
+        return _ask_answer(req, plan.products, ai_response)
 
-        recommended_names = ai_response.get("recommended_products", [])
-        recommended = []
-        
-        for name in recommended_names:
-            name_lower = name.lower()
-            for p in filtered_products:
-                if name_lower in p['product_name'].lower() or p['product_name'].lower() in name_lower:
-                    if p not in recommended:
-                        recommended.append(p)
-                    break
+    except Exception as exc:
+        print(f"❌ ERROR: {exc}")
+        return _ask_reply(req, plan.products if plan else [])
 
-        if not recommended:
-            recommended = filtered_products
 
-        return {
-            "question": req.question,
-            "answer": ai_response.get("answer", "Here are some products!"),
-            "products": recommended,
-            "total_products": len(recommended)
-        }
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def _ask_events(req: QuestionRequest, supabase, groq_client) -> Iterator[str]:
+    """/ask as Server-Sent Events: `delta` events while the answer is written, then `done`."""
+    yield ": ask\n\n"  # flush the headers before the first database query
+    start = time.perf_counter()
+    plan = None
+    try:
+        plan = _ask_prompt(req, supabase)
+        if plan.messages is None:
+            yield _sse("done", _ask_reply(req, plan.products, plan.answer))
+            return
+
+        prompts.measure("groq.chat.ask", plan.messages)
+        stream = call(
+            "groq",
+            groq_client.chat.completions.create,
+            endpoint="groq.chat",
+            model="llama-3.3-70b-versatile",
+            messages=plan.messages,
+            temperature=0.5,
+            max_tokens=800,
+            stream=True,
+        )
+        answer = llmjson.FieldReader("answer")
+        raw = []
+        first = True
+        try:
+            for text in llmjson.iter_text(stream):
+                raw.append(text)
+                delta = answer.feed(text)
+                if delta:
+                    if first:
+                        telemetry.observe("ask.first_token", time.perf_counter() - start)
+                        first = False
+                    yield _sse("delta", {"text": delta})
+        except Exception as exc:  # keep what arrived; the parser closes it
+            print(f"⚠️ Answer stream broke: {exc}")
+
+        try:
+            ai_response = llmjson.parse_object("".join(raw), "groq.chat.ask")
+        except ValueError:
+            yield _sse("done", _ask_reply(req, plan.products))
+            return
+        yield _sse("done", _ask_answer(req, plan.products, ai_response))
 
     except Exception as exc:
         print(f"❌ ERROR: {exc}")
-        return {
-            "question": req.question,
-            "answer": "I found some products for you! 💄",
-            "products": filtered_products if 'filtered_products' in locals() else products,
-            "total_products": len(filtered_products) if 'filtered_products' in locals() else len(products)
-        }
+        yield _sse("done", _ask_reply(req, plan.products if plan else []))
+
+
+@app.post("/ask/stream")
+def ask_ai_stream(
+    req: QuestionRequest,
+    supabase=Depends(supabase_dep),
+    groq_client=Depends(groq_dep),
+):
+    """/ask, streamed: the answer text arrives as it's generated, the products in the final `done` event."""
+    stats = telemetry.RequestStats("/ask/stream")
+    return StreamingResponse(
+        telemetry.scoped_iter(stats, _timed_stream(stats, "POST", _ask_events(req, supabase, groq_client))),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Request-ID": stats.id},
+    )
 
 # ── Admin Endpoints ────────────────────────────────────────────────────────────
 
 scrape_tasks = {}
 
+
+def _scrape_queue_depth() -> dict:
+    active = sum(1 for task in list(scrape_tasks.values()) if task.get("status") not in ("complete", "failed"))
+    return {(("queue", "add_influencer"),): active}
+
+
+metrics.gauge_callback("influencer_queue_depth", _scrape_queue_depth)
+
 @app.post("/admin/preview-influencer")
-def preview_influencer(req: InfluencerSearchRequest):
+def preview_influencer(req: InfluencerSearchRequest, client=Depends(apify_dep)):
     """Preview influencer before scraping"""
     try:
-        from apify_client import ApifyClient
-        client = ApifyClient(os.getenv("APIFY_API_TOKEN"))
-        
         if req.platform == "instagram":
-            run = client.actor("apify/instagram-reel-scraper").call(
+            run = call(
+                "apify",
+                client.actor("apify/instagram-reel-scraper").call,
+                endpoint="apify.instagram-reel-scraper",
                 run_input={"username": [req.handle], "resultsLimit": 1}
             )
             
@@ -524,7 +729,10 @@ def preview_influencer(req: InfluencerSearchRequest):
                 "posts_count": 0
             }
         else:
-            run = client.actor("clockworks/free-tiktok-scraper").call(
+            run = call(
+                "apify",
+                client.actor("clockworks/free-tiktok-scraper").call,
+                endpoint="apify.free-tiktok-scraper",
                 run_input={"profiles": [f"@{req.handle}"], "resultsPerPage": 1}
             )
             
@@ -554,24 +762,30 @@ def preview_influencer(req: InfluencerSearchRequest):
 
 
 @app.post("/admin/parse-influencer")
-def parse_influencer_products(req: ParseInfluencerRequest):
+def parse_influencer_products(
+    req: ParseInfluencerRequest,
+    client=Depends(apify_dep),
+    groq_client=Depends(groq_dep),
+):
     """Parse influencer and extract products WITHOUT saving."""
     try:
-        from apify_client import ApifyClient
-        
         print(f"\n{'='*60}")
         print(f"🔍 Parsing: {req.handle} ({req.platform})")
         print(f"{'='*60}\n")
         
-        client = ApifyClient(os.getenv("APIFY_API_TOKEN"))
-        
         print("📥 Scraping videos...")
         if req.platform == "instagram":
-            run = client.actor("apify/instagram-reel-scraper").call(
+            run = call(
+                "apify",
+                client.actor("apify/instagram-reel-scraper").call,
+                endpoint="apify.instagram-reel-scraper",
                 run_input={"username": [req.handle], "resultsLimit": req.limit}
             )
         else:
-            run = client.actor("clockworks/free-tiktok-scraper").call(
+            run = call(
+                "apify",
+                client.actor("clockworks/free-tiktok-scraper").call,
+                endpoint="apify.free-tiktok-scraper",
                 run_input={"profiles": [f"@{req.handle}"], "resultsPerPage": req.limit}
             )
         
@@ -593,7 +807,10 @@ def parse_influencer_products(req: ParseInfluencerRequest):
             if not profile_pic:
                 try:
                     print("📸 Fetching profile pic via profile scraper...")
-                    profile_run = client.actor("apify/instagram-profile-scraper").call(
+                    profile_run = call(
+                        "apify",
+                        client.actor("apify/instagram-profile-scraper").call,
+                        endpoint="apify.instagram-profile-scraper",
                         run_input={"usernames": [req.handle]}
                     )
                     profile_items = list(client.dataset(profile_run["defaultDatasetId"]).iterate_items())
@@ -646,39 +863,26 @@ def parse_influencer_products(req: ParseInfluencerRequest):
                 print(f"    ⚠️ No CDN URL found, skipping...")
                 continue
             
-            # AI Extraction with CDN URL embedded
-            prompt = f"""Extract beauty/lifestyle products from: "{caption}"
-
-Return JSON:
-[
-  {{
-    "product_name": "Product name",
-    "brand": "Brand",
-    "category": "makeup/skincare/haircare/fragrance/other",
-    "quote": "Quote from caption",
-    "video_url": "{cdn_video_url}"
-  }}
-]
+            # AI Extraction (the CDN URL is attached below, not sent to the model)
+            prompt = f"""Extract beauty/lifestyle products from: "{prompts.clean_caption(caption, prompts.CAPTION_TOKENS)}"
 
+Return JSON: [{{"product_name": "Product name", "brand": "Brand", "category": "makeup/skincare/haircare/fragrance/other", "quote": "Quote from caption"}}]
 If none: []"""
+            messages = [{"role": "user", "content": prompt}]
+            prompts.measure("groq.chat.parse", messages)
             
             try:
-                response = groq_client.chat.completions.create(
+                response = call(
+                    "groq",
+                    groq_client.chat.completions.create,
+                    endpoint="groq.chat",
                     model="llama-3.3-70b-versatile",
-                    messages=[{"role": "user", "content": prompt}],
                     temperature=0.3,
-                    max_tokens=1024
+                    max_tokens=1024,
+                    **llmjson.request(messages, wrap="products"),
                 )
                 
-                raw = response.choices[0].message.content.strip()
-                
-                if raw.startswith("```"):
-                    lines = raw.split("\n")
-                    raw = "\n".join(lines[1:-1])
-                    if raw.startswith("json"):
-                        raw = raw[4:].strip()
-                
-                products = json.loads(raw)
+                products = llmjson.read_array(response, "groq.chat.parse")
                 
                 for product in products:
                     # Explicitly set video_url from CDN URL (don't rely on AI)
@@ -715,56 +919,51 @@ If none: []"""
         raise HTTPException(status_code=500, detail=str(exc))
 
 @app.post("/admin/save-products")
-def save_verified_products(req: SaveProductsRequest):
+def save_verified_products(req: SaveProductsRequest, supabase=Depends(supabase_dep)):
     """Save manually verified products to database."""
     try:
         print(f"\n💾 Saving {len(req.products)} verified products...\n")
         
         saved_count = 0
+        resolve = influencers.resolver(supabase, req.platform)
+        influencer_id = resolve(req.influencer_name) if resolve else None
         
         for product in req.products:
+            # Ids are made here so the writes can be retried: a retry after a
+            # timeout that had in fact committed skips the existing rows.
+            product_data = {
+                "id": str(uuid.uuid4()),
+                "product_name": product.get("product_name"),
+                "brand": product.get("brand", ""),
+                "category": product.get("category", "other"),
+                "quote": product.get("quote", ""),
+                "influencer_name": req.influencer_name,
+                "influencer_profile_pic": req.profile_pic,
+                "platform": req.platform,
+                "video_url": product.get("video_url", "")
+            }
+            if influencer_id:
+                product_data["influencer_id"] = influencer_id
+            link_rows = []
             try:
-                existing = supabase.table("products").select("id").eq(
-                    "product_name", product["product_name"]
-                ).eq(
-                    "influencer_name", req.influencer_name
-                ).execute()
+                existing_query = supabase.table("products").select("id").eq("product_name", product["product_name"])
+                if influencer_id:
+                    existing_query = existing_query.eq("influencer_id", influencer_id)
+                else:
+                    existing_query = existing_query.eq("influencer_name", req.influencer_name)
+                existing = call("supabase", existing_query.execute, endpoint="supabase.products")
                 
                 if existing.data:
                     print(f"  ⏭️  Skipping: {product['product_name']}")
                     continue
-                
-                product_data = {
-                    "product_name": product["product_name"],
-                    "brand": product.get("brand", ""),
-                    "category": product.get("category", "other"),
-                    "quote": product.get("quote", ""),
-                    "influencer_name": req.influencer_name,
-                    "influencer_profile_pic": req.profile_pic,
-                    "platform": req.platform,
-                    "video_url": product.get("video_url", "")
-                }
-                
-                result = supabase.table("products").insert(product_data).execute()
-                product_id = result.data[0]["id"]
-
-                links_added = 0
 
                 # Parse @mentions from caption and create Instagram links FIRST
                 caption = product.get("quote", "")
                 mentions = re.findall(r'@([a-zA-Z0-9._]+)', caption)
-                for mention in mentions:
-                    try:
-                        supabase.table("buy_links").insert({
-                            "product_id": product_id,
-                            "store_name": f"@{mention}",
-                            "url": f"https://instagram.com/{mention}",
-                            "price": None,
-                            "currency": None
-                        }).execute()
-                        links_added += 1
-                    except Exception as e:
-                        print(f"      ⚠️ Mention link failed: {e}")
+                links = [
+                    {"store_name": f"@{mention}", "url": f"https://instagram.com/{mention}"}
+                    for mention in mentions
+                ]
 
                 buy_links = product.get("buy_links", [])
 
@@ -796,27 +995,51 @@ def save_verified_products(req: SaveProductsRequest):
                         }
                     ]
                     print(f"      🔗 Auto-generated search links")
-                
-                for link in buy_links:
-                    url = link.get("url", "").strip()
-                    if url:
-                        try:
-                            supabase.table("buy_links").insert({
-                                "product_id": product_id,
-                                "store_name": link["store_name"],
-                                "url": url,
-                                "price": link.get("price"),
-                                "currency": link.get("currency")
-                            }).execute()
-                            links_added += 1
-                        except Exception as e:
-                            print(f"      ⚠️ Link failed: {e}")
+                links += buy_links
+
+                link_rows = [
+                    {
+                        "id": str(uuid.uuid4()),
+                        "product_id": product_data["id"],
+                        "store_name": link["store_name"],
+                        "url": link.get("url", "").strip(),
+                        "price": link.get("price"),
+                        "currency": link.get("currency")
+                    }
+                    for link in links
+                    if link.get("url", "").strip()
+                ]
+
+                call(
+                    "supabase",
+                    supabase.table("products").upsert(product_data, on_conflict="id", ignore_duplicates=True).execute,
+                    endpoint="supabase.products",
+                )
+
+                links_added = 0
+                for link_row in link_rows:
+                    try:
+                        call(
+                            "supabase",
+                            supabase.table("buy_links").upsert(link_row, on_conflict="id", ignore_duplicates=True).execute,
+                            endpoint="supabase.buy_links",
+                        )
+                        links_added += 1
+                    except Exception as e:
+                        print(f"      ⚠️ Link failed: {e}")
+                        deadletter.record("buy_links_insert", link_row, e)
                 
                 saved_count += 1
                 print(f"  ✅ {product['product_name']} ({links_added} links)")
                 
             except Exception as e:
                 print(f"  ❌ Failed: {product.get('product_name')}: {e}")
+                if product.get("product_name"):
+                    deadletter.record(
+                        "products_insert",
+                        {"product": product_data, "buy_links": link_rows or product.get("buy_links", [])},
+                        e,
+                    )
                 continue
         
         print(f"\n✅ Saved {saved_count}/{len(req.products)} products!\n")
@@ -832,7 +1055,7 @@ def save_verified_products(req: SaveProductsRequest):
         raise HTTPException(status_code=500, detail=str(exc))
 
 @app.delete("/admin/delete-product/{product_id}")
-def delete_product(product_id: str):
+def delete_product(product_id: str, supabase=Depends(supabase_dep)):
     """Delete a product and its buy links"""
     try:
         print(f"\n🗑️ Deleting product {product_id}...")
@@ -873,7 +1096,7 @@ def delete_product(product_id: str):
 
 
 @app.put("/admin/update-product/{product_id}")
-def update_product(product_id: str, req: dict):
+def update_product(product_id: str, req: dict, supabase=Depends(supabase_dep)):
     """Update product details and buy links"""
     try:
         print(f"\n🔧 Updating product {product_id}")
@@ -929,7 +1152,7 @@ def update_product(product_id: str, req: dict):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/admin/add-influencer")
-async def add_influencer(req: AddInfluencerRequest):
+async def add_influencer(req: AddInfluencerRequest, supabase=Depends(supabase_dep)):
     """Start scraping influencer in background"""
     task_id = str(uuid.uuid4())
     
@@ -972,6 +1195,7 @@ async def add_influencer(req: AddInfluencerRequest):
                         }).execute()
                 except Exception as e:
                     print(f"Failed to add to watchlist: {e}")
+                influencers.invalidate()
             else:
                 scrape_tasks[task_id]["status"] = "failed"
                 scrape_tasks[task_id]["message"] = f"❌ Error: {result.stderr}"
@@ -995,8 +1219,20 @@ async def get_task_status(task_id: str):
     return scrape_tasks[task_id]
 
 
+@app.get("/metrics")
+def prometheus_metrics():
+    """Prometheus scrape endpoint: route, outbound-call, token and queue metrics."""
+    return Response(content=metrics.render(), headers={"Content-Type": metrics.CONTENT_TYPE})
+
+
+@app.get("/admin/timings")
+def get_timings():
+    """Latency histograms (count, p50, p95, max in seconds) for every span seen by this process."""
+    return telemetry.summary()
+
+
 @app.get("/admin/monster/status")
-def get_monster_status():
+def get_monster_status(supabase=Depends(supabase_dep)):
     """Get monster status, stats, watchlist count, and recent logs."""
     try:
         config_resp = supabase.table("monster_config").select("*").limit(1).execute()
@@ -1033,7 +1269,7 @@ def get_monster_status():
 
 
 @app.post("/admin/monster/start")
-def start_monster():
+def start_monster(supabase=Depends(supabase_dep)):
     """Activate the monster (set is_active=true)."""
     try:
         config_resp = supabase.table("monster_config").select("id").limit(1).execute()
@@ -1051,7 +1287,7 @@ def start_monster():
 
 
 @app.post("/admin/monster/stop")
-def stop_monster():
+def stop_monster(supabase=Depends(supabase_dep)):
     """Pause the monster (set is_active=false)."""
     try:
         config_resp = supabase.table("monster_config").select("id").limit(1).execute()
@@ -1078,7 +1314,7 @@ def parse_influencer_now(handle: str):
 
 
 @app.get("/admin/watchlist")
-def get_watchlist():
+def get_watchlist(supabase=Depends(supabase_dep)):
     """Return all influencers in the watchlist."""
     try:
         resp = (
@@ -1093,7 +1329,11 @@ def get_watchlist():
 
 
 @app.post("/admin/watchlist/add")
-def add_to_watchlist(handle: str, platform: str = "instagram"):
+def add_to_watchlist(
+    handle: str,
+    platform: str = "instagram",
+    supabase=Depends(supabase_dep),
+):
     """Add an influencer to the watchlist."""
     try:
         existing = (
@@ -1114,16 +1354,18 @@ def add_to_watchlist(handle: str, platform: str = "instagram"):
                 "added_by": "manual",
             }
         ).execute()
+        influencers.invalidate()
         return {"success": True, "message": f"{handle} added to watchlist"}
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
 
 
 @app.delete("/admin/watchlist/remove/{handle}")
-def remove_from_watchlist(handle: str):
+def remove_from_watchlist(handle: str, supabase=Depends(supabase_dep)):
     """Remove an influencer from the watchlist."""
     try:
         supabase.table("influencer_watchlist").delete().eq("handle", handle).execute()
+        influencers.invalidate()
         return {"success": True, "message": f"{handle} removed from watchlist"}
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
@@ -0,0 +1,9 @@
+-- Per-stage timings for Monster runs
+-- Run this in Supabase SQL Editor after create_monster_tables.sql
+
+ALTER TABLE processing_logs
+    ADD COLUMN IF NOT EXISTS stage_timings JSONB;
+
+-- e.g. slowest extract stages:
+--   SELECT influencer_handle, (stage_timings->>'extract')::float AS extract_s
+--   FROM processing_logs ORDER BY extract_s DESC NULLS LAST LIMIT 20;
@@ -0,0 +1,13 @@
+-- Extra names an influencer is searched by (core.influencers alias index):
+-- Arabic spellings, nicknames, old handles. Names and handles are already
+-- aliases; list only what a user might type instead.
+-- Run this in Supabase SQL Editor. Without it the index uses names and handles only.
+
+ALTER TABLE influencers ADD COLUMN IF NOT EXISTS aliases TEXT[] DEFAULT '{}';
+
+-- e.g.
+-- UPDATE influencers SET aliases = ARRAY['سارة هاني', 'ساره هاني'] WHERE name = 'Sarah Hany';
+
+-- /search and /ask filter products with influencer_name IN (name, handles),
+-- which uses this index instead of scanning with ilike.
+CREATE INDEX IF NOT EXISTS idx_products_influencer ON products(influencer_name);
@@ -0,0 +1,112 @@
+-- products.influencer_id: a real foreign key to influencers instead of the
+-- free-text influencer_name, so products are filtered by one indexed UUID and
+-- renaming an influencer is a one-row update.
+-- Run this in Supabase SQL Editor. Until then the app keeps filtering on
+-- influencer_name (core.influencers checks for the column on each index reload).
+
+ALTER TABLE products
+  ADD COLUMN IF NOT EXISTS influencer_id UUID REFERENCES influencers(id) ON DELETE SET NULL;
+
+CREATE INDEX IF NOT EXISTS idx_products_influencer_id ON products(influencer_id);
+
+-- One row per influencer name, ignoring case. Duplicates are merged into the
+-- oldest row first (their products repointed, so a re-run is safe too).
+WITH ranked AS (
+  SELECT id, first_value(id) OVER (PARTITION BY lower(name) ORDER BY created_at, id) AS keep
+  FROM influencers
+)
+UPDATE products p SET influencer_id = r.keep
+FROM ranked r
+WHERE p.influencer_id = r.id AND r.id <> r.keep;
+
+WITH ranked AS (
+  SELECT id, first_value(id) OVER (PARTITION BY lower(name) ORDER BY created_at, id) AS keep
+  FROM influencers
+)
+DELETE FROM influencers i USING ranked r
+WHERE i.id = r.id AND r.id <> r.keep;
+
+-- lower(name) stops "Sarah Hany" and "sarah hany" from both existing; the
+-- plain index on name is what `on_conflict=name` upserts (5_load_database.py,
+-- core.influencers.influencer_id) resolve against.
+CREATE UNIQUE INDEX IF NOT EXISTS idx_influencers_name_lower ON influencers(lower(name));
+CREATE UNIQUE INDEX IF NOT EXISTS idx_influencers_name ON influencers(name);
+CREATE INDEX IF NOT EXISTS idx_influencers_instagram_lower ON influencers(lower(instagram_handle));
+CREATE INDEX IF NOT EXISTS idx_influencers_tiktok_lower ON influencers(lower(tiktok_handle));
+
+-- The influencer a products.influencer_name value refers to: its name or either handle.
+CREATE OR REPLACE FUNCTION influencer_id_for(influencer TEXT)
+RETURNS UUID
+LANGUAGE sql STABLE
+AS $$
+  SELECT id FROM influencers
+  WHERE lower(name) = lower(ltrim(influencer, '@'))
+     OR lower(instagram_handle) = lower(ltrim(influencer, '@'))
+     OR lower(tiktok_handle) = lower(ltrim(influencer, '@'))
+  ORDER BY (lower(name) = lower(ltrim(influencer, '@'))) DESC, created_at
+  LIMIT 1;
+$$;
+
+-- ── Backfill ──────────────────────────────────────────────────────────────────
+
+-- Watched handles the Monster saved products under but that were never loaded
+-- into influencers.
+INSERT INTO influencers (name, instagram_handle, tiktok_handle, platform)
+SELECT DISTINCT ON (lower(w.handle))
+  w.handle,
+  CASE WHEN w.platform = 'instagram' THEN w.handle END,
+  CASE WHEN w.platform = 'tiktok' THEN w.handle END,
+  w.platform
+FROM influencer_watchlist w
+WHERE influencer_id_for(w.handle) IS NULL
+ON CONFLICT DO NOTHING;
+
+-- Any other name products use (old ids, one-off scrapes).
+INSERT INTO influencers (name)
+SELECT DISTINCT ON (lower(p.influencer_name)) p.influencer_name
+FROM products p
+WHERE p.influencer_name <> '' AND p.influencer_name <> 'Unknown'
+  AND influencer_id_for(p.influencer_name) IS NULL
+ON CONFLICT DO NOTHING;
+
+UPDATE products
+SET influencer_id = influencer_id_for(influencer_name)
+WHERE influencer_id IS NULL;
+
+-- ── Keep it filled ────────────────────────────────────────────────────────────
+
+-- Writers set influencer_id themselves; this covers any that don't (COPY, SQL).
+CREATE OR REPLACE FUNCTION products_set_influencer_id()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF NEW.influencer_id IS NULL THEN
+    NEW.influencer_id := influencer_id_for(NEW.influencer_name);
+  END IF;
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS products_set_influencer_id ON products;
+CREATE TRIGGER products_set_influencer_id
+  BEFORE INSERT ON products
+  FOR EACH ROW EXECUTE FUNCTION products_set_influencer_id();
+
+-- influencer_name stays as a display copy: renaming the influencer row renames
+-- its products, so readers never need a join.
+CREATE OR REPLACE FUNCTION influencers_sync_product_names()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  UPDATE products SET influencer_name = NEW.name WHERE influencer_id = NEW.id;
+  RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS influencers_sync_product_names ON influencers;
+CREATE TRIGGER influencers_sync_product_names
+  AFTER UPDATE OF name ON influencers
+  FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+  EXECUTE FUNCTION influencers_sync_product_names();
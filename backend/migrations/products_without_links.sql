@@ -0,0 +1,18 @@
+-- Anti-join for the buy-link backfill (core.bulkload.backfill_links)
+-- Run this in Supabase SQL Editor. Without it the backfill falls back to
+-- reading every product with its embedded links.
+
+CREATE INDEX IF NOT EXISTS idx_buy_links_product ON buy_links(product_id);
+
+-- One page of products that have no buy links, in id order after `after_id`.
+CREATE OR REPLACE FUNCTION products_without_links(after_id UUID, max_rows INT DEFAULT 500)
+RETURNS TABLE (id UUID, product_name VARCHAR, brand VARCHAR)
+LANGUAGE sql STABLE
+AS $$
+    SELECT p.id, p.product_name, p.brand
+    FROM products p
+    WHERE p.id > after_id
+      AND NOT EXISTS (SELECT 1 FROM buy_links b WHERE b.product_id = p.id)
+    ORDER BY p.id
+    LIMIT max_rows;
+$$;
@@ -0,0 +1,118 @@
+-- /search in one round trip: trigram + full-text ranking in the database,
+-- returning each product with its buy links.
+-- Run this in Supabase SQL Editor after products_influencer_id.sql. Without it
+-- /search falls back to ilike filters and a buy-link query per product.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+-- Serve `ilike '%q%'` and the `%` similarity operator on names and brands.
+CREATE INDEX IF NOT EXISTS idx_products_name_trgm ON products USING gin (product_name gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_products_brand_trgm ON products USING gin (brand gin_trgm_ops);
+
+-- 'simple' splits words without English stemming or stop words, so Arabic
+-- names and quotes are matched as written. This replaces the 'english'
+-- products_search_idx from schema.sql, which no query used.
+CREATE INDEX IF NOT EXISTS products_search_simple_idx ON products
+USING gin (to_tsvector('simple',
+  COALESCE(product_name, '') || ' ' ||
+  COALESCE(brand, '') || ' ' ||
+  COALESCE(quote, '')
+));
+DROP INDEX IF EXISTS products_search_idx;
+
+-- `text` as a LIKE pattern that matches only itself (no `%`/`_` wildcards).
+CREATE OR REPLACE FUNCTION like_escape(value TEXT)
+RETURNS TEXT
+LANGUAGE sql IMMUTABLE
+AS $$
+  SELECT replace(replace(replace(value, '\', '\\'), '%', '\%'), '_', '\_');
+$$;
+
+-- Up to `max_rows` products matching `q` (name/brand similarity or ilike, or
+-- words of name, brand and quote), best first, as JSON objects with their buy
+-- links. An empty `q` matches every product of `influencer` / in `category`.
+-- Pass the last object's `next_cursor` as `page_cursor` for the next page.
+-- (JSON rather than RETURNS TABLE, whose `category` column would clash with
+-- the `category` parameter.)
+DROP FUNCTION IF EXISTS search_products(TEXT, UUID, TEXT, INT, TEXT);
+CREATE FUNCTION search_products(
+  q TEXT DEFAULT '',
+  influencer UUID DEFAULT NULL,
+  category TEXT DEFAULT NULL,
+  max_rows INT DEFAULT 50,
+  page_cursor TEXT DEFAULT NULL
+)
+RETURNS SETOF JSON
+LANGUAGE plpgsql STABLE
+AS $$
+DECLARE
+  term TEXT := trim(COALESCE(search_products.q, ''));
+  doc CONSTANT TEXT := $d$to_tsvector('simple', COALESCE(p.product_name, '') || ' ' || COALESCE(p.brand, '') || ' ' || COALESCE(p.quote, ''))$d$;
+  score TEXT := '0';
+  filters TEXT[] := ARRAY['TRUE'];
+  after_rank REAL := NULLIF(split_part(search_products.page_cursor, ',', 1), '')::REAL;
+  after_id UUID := NULLIF(split_part(search_products.page_cursor, ',', 2), '')::UUID;
+BEGIN
+  -- Only the filters in use go into the statement, and EXECUTE plans it for
+  -- these values on every call, so the btree/trigram/tsvector indexes can
+  -- serve it (a cached generic plan with `$1 IS NULL OR ...` could not).
+  IF search_products.influencer IS NOT NULL THEN
+    filters := filters || 'p.influencer_id = $1'::TEXT;
+  END IF;
+  IF search_products.category IS NOT NULL THEN
+    filters := filters || $f$p.category ILIKE $2$f$;
+  END IF;
+  IF term <> '' THEN
+    filters := filters || format(
+      $f$(p.product_name %% $3 OR p.brand %% $3 OR p.product_name ILIKE $4 OR p.brand ILIKE $4 OR %s @@ $5)$f$, doc);
+    score := format(
+      $f$GREATEST(similarity(p.product_name, $3), similarity(COALESCE(p.brand, ''), $3)) + ts_rank(%s, $5)$f$, doc);
+  END IF;
+  IF after_id IS NOT NULL THEN
+    filters := filters || format($f$((%1$s)::REAL < $6 OR ((%1$s)::REAL = $6 AND p.id > $7))$f$, score);
+  END IF;
+
+  RETURN QUERY EXECUTE format($f$
+    WITH page AS (
+      SELECT p.id AS product_id, (%s)::REAL AS score
+      FROM products p
+      WHERE %s
+      ORDER BY 2 DESC, p.id
+      LIMIT $8
+    )
+    SELECT json_build_object(
+      'id', p.id,
+      'influencer_name', p.influencer_name,
+      'influencer_profile_pic', p.influencer_profile_pic,
+      'product_name', p.product_name,
+      'brand', p.brand,
+      'category', p.category,
+      'quote', p.quote,
+      'video_url', p.video_url,
+      'platform', p.platform,
+      'buy_links', COALESCE(
+        (SELECT json_agg(json_build_object(
+           'id', b.id, 'store_name', b.store_name, 'price', b.price,
+           'currency', b.currency, 'url', b.url, 'in_stock', b.in_stock
+         ) ORDER BY b.created_at)
+         FROM buy_links b WHERE b.product_id = p.id),
+        '[]'::JSON
+      ),
+      'rank', page.score,
+      'next_cursor', page.score::TEXT || ',' || p.id::TEXT
+    )
+    FROM page
+    JOIN products p ON p.id = page.product_id
+    ORDER BY page.score DESC, page.product_id
+  $f$, score, array_to_string(filters, ' AND '))
+  USING
+    search_products.influencer,
+    '%' || like_escape(search_products.category) || '%',
+    term,
+    '%' || like_escape(term) || '%',
+    plainto_tsquery('simple', term),
+    after_rank,
+    after_id,
+    search_products.max_rows;
+END;
+$$;
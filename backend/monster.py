@@ -4,40 +4,58 @@ Monitors influencers from watchlist every 6 hours, extracts products via Groq AI
 and saves to database with deduplication.
 """
 
-import json
 import os
 import time
+import uuid
 from datetime import datetime
 
 from dotenv import load_dotenv
-from groq import Groq
-from supabase import create_client, Client
+
+from core import (
+    call,
+    deadletter,
+    get_apify,
+    get_groq,
+    get_supabase,
+    influencers,
+    llmjson,
+    metrics,
+    prompts,
+    request_scope,
+    span,
+    telemetry,
+)
 
 load_dotenv()
 
-SUPABASE_URL = os.getenv("SUPABASE_URL", "")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY", "")
-GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
-APIFY_API_TOKEN = os.getenv("APIFY_API_TOKEN", "")
+# Polite delay between influencers (seconds); the offline benchmarks set it to 0.
+INFLUENCER_DELAY = float(os.getenv("MONSTER_INFLUENCER_DELAY", 5))
+
+
+def _is_missing_column(exc: Exception) -> bool:
+    # PostgREST reports an unknown column in a write as PGRST204, Postgres as 42703
+    return any(code in str(exc) or getattr(exc, "code", None) == code for code in ("PGRST204", "42703"))
 
 
 class Monster:
     def __init__(self):
-        self.supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-        self.groq = Groq(api_key=GROQ_API_KEY)
+        # Process-wide clients: constructing a Monster per request is cheap.
+        self.supabase = get_supabase()
+        self.groq = get_groq()
         self.running = False
 
     # ── Instagram content via Apify ────────────────────────────────────────────
 
     def fetch_instagram_content(self, handle: str) -> list[dict]:
         """Fetch Instagram posts/reels for the given handle via Apify."""
-        from apify_client import ApifyClient
-
-        client = ApifyClient(APIFY_API_TOKEN)
+        client = get_apify()
         print(f"  📥 Fetching Instagram content for @{handle}...")
 
-        run = client.actor("apify/instagram-reel-scraper").call(
-            run_input={"username": [handle], "resultsLimit": 20}
+        run = call(
+            "apify",
+            client.actor("apify/instagram-reel-scraper").call,
+            endpoint="apify.instagram-reel-scraper",
+            run_input={"username": [handle], "resultsLimit": 20},
         )
         items = list(client.dataset(run["defaultDatasetId"]).iterate_items())
         print(f"  ✅ Fetched {len(items)} posts")
@@ -45,8 +63,14 @@ class Monster:
 
     # ── AI product extraction ──────────────────────────────────────────────────
 
-    def extract_products_with_ai(self, posts: list[dict], handle: str) -> list[dict]:
-        """Use Groq AI to extract products from Instagram posts."""
+    def extract_products_with_ai(
+        self, posts: list[dict], handle: str, raise_errors: bool = False
+    ) -> list[dict]:
+        """Use Groq AI to extract products from Instagram posts.
+
+        Failed batches are dead-lettered and yield []; with `raise_errors`
+        (used when replaying dead letters) the error propagates instead.
+        """
         if not posts:
             return []
 
@@ -65,53 +89,48 @@ class Monster:
         if not captions:
             return []
 
-        posts_text = "\n\n".join(
-            f"Post URL: {c['url']}\nCaption: {c['caption']}" for c in captions[:15]
+        # Posts are numbered rather than labelled with their URL, and captions
+        # compacted to the token budget; the model answers with the number.
+        texts = prompts.strip_boilerplate(
+            [prompts.clean_caption(c["caption"], prompts.CAPTION_TOKENS) for c in captions[:15]]
         )
+        blocks = prompts.fit(f"Post {i}:\n{text}" for i, text in enumerate(texts, 1))
+        posts_text = "\n\n".join(blocks)
 
-        prompt = f"""Analyze Instagram posts from @{handle} and extract ALL products.
+        prompt = f"""Extract ALL products from these Instagram posts by @{handle}.
+Return ONLY a JSON array (or [] if none) of:
+{{"product_name": "exact name", "brand": "brand or Unknown", "category": "skincare/makeup/haircare/fragrance/other", "influencer_quote": "direct quote about product", "post": post number}}
 
-For each product return:
-{{
-  "product_name": "exact name",
-  "brand": "brand or Unknown",
-  "category": "skincare/makeup/haircare/fragrance/other",
-  "influencer_quote": "direct quote about product",
-  "post_url": "instagram url"
-}}
-
-Posts:
-{posts_text}
-
-Return ONLY JSON array. If no products: []"""
+{posts_text}"""
+        messages = [{"role": "user", "content": prompt}]
+        prompts.measure("groq.chat.monster", messages)
 
         try:
-            response = self.groq.chat.completions.create(
+            response = call(
+                "groq",
+                self.groq.chat.completions.create,
+                endpoint="groq.chat",
                 model="llama-3.3-70b-versatile",
-                messages=[{"role": "user", "content": prompt}],
                 temperature=0.3,
                 max_tokens=2048,
+                **llmjson.request(messages, wrap="products", stream=llmjson.STREAM),
             )
 
-            raw = response.choices[0].message.content.strip()
-
-            if raw.startswith("```"):
-                lines = raw.split("\n")
-                raw = "\n".join(lines[1:-1])
-                if raw.startswith("json"):
-                    raw = raw[4:].strip()
-
-            json_start = raw.find("[")
-            json_end = raw.rfind("]") + 1
-            if json_start != -1 and json_end > 0:
-                raw = raw[json_start:json_end]
-
-            products = json.loads(raw)
+            # Complete products survive a truncated or malformed reply.
+            products = llmjson.read_array(response, "groq.chat.monster")
+            for product in products:
+                post = product.pop("post", None)
+                if isinstance(post, int) and 1 <= post <= len(blocks) and not product.get("post_url"):
+                    product["post_url"] = captions[post - 1]["url"]
             print(f"  🤖 AI extracted {len(products)} products")
             return products
 
         except Exception as e:
+            if raise_errors:
+                raise
+            # Keep the captions so the batch can be replayed instead of lost.
             print(f"  ⚠️ AI extraction failed: {e}")
+            deadletter.record("monster_extract", {"handle": handle, "posts": captions[:15]}, e)
             return []
 
     # ── Save products with deduplication ──────────────────────────────────────
@@ -120,41 +139,87 @@ Return ONLY JSON array. If no products: []"""
         self, products: list[dict], handle: str, profile_pic: str = ""
     ) -> int:
         """Save products to database, skipping duplicates. Returns count saved."""
-        saved = 0
-
+        rows: dict[str, dict] = {}
         for product in products:
             product_name = product.get("product_name", "").strip()
-            if not product_name:
+            if not product_name or product_name in rows:
                 continue
 
+            rows[product_name] = {
+                "id": str(uuid.uuid4()),
+                "product_name": product_name,
+                "brand": product.get("brand", "Unknown"),
+                "category": product.get("category", "other"),
+                "quote": product.get("influencer_quote", ""),
+                "influencer_name": handle,
+                "influencer_profile_pic": profile_pic,
+                "platform": "instagram",
+                "video_url": product.get("post_url", ""),
+            }
+
+        if not rows:
+            return 0
+
+        # With products.influencer_id, dedup against every name this influencer was saved under
+        resolve = influencers.resolver(self.supabase, "instagram")
+        influencer_id = resolve(handle) if resolve else None
+        if influencer_id:
+            for row in rows.values():
+                row["influencer_id"] = influencer_id
+
+        # One lookup for the whole batch instead of one per product
+        with span("monster.dedup", handle=handle, candidates=len(rows)) as sp:
+            query = self.supabase.table("products").select("product_name")
+            if influencer_id:
+                query = query.eq("influencer_id", influencer_id)
+            else:
+                query = query.eq("influencer_name", handle)
+            existing = call(
+                "supabase",
+                query.in_("product_name", list(rows)).execute,
+                endpoint="supabase.products",
+            )
+            for found in existing.data or []:
+                rows.pop(found["product_name"], None)
+            sp.set(new=len(rows))
+
+        if not rows:
+            return 0
+
+        # Rows carry their own ids and existing ids are skipped, so neither a
+        # retried timeout nor the row-by-row fallback re-inserts a row whose
+        # insert had in fact committed.
+        with span("monster.save", handle=handle, rows=len(rows)) as sp:
             try:
-                existing = (
+                call(
+                    "supabase",
                     self.supabase.table("products")
-                    .select("id")
-                    .eq("product_name", product_name)
-                    .eq("influencer_name", handle)
-                    .execute()
+                    .upsert(list(rows.values()), on_conflict="id", ignore_duplicates=True)
+                    .execute,
+                    endpoint="supabase.products",
                 )
-
-                if existing.data:
-                    continue  # Don't save duplicate
-
-                self.supabase.table("products").insert(
-                    {
-                        "product_name": product_name,
-                        "brand": product.get("brand", "Unknown"),
-                        "category": product.get("category", "other"),
-                        "quote": product.get("influencer_quote", ""),
-                        "influencer_name": handle,
-                        "influencer_profile_pic": profile_pic,
-                        "platform": "instagram",
-                        "video_url": product.get("post_url", ""),
-                    }
-                ).execute()
-                saved += 1
-
+                saved = len(rows)
             except Exception as e:
-                print(f"  ⚠️ Failed to save product '{product_name}': {e}")
+                # One bad row fails the whole batch; retry row by row to isolate it
+                print(f"  ⚠️ Batch insert failed ({e}), saving products one by one")
+                saved = 0
+                for product_name, row in rows.items():
+                    try:
+                        call(
+                            "supabase",
+                            self.supabase.table("products")
+                            .upsert(row, on_conflict="id", ignore_duplicates=True)
+                            .execute,
+                            endpoint="supabase.products",
+                        )
+                        saved += 1
+                    except Exception as row_err:
+                        print(f"  ⚠️ Failed to save product '{product_name}': {row_err}")
+                        deadletter.record(
+                            "products_insert", {"product": row, "buy_links": []}, row_err
+                        )
+            sp.set(saved=saved)
+        metrics.inc("influencer_products_saved_total", saved, source="monster")
 
         return saved
 
@@ -177,50 +242,78 @@ Return ONLY JSON array. If no products: []"""
             "error": None,
         }
 
-        try:
-            posts = self.fetch_instagram_content(handle)
-
-            profile_pic = ""
-            if posts:
-                profile_pic = posts[0].get("ownerProfilePicUrl") or ""
-
-            products = self.extract_products_with_ai(posts, handle)
-            result["products_found"] = len(products)
-
-            saved = self.save_products_to_db(products, handle, profile_pic)
-            result["products_saved"] = saved
-
-            # Update watchlist entry
-            self.supabase.table("influencer_watchlist").update(
-                {
-                    "last_checked_at": datetime.utcnow().isoformat(),
-                    "total_products_found": (
-                        influencer.get("total_products_found", 0) + saved
-                    ),
-                }
-            ).eq("handle", handle).eq("platform", platform).execute()
+        with request_scope(f"monster:{handle}") as stats:
+            try:
+                with span("monster.scrape", handle=handle) as sp:
+                    posts = self.fetch_instagram_content(handle)
+                    sp.set(posts=len(posts))
+
+                profile_pic = ""
+                if posts:
+                    profile_pic = posts[0].get("ownerProfilePicUrl") or ""
+
+                with span("monster.extract", handle=handle) as sp:
+                    products = self.extract_products_with_ai(posts, handle)
+                    sp.set(products=len(products))
+                result["products_found"] = len(products)
+
+                saved = self.save_products_to_db(products, handle, profile_pic)
+                result["products_saved"] = saved
+
+                # Update watchlist entry
+                call(
+                    "supabase",
+                    self.supabase.table("influencer_watchlist").update(
+                        {
+                            "last_checked_at": datetime.utcnow().isoformat(),
+                            "total_products_found": (
+                                influencer.get("total_products_found", 0) + saved
+                            ),
+                        }
+                    ).eq("handle", handle).eq("platform", platform).execute,
+                    endpoint="supabase.influencer_watchlist",
+                )
 
-        except Exception as e:
-            result["status"] = "error"
-            result["error"] = str(e)
-            print(f"  ❌ Error processing @{handle}: {e}")
+            except Exception as e:
+                result["status"] = "error"
+                result["error"] = str(e)
+                print(f"  ❌ Error processing @{handle}: {e}")
 
         execution_time = time.time() - start_time
+        stage_timings = {
+            name.split(".", 1)[1]: round(seconds, 3)
+            for name, seconds in stats.timings.items()
+        }
+        stage_timings["supabase_round_trips"] = stats.counters.get("supabase_round_trips", 0)
+        metrics.observe(
+            "influencer_request_supabase_round_trips",
+            stage_timings["supabase_round_trips"],
+            buckets=metrics.COUNT_BUCKETS,
+            route="monster",
+        )
+        metrics.inc("influencer_monster_runs_total", status=result["status"])
 
         # Log the run
+        log_row = {
+            "influencer_handle": handle,
+            "platform": platform,
+            "action": "monitor",
+            "status": result["status"],
+            "products_found": result["products_found"],
+            "products_saved": result["products_saved"],
+            "error_message": result.get("error"),
+            "execution_time_seconds": execution_time,
+            "stage_timings": stage_timings,
+        }
         try:
-            self.supabase.table("processing_logs").insert(
-                {
-                    "influencer_handle": handle,
-                    "platform": platform,
-                    "action": "monitor",
-                    "status": result["status"],
-                    "products_found": result["products_found"],
-                    "products_saved": result["products_saved"],
-                    "error_message": result.get("error"),
-                    "execution_time_seconds": execution_time,
-                }
-            ).execute()
+            try:
+                self._insert_processing_log(log_row)
+            except Exception as e:
+                # stage_timings needs migrations/add_stage_timings.sql
+                if not _is_missing_column(e):
+                    raise
+                log_row.pop("stage_timings")
+                self._insert_processing_log(log_row)
         except Exception as log_err:
             print(f"  ⚠️ Failed to write log: {log_err}")
 
@@ -230,6 +323,13 @@ Return ONLY JSON array. If no products: []"""
         )
         return result
 
+    def _insert_processing_log(self, row: dict) -> None:
+        call(
+            "supabase",
+            self.supabase.table("processing_logs").insert(row).execute,
+            endpoint="supabase.processing_logs",
+        )
+
     # ── Run a full monitoring cycle ────────────────────────────────────────────
 
     def run_monitoring_cycle(self):
@@ -252,11 +352,18 @@ Return ONLY JSON array. If no products: []"""
 
         print(f"👀 Monitoring {len(watchlist)} influencers")
 
-        for influencer in watchlist:
-            self.process_influencer(influencer)
-            time.sleep(5)  # Polite delay between influencers
+        cycle_saved = 0
+        for i, influencer in enumerate(watchlist):
+            metrics.set_gauge("influencer_queue_depth", len(watchlist) - i, queue="monster_cycle")
+            cycle_saved += self.process_influencer(influencer)["products_saved"]
+            time.sleep(INFLUENCER_DELAY)
+        metrics.set_gauge("influencer_queue_depth", 0, queue="monster_cycle")
+        metrics.set_gauge("influencer_monster_last_cycle_products_saved", cycle_saved)
+        metrics.set_gauge("influencer_monster_last_cycle_timestamp_seconds", time.time())
 
         print(f"\n✅ MONSTER CYCLE COMPLETE: {datetime.utcnow().isoformat()}")
+        print("⏱️ Stage timings so far:")
+        print(telemetry.format_summary())
 
     # ── Main loop ──────────────────────────────────────────────────────────────
 
@@ -291,5 +398,8 @@ Return ONLY JSON array. If no products: []"""
 
 
 if __name__ == "__main__":
+    metrics_port = int(os.getenv("MONSTER_METRICS_PORT", 0))
+    if metrics_port:
+        metrics.serve(metrics_port)
     monster = Monster()
     monster.start()
@@ -2,19 +2,35 @@
 Script 1: Scrape TikTok videos from influencers listed in influencers.json.
 
 Usage:
-    python 1_scrape_tiktok.py
+    python 1_scrape_tiktok.py [--sessions N]
 
 Requires:
     TIKTOK_SESSION_ID  (optional, improves reliability)
     VIDEO_LIMIT_PER_INFLUENCER  (default: 10)
+    TIKTOK_SESSIONS  (default: 3) — browser sessions scraping in parallel
+    MS_TOKEN  (optional; comma-separated for one token per session)
+
+Influencers are scraped concurrently, one per session at a time. A session
+that errors goes to the back of the pool and the influencer is retried on the
+next one, so a single blocked session doesn't lose the handle.
+
+Writes data/tiktok_videos.jsonl one influencer at a time, so script 3 can
+start on it before the scrape finishes.
 """
 
+import argparse
 import json
 import os
 import asyncio
+import sys
+import time
 from pathlib import Path
+from typing import Optional
 from dotenv import load_dotenv
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # backend/, for `core`
+from core import DEFAULT_RETRY, deadletter, jsonl
+
 load_dotenv()
 
 # ── Config ────────────────────────────────────────────────────────────────────
@@ -23,54 +39,92 @@ DATA_DIR = ROOT_DIR / "data"
 DATA_DIR.mkdir(exist_ok=True)
 
 INFLUENCERS_FILE = ROOT_DIR / "influencers.json"
-OUTPUT_FILE = DATA_DIR / "tiktok_videos.json"
+OUTPUT_FILE = DATA_DIR / "tiktok_videos.jsonl"
 
 VIDEO_LIMIT = int(os.getenv("VIDEO_LIMIT_PER_INFLUENCER", 10))
 SESSION_ID = os.getenv("TIKTOK_SESSION_ID", "")
+TIKTOK_SESSIONS = int(os.getenv("TIKTOK_SESSIONS", 3))
+
+
+async def _fetch_videos(api, influencer: dict, session_index: Optional[int] = None) -> list[dict]:
+    """Fetch up to VIDEO_LIMIT videos for one influencer; raises on any scraping error."""
+    handle = influencer["tiktok"]
+    kwargs = {} if session_index is None else {"session_index": session_index}
+    videos = []
+    user = api.user(username=handle)
+    async for video in user.videos(count=VIDEO_LIMIT, **kwargs):
+        video_data = video.as_dict
+        caption = ""
+
+        # Prefer auto-generated captions when available
+        if video_data.get("textExtra"):
+            caption = " ".join(
+                t.get("hashtagName", "") or t.get("userUniqueId", "")
+                for t in video_data["textExtra"]
+                if t.get("hashtagName") or t.get("userUniqueId")
+            )
+        if not caption:
+            caption = video_data.get("desc", "")
+
+        videos.append(
+            {
+                "id": video_data.get("id"),
+                "influencer": influencer["name"],
+                "platform": "tiktok",
+                "url": f"https://www.tiktok.com/@{handle}/video/{video_data.get('id')}",
+                "caption": caption,
+                "has_caption": bool(caption),
+            }
+        )
+    return videos
 
 
-async def scrape_influencer(api, influencer: dict) -> list[dict]:
+async def scrape_influencer(api, influencer: dict, session_index: Optional[int] = None) -> list[dict]:
     """Fetch up to VIDEO_LIMIT videos for one influencer."""
-    handle = influencer.get("tiktok", "")
-    if not handle:
+    if not influencer.get("tiktok"):
         print(f"  [SKIP] {influencer['name']} — no TikTok handle")
         return []
 
-    videos = []
     try:
-        user = api.user(username=handle)
-        async for video in user.videos(count=VIDEO_LIMIT):
-            video_data = video.as_dict
-            caption = ""
-
-            # Prefer auto-generated captions when available
-            if video_data.get("textExtra"):
-                caption = " ".join(
-                    t.get("hashtagName", "") or t.get("userUniqueId", "")
-                    for t in video_data["textExtra"]
-                    if t.get("hashtagName") or t.get("userUniqueId")
-                )
-            if not caption:
-                caption = video_data.get("desc", "")
-
-            videos.append(
-                {
-                    "id": video_data.get("id"),
-                    "influencer": influencer["name"],
-                    "platform": "tiktok",
-                    "url": f"https://www.tiktok.com/@{handle}/video/{video_data.get('id')}",
-                    "caption": caption,
-                    "has_caption": bool(caption),
-                }
-            )
+        videos = await _fetch_videos(api, influencer, session_index)
         print(f"  [OK]   {influencer['name']} — {len(videos)} videos")
+        return videos
     except Exception as exc:
         print(f"  [ERR]  {influencer['name']} — {exc}")
+        return []
 
-    return videos
 
+async def scrape_rotating(api, influencer: dict, free: asyncio.Queue, attempts: int) -> list[dict]:
+    """Scrape one influencer on the next free session, moving to another session on errors.
 
-async def main():
+    `free` holds the indices of idle sessions, so it also caps how many
+    influencers are in flight. A failed session goes back to the end of the
+    queue; after `attempts` failures the influencer is dead-lettered.
+    """
+    if not influencer.get("tiktok"):
+        print(f"  [SKIP] {influencer['name']} — no TikTok handle")
+        return []
+
+    for attempt in range(1, attempts + 1):
+        index = await free.get()
+        try:
+            videos = await _fetch_videos(api, influencer, index)
+            print(f"  [OK]   {influencer['name']} — {len(videos)} videos (session {index})")
+            return videos
+        except Exception as exc:
+            error = exc
+            print(f"  [WARN] {influencer['name']} — session {index} failed ({attempt}/{attempts}): {exc}")
+        finally:
+            free.put_nowait(index)
+        if attempt < attempts:
+            await asyncio.sleep(DEFAULT_RETRY.delay(attempt, error))
+
+    print(f"  [ERR]  {influencer['name']} — giving up after {attempts} attempts")
+    deadletter.record("tiktok_scrape", influencer, error)
+    return []
+
+
+async def main(sessions: int = TIKTOK_SESSIONS):
     try:
         from TikTokApi import TikTokApi
     except ImportError:
@@ -84,27 +138,33 @@ async def main():
     with open(INFLUENCERS_FILE) as f:
         influencers = json.load(f)
 
-    print(f"Loaded {len(influencers)} influencers\n")
+    print(f"Loaded {len(influencers)} influencers, scraping with {sessions} session(s)\n")
 
-    all_videos: list[dict] = []
+    ms_tokens = [t.strip() for t in os.getenv("MS_TOKEN", "").split(",") if t.strip()]  # optional browser cookies
+    start = time.perf_counter()
+    with jsonl.Writer(OUTPUT_FILE) as out:
+        async with TikTokApi() as api:
+            await api.create_sessions(
+                ms_tokens=ms_tokens or None,
+                num_sessions=sessions,
+                sleep_after=3,
+            )
+            opened = len(getattr(api, "sessions", [])) or sessions
+            free: asyncio.Queue = asyncio.Queue()
+            for index in range(opened):
+                free.put_nowait(index)
+            attempts = min(max(opened, 2), DEFAULT_RETRY.attempts)
 
-    ms_token = os.getenv("MS_TOKEN", "")  # optional browser cookie
-    async with TikTokApi() as api:
-        await api.create_sessions(
-            ms_tokens=[ms_token] if ms_token else None,
-            num_sessions=1,
-            sleep_after=3,
-        )
-        for influencer in influencers:
-            print(f"→ {influencer['name']} (@{influencer.get('tiktok', 'N/A')})")
-            videos = await scrape_influencer(api, influencer)
-            all_videos.extend(videos)
+            async def scrape_one(influencer: dict) -> None:
+                out.write_many(await scrape_rotating(api, influencer, free, attempts))
 
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(all_videos, f, ensure_ascii=False, indent=2)
+            await asyncio.gather(*(scrape_one(influencer) for influencer in influencers))
 
-    print(f"\n✅ Saved {len(all_videos)} videos to {OUTPUT_FILE}")
+    print(f"\n✅ Saved {out.count} videos to {OUTPUT_FILE} in {time.perf_counter() - start:.1f}s")
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    parser = argparse.ArgumentParser(description="Scrape TikTok videos")
+    parser.add_argument("--sessions", type=int, default=TIKTOK_SESSIONS, help="parallel TikTok sessions")
+    args = parser.parse_args()
+    asyncio.run(main(max(1, args.sessions)))
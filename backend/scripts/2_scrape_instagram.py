@@ -2,21 +2,41 @@
 Script 2: Scrape Instagram reels from influencers listed in influencers.json.
 
 Usage:
-    python 2_scrape_instagram.py
+    python 2_scrape_instagram.py [--download-workers N]
 
 Requires:
     INSTA_USERNAME
     INSTA_PASSWORD
     VIDEO_LIMIT_PER_INFLUENCER  (default: 10)
+    INSTA_ACCOUNTS  (optional) — extra "user:password,user:password" logins
+    INSTAGRAM_RPM  (default: 3) — GraphQL requests per minute per account
 
 Note: Create a throwaway Instagram account. Do NOT use your personal account.
+
+Instaloader only collects post metadata, one profile at a time per logged-in
+account; every query an account makes first takes a token from that account's
+bucket, on top of Instaloader's own backoff, so adding accounts adds
+throughput without any one of them going over Instagram's limits. Each
+profile's reel files are then fetched by a download thread pool
+(`core.download`, resuming partial files on a re-run) while the next profiles
+are being enumerated, and their records appended to
+data/instagram_videos.jsonl.
 """
 
+import argparse
 import json
 import os
+import queue
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from dotenv import load_dotenv
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # backend/, for `core`
+from core import RateLimiter, jsonl
+from core.download import download_all
+
 load_dotenv()
 
 # ── Config ────────────────────────────────────────────────────────────────────
@@ -25,15 +45,56 @@ DATA_DIR = ROOT_DIR / "data" / "instagram"
 DATA_DIR.mkdir(parents=True, exist_ok=True)
 
 INFLUENCERS_FILE = ROOT_DIR / "influencers.json"
-OUTPUT_FILE = ROOT_DIR / "data" / "instagram_videos.json"
+OUTPUT_FILE = ROOT_DIR / "data" / "instagram_videos.jsonl"
 
 VIDEO_LIMIT = int(os.getenv("VIDEO_LIMIT_PER_INFLUENCER", 10))
 INSTA_USERNAME = os.getenv("INSTA_USERNAME", "")
 INSTA_PASSWORD = os.getenv("INSTA_PASSWORD", "")
+INSTA_ACCOUNTS = os.getenv("INSTA_ACCOUNTS", "")
+# Instagram starts answering 429 at roughly 200 GraphQL queries an hour per account.
+INSTAGRAM_RPM = float(os.getenv("INSTAGRAM_RPM", 3))
+DOWNLOAD_WORKERS = int(os.getenv("INSTA_DOWNLOAD_WORKERS", 2))
+
+
+def accounts() -> list[tuple[str, str]]:
+    """(username, password) for INSTA_USERNAME plus every INSTA_ACCOUNTS entry."""
+    found = [(INSTA_USERNAME, INSTA_PASSWORD)] if INSTA_USERNAME and INSTA_PASSWORD else []
+    for entry in filter(None, (e.strip() for e in INSTA_ACCOUNTS.split(","))):
+        username, _, password = entry.partition(":")
+        if username and password and username not in {u for u, _ in found}:
+            found.append((username, password))
+    return found
+
+
+# ── Rate limiting ─────────────────────────────────────────────────────────────
+
+_limiters: dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def account_limiter(username: str) -> RateLimiter:
+    """The token bucket for one Instagram account, shared by every loader logged in as it."""
+    with _limiters_lock:
+        if username not in _limiters:
+            rate = INSTAGRAM_RPM / 60.0
+            _limiters[username] = RateLimiter(rate=rate, capacity=max(1.0, rate * 20))
+        return _limiters[username]
+
+
+def _rate_controller(limiter: RateLimiter):
+    """An Instaloader RateController factory that also draws from `limiter`."""
+    import instaloader
+
+    class AccountRateController(instaloader.RateController):
+        def wait_before_query(self, query_type: str) -> None:
+            limiter.acquire()
+            super().wait_before_query(query_type)
+
+    return AccountRateController
 
 
 def scrape_influencer(loader, influencer: dict) -> list[dict]:
-    """Download reels and return metadata list for one influencer."""
+    """Return reel metadata (including `video_url`) for one influencer."""
     import instaloader
 
     handle = influencer.get("instagram", "")
@@ -51,21 +112,16 @@ def scrape_influencer(loader, influencer: dict) -> list[dict]:
             if not post.is_video:
                 continue
 
-            # Download video file
-            try:
-                loader.download_post(post, target=str(DATA_DIR / handle))
-            except Exception as dl_err:
-                print(f"    [WARN] Could not download video: {dl_err}")
-
             videos.append(
                 {
                     "shortcode": post.shortcode,
-                    "influencer": sarahhany["name"],
+                    "influencer": influencer["name"],
                     "platform": "instagram",
                     "url": f"https://www.instagram.com/p/{post.shortcode}/",
                     "caption": post.caption or "",
                     "has_caption": bool(post.caption),
                     "local_path": str(DATA_DIR / handle / f"{post.date_utc:%Y-%m-%d_%H-%M-%S}_UTC.mp4"),
+                    "video_url": post.video_url,
                 }
             )
             count += 1
@@ -77,20 +133,9 @@ def scrape_influencer(loader, influencer: dict) -> list[dict]:
     return videos
 
 
-def main():
-    try:
-        import instaloader
-    except ImportError:
-        print("[ERROR] instaloader not installed. Run: pip install instaloader")
-        return
-
-    if not INSTA_USERNAME or not INSTA_PASSWORD:
-        print("[ERROR] Set INSTA_USERNAME and INSTA_PASSWORD in your .env file")
-        return
-
-    print("=" * 60)
-    print("Step 2: Scraping Instagram reels")
-    print("=" * 60)
+def make_loader(username: str = INSTA_USERNAME, password: str = INSTA_PASSWORD):
+    """A logged-in, rate-limited Instaloader; raises if the login fails."""
+    import instaloader
 
     loader = instaloader.Instaloader(
         download_videos=True,
@@ -100,32 +145,81 @@ def main():
         save_metadata=False,
         compress_json=False,
         quiet=True,
+        rate_controller=_rate_controller(account_limiter(username)),
     )
+    loader.login(username, password)
+    return loader
+
 
-    print(f"Logging in as @{INSTA_USERNAME} …")
+def main(download_workers: int = DOWNLOAD_WORKERS):
     try:
-        loader.login(INSTA_USERNAME, INSTA_PASSWORD)
-        print("Login successful\n")
-    except Exception as exc:
-        print(f"[ERROR] Login failed: {exc}")
+        import instaloader  # noqa: F401
+    except ImportError:
+        print("[ERROR] instaloader not installed. Run: pip install instaloader")
         return
 
+    logins = accounts()
+    if not logins:
+        print("[ERROR] Set INSTA_USERNAME and INSTA_PASSWORD in your .env file")
+        return
+
+    print("=" * 60)
+    print("Step 2: Scraping Instagram reels")
+    print("=" * 60)
+
+    loaders = []
+    for username, password in logins:
+        print(f"Logging in as @{username} …")
+        try:
+            loaders.append(make_loader(username, password))
+        except Exception as exc:
+            print(f"[WARN] Login failed for @{username}: {exc}")
+    if not loaders:
+        print("[ERROR] No Instagram account could log in")
+        return
+    print(f"Logged in with {len(loaders)} account(s), {INSTAGRAM_RPM:g} requests/min each\n")
+
     with open(INFLUENCERS_FILE) as f:
         influencers = json.load(f)
 
     print(f"Loaded {len(influencers)} influencers\n")
 
-    all_videos: list[dict] = []
+    todo: queue.Queue = queue.Queue()
     for influencer in influencers:
-        print(f"→ {influencer['name']} (@{influencer.get('instagram', 'N/A')})")
-        videos = scrape_influencer(loader, influencer)
-        all_videos.extend(videos)
+        todo.put(influencer)
+
+    with jsonl.Writer(OUTPUT_FILE) as out, ThreadPoolExecutor(download_workers) as downloads:
+
+        def fetch_reels(influencer: dict, videos: list[dict]) -> None:
+            jobs = [(v["video_url"], Path(v["local_path"])) for v in videos if v.get("video_url")]
+            for r in download_all(jobs):
+                if not r.ok:
+                    print(f"    [WARN] Could not download {r.path.name}: {r.error}")
+            out.write_many(videos)
+            print(f"  [DL]   {influencer['name']} — {len(jobs)} reels fetched")
+
+        def enumerate_profiles(loader) -> list:
+            pending = []
+            while True:
+                try:
+                    influencer = todo.get_nowait()
+                except queue.Empty:
+                    return pending
+                print(f"→ {influencer['name']} (@{influencer.get('instagram', 'N/A')})")
+                videos = scrape_influencer(loader, influencer)
+                pending.append(downloads.submit(fetch_reels, influencer, videos))
 
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(all_videos, f, ensure_ascii=False, indent=2)
+        with ThreadPoolExecutor(len(loaders)) as scrapers:
+            batches = list(scrapers.map(enumerate_profiles, loaders))
+        for future in (f for batch in batches for f in batch):
+            future.result()
 
-    print(f"\n✅ Saved {len(all_videos)} reels to {OUTPUT_FILE}")
+    print(f"\n✅ Saved {out.count} reels to {OUTPUT_FILE}")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Scrape Instagram reels")
+    parser.add_argument("--download-workers", type=int, default=DOWNLOAD_WORKERS,
+                        help="profiles whose reels are downloaded at the same time")
+    args = parser.parse_args()
+    main(max(1, args.download_workers))
@@ -2,22 +2,44 @@
 Script 3: Transcribe videos that don't already have captions.
 
 Usage:
-    python 3_transcribe.py
+    python 3_transcribe.py [--workers N] [--threads N] [--fresh]
 
 For videos scraped from TikTok that already have captions this script is a
 no-op (it just copies the existing caption text).  For Instagram videos (or
-TikTok videos without captions) it uses OpenAI Whisper to transcribe.
+TikTok videos without captions) it uses OpenAI Whisper to transcribe. The
+soundtrack is first cut down to its speech (`core.audio`), so Whisper doesn't
+spend time on silence or music.
+
+With --workers > 1 the videos are shared out to a pool of processes, each of
+which loads the model once and runs it on --threads CPU threads. Every
+finished transcript is committed to the transcript store (`core.transcripts`,
+keyed by platform, video id, model and language), so re-runs only transcribe
+new videos and an interrupted run picks up where it stopped. --fresh forgets
+the stored transcripts for the current model. Videos Whisper fails on are
+dead-lettered instead of written, and tried again on the next run.
+
+Reads data/tiktok_videos.jsonl and data/instagram_videos.jsonl and writes
+data/transcripts.jsonl record by record, so script 4 can follow it.
 
 Requires:
     openai-whisper  (pip install openai-whisper)
     ffmpeg          (system package)
 """
 
-import json
+import argparse
+import multiprocessing
 import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
+from typing import Optional
+
 from dotenv import load_dotenv
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # backend/, for `core`
+from core import TranscriptStore, audio, deadletter, jsonl
+
 load_dotenv()
 
 # ── Config ────────────────────────────────────────────────────────────────────
@@ -25,107 +47,177 @@ ROOT_DIR = Path(__file__).resolve().parents[2]
 DATA_DIR = ROOT_DIR / "data"
 DATA_DIR.mkdir(exist_ok=True)
 
-TIKTOK_FILE = DATA_DIR / "tiktok_videos.json"
-INSTAGRAM_FILE = DATA_DIR / "instagram_videos.json"
-OUTPUT_FILE = DATA_DIR / "transcripts.json"
+TIKTOK_FILE = DATA_DIR / "tiktok_videos.jsonl"
+INSTAGRAM_FILE = DATA_DIR / "instagram_videos.jsonl"
+OUTPUT_FILE = DATA_DIR / "transcripts.jsonl"
 
 WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")  # tiny / base / small / medium / large
+WHISPER_WORKERS = int(os.getenv("WHISPER_WORKERS", 1))
+WHISPER_THREADS = int(os.getenv("WHISPER_THREADS", 0))  # 0 = CPU count / workers
+STORE_MODEL = f"openai-whisper/{WHISPER_MODEL}"
+STORE_LANGUAGE = "auto"
+
+_model = None  # one per worker process, loaded by _init_worker
+
 
+def _init_worker(model_name: str, threads: int) -> None:
+    """Load Whisper once per process and pin its CPU thread count."""
+    global _model
+    import torch
+    import whisper
+
+    if threads:
+        torch.set_num_threads(threads)
+    _model = whisper.load_model(model_name)
+
+
+def transcribe_video(video_path: str) -> tuple[Optional[str], float]:
+    """Run Whisper on a local video file; return (transcript or None on failure, source audio seconds)."""
+    import whisper
 
-def transcribe_video(model, video_path: str) -> str:
-    """Run Whisper on a local video file and return the transcript."""
     try:
-        result = model.transcribe(video_path, language=None)  # auto-detect Arabic/English
-        return result.get("text", "").strip()
+        source_path, seconds = video_path, None
+        if audio.available():
+            prepared = audio.prepare(video_path, "wav")
+            if prepared.empty:
+                return "", prepared.source_seconds
+            source_path, seconds = str(prepared.path), prepared.source_seconds
+        samples = whisper.load_audio(source_path)
+        if seconds is None:
+            seconds = len(samples) / whisper.audio.SAMPLE_RATE
+        result = _model.transcribe(samples, language=None)  # auto-detect Arabic/English
+        return result.get("text", "").strip(), seconds
     except Exception as exc:
         print(f"    [WARN] Whisper failed for {video_path}: {exc}")
-        return ""
+        return None, 0.0
+
+
+def _record(v: dict, text: str, source: str) -> dict:
+    return {
+        "id": v.get("id") or v.get("shortcode"),
+        "influencer": v["influencer"],
+        "platform": v["platform"],
+        "url": v.get("url", ""),
+        "transcript": text,
+        "source": source,
+    }
+
+
+def _video_id(v: dict) -> str:
+    return str(v.get("id") or v.get("shortcode"))
+
+
+def run_whisper(videos: list[dict], workers: int, threads: int, store: TranscriptStore, out: jsonl.Writer) -> None:
+    """Transcribe `videos`, committing each result to `store` and `out` as it finishes."""
+    if not threads:
+        threads = max(1, (os.cpu_count() or 1) // workers)
+    print(f"Loading Whisper model '{WHISPER_MODEL}' in {workers} worker(s) × {threads} thread(s) …")
+    if not audio.available():
+        print("[WARN] ffmpeg not found — Whisper gets the whole video, without silence trimming")
+
+    finished = 0
+    audio_seconds = 0.0
+    start = time.perf_counter()
+
+    def finish(i: int, v: dict, text: Optional[str], seconds: float) -> None:
+        nonlocal finished, audio_seconds
+        if text is None:
+            # Not written to the store or transcripts.jsonl, so the next run retries it
+            deadletter.record("transcribe", v, RuntimeError(f"Whisper failed for {v['local_path']}"))
+            return
+        print(f"[{i}/{len(videos)}] {v['influencer']} — {len(text)} chars, {seconds:.0f}s audio")
+        out.write(_record(v, text, "whisper"))
+        finished += 1
+        audio_seconds += seconds
+        store.put(v["platform"], _video_id(v), STORE_MODEL, STORE_LANGUAGE, text, "whisper", seconds)
+
+    if workers == 1:
+        _init_worker(WHISPER_MODEL, threads)
+        print("Model loaded\n")
+        for i, v in enumerate(videos, 1):
+            finish(i, v, *transcribe_video(v["local_path"]))
+    else:
+        # spawn, not fork: torch's thread pools don't survive a fork
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(
+            workers, mp_context=context, initializer=_init_worker, initargs=(WHISPER_MODEL, threads)
+        ) as pool:
+            futures = {pool.submit(transcribe_video, v["local_path"]): v for v in videos}
+            for i, future in enumerate(as_completed(futures), 1):
+                finish(i, futures[future], *future.result())
+
+    wall = time.perf_counter() - start
+    if finished:
+        print(
+            f"\n⏱️  {audio_seconds / 60:.1f} min of audio in {wall:.1f}s "
+            f"({audio_seconds / wall if wall else 0:.1f} audio-s per wall-s, {workers} worker(s))"
+        )
 
 
-def main():
+def main(workers: int = WHISPER_WORKERS, threads: int = WHISPER_THREADS, fresh: bool = False):
     print("=" * 60)
     print("Step 3: Transcribing videos")
     print("=" * 60)
 
-    # Collect all video records
-    all_videos: list[dict] = []
-
-    if TIKTOK_FILE.exists():
-        with open(TIKTOK_FILE) as f:
-            all_videos.extend(json.load(f))
-        print(f"Loaded {len(all_videos)} TikTok records")
-    else:
-        print("[WARN] No tiktok_videos.json found — run script 1 first")
-
-    if INSTAGRAM_FILE.exists():
-        with open(INSTAGRAM_FILE) as f:
-            insta = json.load(f)
-        all_videos.extend(insta)
-        print(f"Loaded {len(insta)} Instagram records")
-
-    if not all_videos:
-        print("[ERROR] No video records found. Run scripts 1 and/or 2 first.")
-        return
-
-    # Separate videos that already have captions from those that need Whisper
-    with_caption = [v for v in all_videos if v.get("has_caption") and v.get("caption")]
-    needs_transcription = [v for v in all_videos if not (v.get("has_caption") and v.get("caption"))]
-
-    print(f"\n{len(with_caption)} videos already have captions (no transcription needed)")
-    print(f"{len(needs_transcription)} videos need transcription\n")
-
-    transcripts: list[dict] = []
-
-    # Copy over existing captions
-    for v in with_caption:
-        transcripts.append(
-            {
-                "id": v.get("id") or v.get("shortcode"),
-                "influencer": v["influencer"],
-                "platform": v["platform"],
-                "url": v.get("url", ""),
-                "transcript": v["caption"],
-                "source": "caption",
-            }
-        )
-
-    # Transcribe remaining videos with Whisper
-    if needs_transcription:
-        try:
-            import whisper
-        except ImportError:
-            print("[ERROR] openai-whisper not installed. Run: pip install openai-whisper")
-            print("Saving only captioned videos …")
-        else:
-            print(f"Loading Whisper model '{WHISPER_MODEL}' …")
-            model = whisper.load_model(WHISPER_MODEL)
-            print("Model loaded\n")
-
-            for i, v in enumerate(needs_transcription, 1):
-                local_path = v.get("local_path", "")
-                print(f"[{i}/{len(needs_transcription)}] Transcribing {v['influencer']} — {local_path}")
-
-                if not local_path or not Path(local_path).exists():
-                    print("    [SKIP] Video file not found")
+    store = TranscriptStore()
+    if fresh:
+        print(f"🧹 Forgot {store.delete(STORE_MODEL, STORE_LANGUAGE)} stored {STORE_MODEL} transcripts")
+
+    # Captions and earlier transcripts are written straight away; the rest
+    # (metadata only) wait for Whisper.
+    counts = {"tiktok": 0, "instagram": 0, "caption": 0, "reused": 0}
+    pending: list[dict] = []
+    with jsonl.Writer(OUTPUT_FILE) as out:
+        for platform, path in (("tiktok", TIKTOK_FILE), ("instagram", INSTAGRAM_FILE)):
+            if not path.exists() and not path.with_suffix(".json").exists():
+                if platform == "tiktok":
+                    print("[WARN] No tiktok_videos.jsonl found — run script 1 first")
+                continue
+            for v in jsonl.read_records(path):
+                counts[platform] += 1
+                if v.get("has_caption") and v.get("caption"):
+                    out.write(_record(v, v["caption"], "caption"))
+                    counts["caption"] += 1
                     continue
-
-                text = transcribe_video(model, local_path)
-                transcripts.append(
-                    {
-                        "id": v.get("id") or v.get("shortcode"),
-                        "influencer": v["influencer"],
-                        "platform": v["platform"],
-                        "url": v.get("url", ""),
-                        "transcript": text,
-                        "source": "whisper",
-                    }
-                )
-
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(transcripts, f, ensure_ascii=False, indent=2)
-
-    print(f"\n✅ Saved {len(transcripts)} transcripts to {OUTPUT_FILE}")
+                previous = store.get(v["platform"], _video_id(v), STORE_MODEL, STORE_LANGUAGE)
+                local_path = v.get("local_path", "")
+                if previous:
+                    out.write(_record(v, previous["text"], "whisper"))
+                    counts["reused"] += 1
+                elif not local_path or not Path(local_path).exists():
+                    print(f"    [SKIP] Video file not found for {v['influencer']} — {local_path}")
+                else:
+                    pending.append(v)
+
+        print(f"Loaded {counts['tiktok']} TikTok and {counts['instagram']} Instagram records")
+        if not counts["tiktok"] and not counts["instagram"]:
+            print("[ERROR] No video records found. Run scripts 1 and/or 2 first.")
+            store.close()
+            return
+
+        print(f"\n{counts['caption']} videos already have captions (no transcription needed)")
+        if counts["reused"]:
+            print(f"↻ {counts['reused']} already transcribed in an earlier run")
+        print(f"{len(pending)} videos need transcription\n")
+
+        # Transcribe remaining videos with Whisper
+        if pending:
+            try:
+                import whisper  # noqa: F401
+            except ImportError:
+                print("[ERROR] openai-whisper not installed. Run: pip install openai-whisper")
+                print("Saving only captioned videos …")
+            else:
+                run_whisper(pending, max(1, workers), threads, store, out)
+    store.close()
+
+    print(f"\n✅ Saved {out.count} transcripts to {OUTPUT_FILE}")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Transcribe videos without captions")
+    parser.add_argument("--workers", type=int, default=WHISPER_WORKERS, help="Whisper processes (WHISPER_WORKERS)")
+    parser.add_argument("--threads", type=int, default=WHISPER_THREADS, help="CPU threads per process (WHISPER_THREADS)")
+    parser.add_argument("--fresh", action="store_true", help="forget stored transcripts for this model and start over")
+    args = parser.parse_args()
+    main(args.workers, args.threads, args.fresh)
@@ -2,17 +2,25 @@
 Script 4: Extract product mentions from transcripts using Groq AI.
 
 Usage:
-    python 4_extract_products.py
+    python 4_extract_products.py [--follow]
+
+Reads data/transcripts.jsonl and appends each transcript's products to
+data/products.jsonl as soon as they're extracted. With --follow it starts on
+a transcripts file that script 3 is still writing and waits for it to finish.
 
 Requires:
     GROQ_API_KEY  (get free key at https://console.groq.com)
 """
 
-import json
+import argparse
 import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # backend/, for `core`
+from core import call, deadletter, get_groq, jsonl, llmjson, prompts
+
 load_dotenv()
 
 # ── Config ────────────────────────────────────────────────────────────────────
@@ -20,8 +28,8 @@ ROOT_DIR = Path(__file__).resolve().parents[2]
 DATA_DIR = ROOT_DIR / "data"
 DATA_DIR.mkdir(exist_ok=True)
 
-TRANSCRIPTS_FILE = DATA_DIR / "processed" / "transcriptions.json"
-OUTPUT_FILE = DATA_DIR / "products.json"
+TRANSCRIPTS_FILE = DATA_DIR / "transcripts.jsonl"
+OUTPUT_FILE = DATA_DIR / "products.jsonl"
 
 GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
 GROQ_MODEL = "llama-3.1-70b-versatile"
@@ -49,6 +57,7 @@ def extract_products(client, transcript: dict) -> list[dict]:
     text = transcript.get("transcript", "").strip()
     if not text or len(text) < 20:
         return []
+    text = prompts.clean_caption(text, prompts.LLM_PROMPT_BUDGET)
 
     user_prompt = f"""Extract all products mentioned in this video transcript from influencer {transcript['influencer']}:
 
@@ -58,28 +67,23 @@ def extract_products(client, transcript: dict) -> list[dict]:
 
 Return a JSON array of products."""
 
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": user_prompt},
+    ]
+    prompts.measure("groq.chat.transcript", messages)
+
     try:
-        response = client.chat.completions.create(
+        response = call(
+            "groq",
+            client.chat.completions.create,
+            endpoint="groq.chat",
             model=GROQ_MODEL,
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": user_prompt},
-            ],
             temperature=0.1,
             max_tokens=1024,
+            **llmjson.request(messages, wrap="products"),
         )
-        raw = response.choices[0].message.content.strip()
-
-        # Strip markdown code fences if present
-        if raw.startswith("```"):
-            raw = raw.split("```")[1]
-            if raw.startswith("json"):
-                raw = raw[4:]
-        raw = raw.strip()
-
-        products = json.loads(raw)
-        if not isinstance(products, list):
-            return []
+        products = llmjson.read_array(response, "groq.chat.transcript")
 
         # Attach metadata to each product
         enriched = []
@@ -99,52 +103,42 @@ Return a JSON array of products."""
             )
         return enriched
 
-    except json.JSONDecodeError as exc:
+    except ValueError as exc:  # JSON too broken to recover a single object
         print(f"    [WARN] JSON parse error: {exc}")
+        deadletter.record("transcript_extract", transcript, exc)
         return []
     except Exception as exc:
         print(f"    [WARN] API error: {exc}")
+        deadletter.record("transcript_extract", transcript, exc)
         return []
 
 
-def main():
+def main(follow: bool = False):
     if not GROQ_API_KEY:
         print("[ERROR] GROQ_API_KEY not set in .env file")
         return
 
-    try:
-        from groq import Groq
-    except ImportError:
-        print("[ERROR] groq not installed. Run: pip install groq")
-        return
-
     print("=" * 60)
     print("Step 4: Extracting products with AI")
     print("=" * 60)
 
-    if not TRANSCRIPTS_FILE.exists():
-        print("[ERROR] transcripts.json not found. Run script 3 first.")
+    if not follow and not TRANSCRIPTS_FILE.exists() and not TRANSCRIPTS_FILE.with_suffix(".json").exists():
+        print("[ERROR] transcripts.jsonl not found. Run script 3 first.")
         return
 
-    with open(TRANSCRIPTS_FILE) as f:
-        transcripts = json.load(f)
-
-    print(f"Loaded {len(transcripts)} transcripts\n")
-
-    client = Groq(api_key=GROQ_API_KEY)
-    all_products: list[dict] = []
-
-    for i, transcript in enumerate(transcripts, 1):
-        print(f"[{i}/{len(transcripts)}] Processing {transcript['influencer']} — {transcript['url']}")
-        products = extract_products(client, transcript)
-        print(f"    Found {len(products)} product(s)")
-        all_products.extend(products)
-
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(all_products, f, ensure_ascii=False, indent=2)
+    client = get_groq()
+    i = 0
+    with jsonl.Writer(OUTPUT_FILE) as out:
+        for i, transcript in enumerate(jsonl.read_records(TRANSCRIPTS_FILE, follow=follow), 1):
+            print(f"[{i}] Processing {transcript['influencer']} — {transcript['url']}")
+            products = extract_products(client, transcript)
+            print(f"    Found {len(products)} product(s)")
+            out.write_many(products)
 
-    print(f"\n✅ Saved {len(all_products)} products to {OUTPUT_FILE}")
+    print(f"\n✅ Saved {out.count} products from {i} transcripts to {OUTPUT_FILE}")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Extract products from transcripts")
+    parser.add_argument("--follow", action="store_true", help="keep reading until script 3 finishes")
+    main(parser.parse_args().follow)
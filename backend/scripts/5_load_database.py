@@ -2,18 +2,31 @@
 Script 5: Load influencers and products into Supabase.
 
 Usage:
-    python 5_load_database.py
+    python 5_load_database.py [--follow] [--chunk N] [--copy [DSN]]
+
+Streams data/products.jsonl; with --follow it loads products while script 4
+is still extracting them. Products go in `--chunk` at a time (default
+BULK_CHUNK=500) as one multi-row insert plus one for their buy links;
+`--copy [DSN]` streams them into Postgres with COPY instead (DSN defaults to
+DATABASE_URL). Once migrations/products_influencer_id.sql has run, every
+product row carries its `influencer_id`.
 
 Requires:
     SUPABASE_URL
     SUPABASE_KEY
 """
 
+import argparse
 import json
 import os
+import sys
 from pathlib import Path
+from typing import Optional
 from dotenv import load_dotenv
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # backend/, for `core`
+from core import bulkload, call, deadletter, get_supabase, influencers, jsonl
+
 load_dotenv()
 
 # ── Config ────────────────────────────────────────────────────────────────────
@@ -21,16 +34,16 @@ ROOT_DIR = Path(__file__).resolve().parents[2]
 DATA_DIR = ROOT_DIR / "data"
 
 INFLUENCERS_FILE = ROOT_DIR / "influencers.json"
-PRODUCTS_FILE = DATA_DIR / "products.json"
+PRODUCTS_FILE = DATA_DIR / "products.jsonl"
 
 SUPABASE_URL = os.getenv("SUPABASE_URL", "")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY", "")
 
 
 def load_influencers(supabase) -> int:
-    """Upsert influencers from influencers.json into the database."""
+    """Upsert influencers from influencers.json into the database in one request."""
     with open(INFLUENCERS_FILE) as f:
-        influencers = json.load(f)
+        people = json.load(f)
 
     records = [
         {
@@ -39,111 +52,105 @@ def load_influencers(supabase) -> int:
             "tiktok_handle": inf.get("tiktok", ""),
             "platform": "tiktok",
         }
-        for inf in influencers
+        for inf in people
     ]
+    # Optional "aliases" (Arabic spellings, nicknames) need migrations/influencer_aliases.sql.
+    if any(inf.get("aliases") for inf in people):
+        for record, inf in zip(records, people):
+            record["aliases"] = inf.get("aliases", [])
 
-    inserted = 0
-    for record in records:
-        try:
-            supabase.table("influencers").upsert(record, on_conflict="name").execute()
-            inserted += 1
-        except Exception as exc:
-            print(f"  [WARN] Could not insert {record['name']}: {exc}")
-
-    return inserted
-
-
-def load_products(supabase) -> tuple[int, int]:
-    """Insert products (and placeholder buy links) into the database."""
-    if not PRODUCTS_FILE.exists():
-        print("[WARN] products.json not found — run script 4 first")
+    try:
+        call(
+            "supabase",
+            supabase.table("influencers").upsert(records, on_conflict="name").execute,
+            endpoint="supabase.influencers",
+        )
+    except Exception as exc:
+        print(f"  [WARN] Could not upsert influencers: {exc}")
+        return 0
+
+    influencers.invalidate()
+    return len(records)
+
+
+def insert_product(supabase, product: dict) -> tuple[int, int]:
+    """Insert one product and its placeholder buy links; return (products, links) inserted."""
+    row = bulkload.product_row(product, resolve=influencers.resolver(supabase))
+    links = bulkload.placeholder_links(row)
+    insert = bulkload.supabase_insert(supabase)
+    try:
+        insert("products", [row])
+    except Exception as exc:
+        print(f"  [WARN] Could not insert product '{row['product_name']}': {exc}")
+        deadletter.record("products_insert", {"product": row, "buy_links": links}, exc)
         return 0, 0
 
-    with open(PRODUCTS_FILE) as f:
-        products = json.load(f)
-
-    inserted_products = 0
-    inserted_links = 0
-
-    for product in products:
-        try:
-            resp = (
-                supabase.table("products")
-                .insert(
-                    {
-                        "influencer_name": product.get("influencer", ""),
-                        "product_name": product.get("product_name", ""),
-                        "brand": product.get("brand", ""),
-                        "category": product.get("category", "other"),
-                        "quote": product.get("quote", ""),
-                        "video_url": product.get("video_url", ""),
-                        "platform": product.get("platform", "tiktok"),
-                    }
-                )
-                .execute()
-            )
-            product_id = resp.data[0]["id"]
-            inserted_products += 1
-
-            # Add placeholder buy links for Egyptian stores
-            buy_links = [
-                {"store": "Amazon.eg", "url": f"https://www.amazon.eg/s?k={product['product_name'].replace(' ', '+')}", "price": None},
-                {"store": "Noon Egypt", "url": f"https://www.noon.com/egypt-en/search/?q={product['product_name'].replace(' ', '+')}", "price": None},
-                {"store": "Jumia Egypt", "url": f"https://www.jumia.com.eg/catalog/?q={product['product_name'].replace(' ', '+')}", "price": None},
-            ]
-            for link in buy_links:
-                try:
-                    supabase.table("buy_links").insert(
-                        {
-                            "product_id": product_id,
-                            "store": link["store"],
-                            "url": link["url"],
-                            "currency": "EGP",
-                            "in_stock": True,
-                        }
-                    ).execute()
-                    inserted_links += 1
-                except Exception as link_exc:
-                    print(f"  [WARN] Buy link error: {link_exc}")
-
-        except Exception as exc:
-            print(f"  [WARN] Could not insert product '{product.get('product_name')}': {exc}")
-
-    return inserted_products, inserted_links
-
-
-def main():
+    try:
+        insert("buy_links", links)
+    except Exception as exc:
+        print(f"  [WARN] Buy link error: {exc}")
+        for link in links:
+            deadletter.record("buy_links_insert", link, exc)
+        return 1, 0
+
+    return 1, len(links)
+
+
+def load_products(
+    supabase,
+    follow: bool = False,
+    chunk: int = bulkload.BULK_CHUNK,
+    dsn: Optional[str] = None,
+) -> bulkload.LoadStats:
+    """Insert products (and placeholder buy links) in chunks, over PostgREST or COPY to `dsn`."""
+    if not follow and not PRODUCTS_FILE.exists() and not PRODUCTS_FILE.with_suffix(".json").exists():
+        print("[WARN] products.jsonl not found — run script 4 first")
+        return bulkload.LoadStats()
+
+    products = jsonl.read_records(PRODUCTS_FILE, follow=follow)
+    resolve = influencers.resolver(supabase)
+    if dsn:
+        return bulkload.load_copy(products, dsn, chunk, resolve=resolve)
+    return bulkload.load_rest(products, bulkload.supabase_insert(supabase), chunk, resolve=resolve)
+
+
+def main(follow: bool = False, chunk: int = bulkload.BULK_CHUNK, dsn: Optional[str] = None):
     if not SUPABASE_URL or not SUPABASE_KEY:
         print("[ERROR] SUPABASE_URL and SUPABASE_KEY must be set in .env")
         return
 
-    try:
-        from supabase import create_client
-    except ImportError:
-        print("[ERROR] supabase not installed. Run: pip install supabase")
-        return
-
     print("=" * 60)
     print("Step 5: Loading data into Supabase")
     print("=" * 60)
 
     print(f"Connecting to {SUPABASE_URL} …")
-    supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+    supabase = get_supabase()
     print("Connected\n")
 
     print("Loading influencers …")
     n_inf = load_influencers(supabase)
     print(f"  ✅ {n_inf} influencers loaded\n")
 
-    print("Loading products …")
-    n_prod, n_links = load_products(supabase)
-    print(f"  ✅ {n_prod} products loaded")
-    print(f"  ✅ {n_links} buy links loaded\n")
+    print(f"Loading products ({'COPY' if dsn else 'PostgREST'}, {chunk} per chunk) …")
+    stats = load_products(supabase, follow, chunk, dsn)
+    print(f"  ✅ {stats.products} products loaded in {stats.seconds:.1f}s ({stats.rate:.0f}/s)")
+    print(f"  ✅ {stats.links} buy links loaded")
+    if stats.failed:
+        print(f"  ⚠️  {stats.failed} products dead-lettered (replay with replay_dead_letters.py products_insert)")
+    print()
 
     print("=" * 60)
-    print(f"Done! Total: {n_inf} influencers, {n_prod} products, {n_links} buy links")
+    print(f"Done! Total: {n_inf} influencers, {stats.products} products, {stats.links} buy links")
     print("=" * 60)
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Load influencers and products into Supabase")
+    parser.add_argument("--follow", action="store_true", help="keep loading until script 4 finishes")
+    parser.add_argument("--chunk", type=int, default=bulkload.BULK_CHUNK, help="products per insert")
+    parser.add_argument("--copy", nargs="?", const=os.getenv("DATABASE_URL", ""), default=None, metavar="DSN",
+                        help="COPY into Postgres directly (default DSN: DATABASE_URL)")
+    args = parser.parse_args()
+    if args.copy == "":
+        parser.error("--copy needs a DSN or DATABASE_URL")
+    main(args.follow, max(1, args.chunk), args.copy)
@@ -11,23 +11,39 @@ if sys.platform == "win32":
 """
 ONE-COMMAND INFLUENCER SCRAPER
 Usage: python add_influencer.py "sarahhanyofficial" instagram 20
+
+Batch mode - many influencers in one go:
+    python add_influencer.py "handle1,handle2,handle3" instagram 20
+    python add_influencer.py influencers.json tiktok 20 [--workers 8]
+
+Handles are scraped in grouped Apify runs (APIFY_GROUP_SIZE per run), captions
+from all of them are sent to Groq concurrently (--workers, default
+ADD_INFLUENCER_WORKERS) and each influencer's new products and buy links are
+written in bulk. Request pacing comes from the shared rate limiters
+(GROQ_RPM, APIFY_RPM, SUPABASE_RPM), not fixed sleeps.
 """
 
+import argparse
 import json
 import time
 import re  # ✅ NEW - For extracting mentions
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from dotenv import load_dotenv
-from apify_client import ApifyClient
-from supabase import create_client
-from groq import Groq
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # backend/, for `core`
+from core import bulkload, call, deadletter, get_apify, get_groq, get_supabase, influencers, llmjson, prompts
 
 load_dotenv()
 
-# Clients
-apify = ApifyClient(os.getenv("APIFY_API_TOKEN"))
-supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
-groq = Groq(api_key=os.getenv("GROQ_API_KEY"))
+APIFY_GROUP_SIZE = int(os.getenv("APIFY_GROUP_SIZE", 10))  # handles per Apify run
+EXTRACT_WORKERS = int(os.getenv("ADD_INFLUENCER_WORKERS", 4))
+
+# Clients (process-wide, shared with anything else imported from core)
+apify = get_apify()
+supabase = get_supabase()
+groq = get_groq()
 
 # ✅ NEW FUNCTION - Extract @mentions
 def extract_mentions(caption: str):
@@ -72,89 +88,121 @@ def scrape_real_buy_links(product_name: str, brand: str):
     ]
 
 
-def scrape_and_process(username: str, platform: str = "instagram", limit: int = 20):
+def _owner(item: dict, platform: str) -> str:
+    """The (lower-case) handle an Apify item belongs to."""
+    if platform == "instagram":
+        return (item.get("ownerUsername") or "").lower()
+    return ((item.get("authorMeta") or {}).get("name") or "").lstrip("@").lower()
+
+
+def scrape_videos(usernames: list, platform: str = "instagram", limit: int = 20) -> dict:
     """
-    Full pipeline for one influencer
+    Scrape videos for many handles, APIFY_GROUP_SIZE per Apify run; returns {handle: items}
     """
+    by_handle = {u.lower(): [] for u in usernames}
     
-    print(f"\n{'='*60}")
-    print(f"🚀 Processing: {username} ({platform})")
-    print(f"{'='*60}\n")
-    
-    # STEP 1: SCRAPE WITH APIFY
-    print("📥 Step 1: Scraping videos on Apify cloud...")
-    
-    if platform == "instagram":
-        run = apify.actor("apify/instagram-reel-scraper").call(
-            run_input={
-                "username": [username],
-                "resultsLimit": limit
-            }
-        )
-    else:
-        run = apify.actor("clockworks/free-tiktok-scraper").call(
-            run_input={
-                "profiles": [f"@{username}"],
-                "resultsPerPage": limit
-            }
-        )
-    
-    dataset_id = run["defaultDatasetId"]
-    items = list(apify.dataset(dataset_id).iterate_items())
-    
-    print(f"✅ Scraped {len(items)} videos\n")
-    
-    if not items:
-        print("❌ No videos found!")
-        return
+    for start in range(0, len(usernames), APIFY_GROUP_SIZE):
+        group = usernames[start:start + APIFY_GROUP_SIZE]
+        try:
+            if platform == "instagram":
+                run = call(
+                    "apify",
+                    apify.actor("apify/instagram-reel-scraper").call,
+                    endpoint="apify.instagram-reel-scraper",
+                    run_input={
+                        "username": group,
+                        "resultsLimit": limit
+                    }
+                )
+            else:
+                run = call(
+                    "apify",
+                    apify.actor("clockworks/free-tiktok-scraper").call,
+                    endpoint="apify.free-tiktok-scraper",
+                    run_input={
+                        "profiles": [f"@{u}" for u in group],
+                        "resultsPerPage": limit
+                    }
+                )
+        except Exception as e:
+            print(f"  ❌ Apify run failed for {', '.join(group)}: {e}")
+            continue
+        
+        dataset_id = run["defaultDatasetId"]
+        for item in apify.dataset(dataset_id).iterate_items():
+            owner = _owner(item, platform)
+            # A one-handle run owns everything it returns, even items without owner fields
+            if owner not in by_handle and len(group) == 1:
+                owner = group[0].lower()
+            if owner in by_handle:
+                by_handle[owner].append(item)
     
-    # STEP 2: GET INFLUENCER INFO + PROFILE PIC
+    return {u: by_handle[u.lower()] for u in usernames}
+
+
+def fetch_profile_pics(usernames: list) -> dict:
+    """
+    Instagram profile pics via the profile scraper, grouped like the video runs
+    """
+    pics = {}
+    for start in range(0, len(usernames), APIFY_GROUP_SIZE):
+        group = usernames[start:start + APIFY_GROUP_SIZE]
+        try:
+            print(f"📸 Fetching profile pics via profile scraper ({len(group)})...")
+            profile_run = call(
+                "apify",
+                apify.actor("apify/instagram-profile-scraper").call,
+                endpoint="apify.instagram-profile-scraper",
+                run_input={"usernames": group}
+            )
+            for item in apify.dataset(profile_run["defaultDatasetId"]).iterate_items():
+                pic = item.get("profilePicUrl") or item.get("profilePicUrlHD") or ""
+                handle = (item.get("username") or (group[0] if len(group) == 1 else "")).lower()
+                if handle and pic:
+                    pics[handle] = pic
+        except Exception as e:
+            print(f"⚠️  Profile scraper failed: {e}")
+    return pics
+
+
+def influencer_info(username: str, platform: str, items: list):
+    """
+    (name, platform id, profile pic) from an influencer's first video
+    """
     first_video = items[0]
     
     if platform == "instagram":
         influencer_name = first_video.get("ownerFullName") or first_video.get("ownerUsername") or username
         influencer_id = first_video.get("ownerUserId")
         profile_pic = first_video.get("ownerProfilePicUrl") or ""
-        
-        # If profile pic not in video data, use dedicated profile scraper
-        if not profile_pic:
-            try:
-                print("📸 Fetching profile pic via profile scraper...")
-                profile_run = apify.actor("apify/instagram-profile-scraper").call(
-                    run_input={"usernames": [username]}
-                )
-                profile_items = list(apify.dataset(profile_run["defaultDatasetId"]).iterate_items())
-                if profile_items:
-                    profile_pic = profile_items[0].get("profilePicUrl") or profile_items[0].get("profilePicUrlHD") or ""
-                    print(f"📸 Profile pic from scraper: {profile_pic[:60] if profile_pic else 'None'}...")
-            except Exception as e:
-                print(f"⚠️  Profile scraper failed: {e}")
     else:
         author = first_video.get("authorMeta", {})
         influencer_name = author.get("nickName") or author.get("name") or username
         influencer_id = author.get("id")
         profile_pic = author.get("avatar") or ""
     
-    print(f"👤 Influencer: {influencer_name}")
-    print(f"🆔 ID: {influencer_id}")
-    print(f"📸 Profile pic: {profile_pic[:60] if profile_pic else 'None'}...\n")
-    
-    # STEP 3: EXTRACT TRANSCRIPTS + CDN VIDEO URLS
-    print("📝 Step 2: Extracting captions + CDN video URLs...\n")
-    
+    return influencer_name, influencer_id, profile_pic
+
+
+def caption_records(items: list, platform: str, influencer_name: str, verbose: bool = True) -> list:
+    """
+    Captions + CDN video URLs for every video that has a caption
+    """
     transcriptions = []
     
     for i, video in enumerate(items, 1):
         caption = video.get("caption") or video.get("text", "")
         
         if not caption or not caption.strip():
-            print(f"  [{i}/{len(items)}] ⏭️  No caption, skipping...")
+            if verbose:
+                print(f"  [{i}/{len(items)}] ⏭️  No caption, skipping...")
             continue
         
         try:
             transcript = caption.strip()
             
-            print(f"  [{i}/{len(items)}] ✅ Caption: {transcript[:60]}...")
+            if verbose:
+                print(f"  [{i}/{len(items)}] ✅ Caption: {transcript[:60]}...")
             
             # ====================================================================
             # 🔥 EXTRACT CDN VIDEO URL (DIRECT .MP4 LINK)
@@ -170,31 +218,27 @@ def scrape_and_process(username: str, platform: str = "instagram", limit: int =
                 ""
             )
             
-            print(f"    🔗 CDN URL: {cdn_video_url[:80] if cdn_video_url else 'NONE'}...")
-            
             # Fallback: if no CDN URL, try to extract from videoMeta
             if not cdn_video_url and platform == "tiktok":
                 video_meta = video.get("videoMeta", {})
                 play_addr = video_meta.get("playAddr") or video_meta.get("downloadAddr")
                 if play_addr:
                     cdn_video_url = play_addr
-                    print(f"    🔗 Extracted from videoMeta: {cdn_video_url[:80]}...")
             
-            # DEBUG: Print all available keys if no URL found
-            if not cdn_video_url:
-                print(f"    ⚠️  No video URL found!")
-                print(f"    🔍 Available fields: {list(video.keys())[:15]}...")
-            
-            # Use the CDN URL directly
-            full_video_url = cdn_video_url
+            if verbose:
+                print(f"    🔗 CDN URL: {cdn_video_url[:80] if cdn_video_url else 'NONE'}...")
+                # DEBUG: Print all available keys if no URL found
+                if not cdn_video_url:
+                    print(f"    ⚠️  No video URL found!")
+                    print(f"    🔍 Available fields: {list(video.keys())[:15]}...")
             
             # ✅ NEW - Extract @mentions from caption
             mentions = extract_mentions(transcript)
-            if mentions:
+            if mentions and verbose:
                 print(f"    📍 Found mentions: {', '.join(['@' + m for m in mentions])}")
             
             transcriptions.append({
-                "video_url": full_video_url,
+                "video_url": cdn_video_url,  # Use the CDN URL directly
                 "transcript": transcript,
                 "mentions": mentions,  # ✅ NEW
                 "platform": platform,
@@ -203,189 +247,277 @@ def scrape_and_process(username: str, platform: str = "instagram", limit: int =
             
         except Exception as e:
             print(f"    ⚠️ Failed: {e}")
-            import traceback
-            traceback.print_exc()
             continue
     
-    print(f"✅ Processed {len(transcriptions)} videos with CDN URLs\n")
+    return transcriptions
+
+
+def extract_products(trans: dict) -> list:
+    """
+    Products in one caption (one Groq call, paced by the shared groq limiter)
+    """
+    if not trans["transcript"].strip():
+        return []
     
-    # STEP 4: EXTRACT PRODUCTS WITH AI
-    print("🤖 Step 3: Extracting products with AI...\n")
+    # ✅ UPDATED PROMPT - Extract EVERYTHING! (compact: the caption is cleaned and capped)
+    caption = prompts.clean_caption(trans["transcript"], prompts.CAPTION_TOKENS)
+    prompt = f"""Extract ALL products, items, brands, or recommendations in this social media caption: beauty (makeup, skincare, haircare, fragrance), fashion (clothes, shoes, bags, accessories, jewelry), lifestyle (home, tech, gadgets, food, drinks, supplements) and services (salons, restaurants, apps, websites, stores).
+
+Caption: "{caption}"
+
+Return ONLY a JSON array, [] if none:
+[{{"product_name": "Exact product/item name", "brand": "Brand name or @mention if it's a local brand/page", "category": "makeup/skincare/haircare/fragrance/fashion/shoes/bags/jewelry/accessories/tech/food/lifestyle/home/other", "quote": "Exact quote from caption about this product"}}]
+"""
+    messages = [{"role": "user", "content": prompt}]
+    prompts.measure("groq.chat.add_influencer", messages)
     
-    all_products = []
+    try:
+        response = call(
+            "groq",
+            groq.chat.completions.create,
+            endpoint="groq.chat",
+            model="llama-3.3-70b-versatile",
+            temperature=0.3,
+            max_tokens=1024,
+            **llmjson.request(messages, wrap="products"),
+        )
+        products = llmjson.read_array(response, "groq.chat.add_influencer")
+    except Exception as e:
+        print(f"      ⚠️ AI extraction failed: {e}")
+        deadletter.record("caption_extract", trans, e)
+        return []
     
-    for i, trans in enumerate(transcriptions, 1):
-        if not trans["transcript"].strip():
+    for product in products:
+        product["influencer_name"] = trans["influencer_name"]
+        product["video_url"] = trans["video_url"]  # ✅ CDN URL
+        product["platform"] = trans["platform"]
+        product["mentions"] = trans["mentions"]  # ✅ NEW - Store mentions
+    return products
+
+
+def upload_products(products: list, influencer_name: str, profile_pic: str, platform: str, verbose: bool = True) -> int:
+    """
+    Insert new products and their buy links in bulk; returns how many products were added
+    """
+    resolve = influencers.resolver(supabase, platform)
+    influencer_id = resolve(influencer_name) if resolve else None
+
+    # Which of these products does the influencer already have? (one query per 100 names)
+    names = sorted({p["product_name"] for p in products if p.get("product_name")})
+    seen = set()
+    for chunk in bulkload.chunked(names, 100):
+        query = supabase.table("products").select("product_name")
+        if influencer_id:
+            query = query.eq("influencer_id", influencer_id)
+        else:
+            query = query.eq("influencer_name", influencer_name)
+        existing = call(
+            "supabase",
+            query.in_("product_name", chunk).execute,
+            endpoint="supabase.products",
+        )
+        seen.update(row["product_name"] for row in existing.data)
+    
+    rows, links = [], []
+    for product in products:
+        name = product.get("product_name")
+        # Skip products without a valid video URL
+        if not name or not product.get("video_url"):
+            if verbose:
+                print(f"  ⚠️  Skipping: {name} - no video URL")
             continue
+        if name in seen:
+            if verbose:
+                print(f"  ⏭️  Skipping: {name}")
+            continue
+        seen.add(name)
         
-        print(f"  [{i}/{len(transcriptions)}] Analyzing...")
+        # Insert product WITH ALL FIELDS INCLUDING PROFILE PIC
+        product_id = str(uuid.uuid4())
+        row = {
+            "id": product_id,
+            "product_name": name,
+            "brand": product.get("brand", ""),
+            "category": product.get("category", "other"),
+            "quote": product.get("quote", ""),
+            "influencer_name": influencer_name,
+            "influencer_profile_pic": profile_pic,
+            "platform": platform,
+            "video_url": product.get("video_url", "")  # ✅ CDN URL saved here
+        }
+        if influencer_id:
+            row["influencer_id"] = influencer_id
+        rows.append(row)
         
-        # ✅ UPDATED PROMPT - Extract EVERYTHING!
-        prompt = f"""Extract ALL products, items, brands, or recommendations mentioned in this social media caption.
-
-This includes:
-- Beauty products (makeup, skincare, haircare, fragrance)
-- Fashion items (clothes, dresses, tops, pants, shoes, bags, accessories, jewelry)
-- Lifestyle products (home decor, tech, gadgets, food, drinks, supplements)
-- Services (salons, restaurants, apps, websites, stores)
-
-Caption: "{trans['transcript']}"
-
-Return ONLY valid JSON array:
-[
-  {{
-    "product_name": "Exact product/item name",
-    "brand": "Brand name or @mention if it's a local brand/page",
-    "category": "makeup/skincare/haircare/fragrance/fashion/shoes/bags/jewelry/accessories/tech/food/lifestyle/home/other",
-    "quote": "Exact quote from caption about this product"
-  }}
-]
-
-If no products found, return: []
-"""
+        # SCRAPE REAL LINKS + @mentions as buy links
+        product_links = scrape_real_buy_links(name, product.get("brand", "")) + [
+            {
+                "store_name": f"@{mention}",
+                "url": f"https://www.instagram.com/{mention}/",
+                "price": None,
+                "currency": None
+            }
+            for mention in product.get("mentions", [])
+        ]
+        links.extend(dict(link, id=str(uuid.uuid4()), product_id=product_id) for link in product_links)
         
+        if verbose:
+            print(f"  📦 {name}")
+            print(f"      📹 CDN Video: {product.get('video_url', 'NO URL')[:60]}...")
+            print(f"      ✅ {len(product_links)} buy links")
+    
+    if not rows:
+        return 0
+    
+    insert = bulkload.supabase_insert(supabase)
+    uploaded = 0
+    for chunk in bulkload.chunked(rows, bulkload.BULK_CHUNK):
+        chunk_ids = {row["id"] for row in chunk}
+        chunk_links = [link for link in links if link["product_id"] in chunk_ids]
         try:
-            response = groq.chat.completions.create(
-                model="llama-3.3-70b-versatile",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.3,
-                max_tokens=1024
-            )
-            
-            raw = response.choices[0].message.content.strip()
-            
-            # Clean up markdown code blocks
-            if raw.startswith("```"):
-                lines = raw.split("\n")
-                raw = "\n".join(lines[1:-1])
-                if raw.startswith("json"):
-                    raw = raw[4:].strip()
-            
-            products = json.loads(raw)
-            
-            for product in products:
-                product["influencer_name"] = influencer_name
-                product["video_url"] = trans["video_url"]  # ✅ CDN URL
-                product["platform"] = platform
-                product["mentions"] = trans["mentions"]  # ✅ NEW - Store mentions
-                all_products.append(product)
-            
-            print(f"      ✅ Found {len(products)} products")
-            
+            insert("products", chunk)
         except Exception as e:
-            print(f"      ⚠️ AI extraction failed: {e}")
+            print(f"  ❌ Failed to insert {len(chunk)} products: {e}")
+            for row in chunk:
+                deadletter.record(
+                    "products_insert",
+                    {"product": row, "buy_links": [link for link in chunk_links if link["product_id"] == row["id"]]},
+                    e,
+                )
             continue
+        uploaded += len(chunk)
+        try:
+            insert("buy_links", chunk_links)
+        except Exception as e:
+            print(f"  ❌ Failed to insert {len(chunk_links)} buy links: {e}")
+            for link in chunk_links:
+                deadletter.record("buy_links_insert", link, e)
+    
+    return uploaded
+
+
+def process_influencers(usernames: list, platform: str = "instagram", limit: int = 20, workers: int = EXTRACT_WORKERS):
+    """
+    Full pipeline for many influencers: grouped scrape, concurrent extraction, bulk upload
+    """
+    started = time.perf_counter()
+    verbose = len(usernames) == 1
+    
+    print(f"\n{'='*60}")
+    print(f"🚀 Processing: {', '.join(usernames)} ({platform})")
+    print(f"{'='*60}\n")
     
-    print(f"✅ Extracted {len(all_products)} total products\n")
+    # STEP 1: SCRAPE WITH APIFY
+    print(f"📥 Step 1: Scraping videos on Apify cloud ({len(usernames)} handles)...")
+    videos = scrape_videos(usernames, platform, limit)
+    scraped_at = time.perf_counter()
+    print(f"✅ Scraped {sum(len(v) for v in videos.values())} videos\n")
     
-    # STEP 5: UPLOAD + SCRAPE REAL BUY LINKS
-    print("💾 Step 4: Uploading + scraping buy links...\n")
+    # STEP 2: GET INFLUENCER INFO + PROFILE PIC
+    profiles = {}
+    for username, items in videos.items():
+        if not items:
+            print(f"❌ No videos found for {username}!")
+            continue
+        profiles[username] = influencer_info(username, platform, items)
     
-    uploaded = 0
-    for product in all_products:
+    missing_pics = [u for u, (_, _, pic) in profiles.items() if not pic]
+    if platform == "instagram" and missing_pics:
+        # If profile pic not in video data, use dedicated profile scraper
+        pics = fetch_profile_pics(missing_pics)
+        for username in missing_pics:
+            name, influencer_id, _ = profiles[username]
+            profiles[username] = (name, influencer_id, pics.get(username.lower(), ""))
+    
+    for username, (name, influencer_id, pic) in profiles.items():
+        print(f"👤 Influencer: {name}  🆔 {influencer_id}  📸 {pic[:60] if pic else 'None'}")
+    print()
+    
+    # STEP 3: EXTRACT TRANSCRIPTS + CDN VIDEO URLS
+    print("📝 Step 2: Extracting captions + CDN video URLs...\n")
+    transcriptions = {
+        username: caption_records(videos[username], platform, name, verbose)
+        for username, (name, _, _) in profiles.items()
+    }
+    n_captions = sum(len(t) for t in transcriptions.values())
+    print(f"✅ Processed {n_captions} videos with CDN URLs\n")
+    
+    # STEP 4: EXTRACT PRODUCTS WITH AI
+    print(f"🤖 Step 3: Extracting products with AI ({workers} at a time)...\n")
+    jobs = [(username, trans) for username, items in transcriptions.items() for trans in items]
+    products = {username: [] for username in profiles}
+    with ThreadPoolExecutor(max(1, workers)) as pool:
+        for i, ((username, _), found) in enumerate(zip(jobs, pool.map(lambda job: extract_products(job[1]), jobs)), 1):
+            products[username].extend(found)
+            if verbose:
+                print(f"  [{i}/{len(jobs)}] ✅ Found {len(found)} products")
+    extracted_at = time.perf_counter()
+    n_products = sum(len(p) for p in products.values())
+    print(f"✅ Extracted {n_products} total products\n")
+    
+    # STEP 5: UPLOAD + BUY LINKS
+    print("💾 Step 4: Uploading products + buy links...\n")
+    uploaded = {}
+    for username, (name, _, pic) in profiles.items():
         try:
-            # Skip products without a valid video URL
-            if not product.get("video_url"):
-                print(f"  ⚠️  Skipping: {product['product_name']} - no video URL")
-                continue
-            
-            # Check if product already exists
-            existing = supabase.table("products").select("id").eq(
-                "product_name", product["product_name"]
-            ).eq(
-                "influencer_name", influencer_name
-            ).execute()
-            
-            if existing.data:
-                print(f"  ⏭️  Skipping: {product['product_name']}")
-                continue
-            
-            # Insert product WITH ALL FIELDS INCLUDING PROFILE PIC
-            product_data = {
-                "product_name": product["product_name"],
-                "brand": product.get("brand", ""),
-                "category": product.get("category", "other"),
-                "quote": product.get("quote", ""),
-                "influencer_name": influencer_name,
-                "influencer_profile_pic": profile_pic,
-                "platform": platform,
-                "video_url": product.get("video_url", "")  # ✅ CDN URL saved here
-            }
-            
-            product_result = supabase.table("products").insert(product_data).execute()
-            product_id = product_result.data[0]["id"]
-            
-            print(f"  📦 {product['product_name']}")
-            print(f"      📹 CDN Video: {product.get('video_url', 'NO URL')[:60]}...")
-            
-            # SCRAPE REAL LINKS
-            real_links = scrape_real_buy_links(
-                product["product_name"],
-                product.get("brand", "")
-            )
-            
-            # Insert buy links
-            for link in real_links:
-                try:
-                    supabase.table("buy_links").insert({
-                        "product_id": product_id,
-                        "store_name": link["store_name"],
-                        "url": link["url"],
-                        "price": link.get("price"),
-                        "currency": link.get("currency")
-                    }).execute()
-                except Exception as e:
-                    print(f"      ❌ {link['store_name']}: {e}")
-            
-            # Add @mentions as buy links
-            mentions = product.get("mentions", [])
-            for mention in mentions:
-                try:
-                    instagram_url = f"https://www.instagram.com/{mention}/"
-                    supabase.table("buy_links").insert({
-                        "product_id": product_id,
-                        "store_name": f"@{mention}",
-                        "url": instagram_url,
-                        "price": None,
-                        "currency": None
-                    }).execute()
-                    print(f"      📍 Added mention: @{mention}")
-                except Exception as e:
-                    print(f"      ❌ @{mention}: {e}")
-            
-            uploaded += 1
-            print(f"      ✅ Added {len(real_links) + len(mentions)} buy links\n")
-            
-            time.sleep(1)
-            
+            uploaded[username] = upload_products(products[username], name, pic, platform, verbose)
         except Exception as e:
-            print(f"  ❌ Failed: {product.get('product_name')}: {e}")
+            print(f"  ❌ Upload failed for {name}: {e}")
+            uploaded[username] = 0
+        if not verbose:
+            print(f"  ✅ {name}: {uploaded[username]} new products")
     
-    print(f"\n✅ Uploaded {uploaded} new products!")
+    elapsed = time.perf_counter() - started
+    n_uploaded = sum(uploaded.values())
     
     # SUMMARY
     print(f"\n{'='*60}")
-    print(f"✅ COMPLETE - {influencer_name}")
+    print(f"✅ COMPLETE - {len(profiles)}/{len(usernames)} influencers")
     print(f"{'='*60}")
-    print(f"  Videos scraped: {len(items)}")
-    print(f"  Processed: {len(transcriptions)}")
-    print(f"  Products extracted: {len(all_products)}")
-    print(f"  New products added: {uploaded}")
+    print(f"  Videos scraped: {sum(len(v) for v in videos.values())}  ({scraped_at - started:.1f}s)")
+    print(f"  Processed: {n_captions}")
+    print(f"  Products extracted: {n_products}  ({extracted_at - scraped_at:.1f}s)")
+    print(f"  New products added: {n_uploaded}  ({time.perf_counter() - extracted_at:.1f}s)")
+    print(f"  Total: {elapsed:.1f}s — {n_captions / elapsed if elapsed else 0:.1f} captions/s, "
+          f"{len(profiles) / elapsed * 60 if elapsed else 0:.1f} influencers/min")
     print(f"{'='*60}\n")
+    return uploaded
+
+
+def scrape_and_process(username: str, platform: str = "instagram", limit: int = 20):
+    """
+    Full pipeline for one influencer
+    """
+    return process_influencers([username], platform, limit)
+
+
+def read_handles(arg: str, platform: str) -> list:
+    """
+    Handles from "a,b,c" or from an influencers.json file (its `platform` handles)
+    """
+    if arg.endswith(".json") and Path(arg).exists():
+        with open(arg) as f:
+            return [inf[platform] for inf in json.load(f) if inf.get(platform)]
+    return [h.strip().lstrip("@") for h in arg.split(",") if h.strip()]
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python add_influencer.py <username> [platform] [limit]")
-        print('Example: python add_influencer.py "sarahhanyofficial" instagram 20')
-        sys.exit(1)
+    parser = argparse.ArgumentParser(
+        description="Scrape influencers and add their products",
+        usage='python add_influencer.py <username|a,b,c|influencers.json> [platform] [limit] [--workers N]',
+    )
+    parser.add_argument("username", help='a handle, "a,b,c", or influencers.json')
+    parser.add_argument("platform", nargs="?", default="instagram", choices=["instagram", "tiktok"])
+    parser.add_argument("limit", nargs="?", type=int, default=20, help="videos per influencer")
+    parser.add_argument("--workers", type=int, default=EXTRACT_WORKERS, help="concurrent Groq extractions")
+    args = parser.parse_args()
     
-    username = sys.argv[1]
-    platform = sys.argv[2] if len(sys.argv) > 2 else "instagram"
-    limit = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+    usernames = read_handles(args.username, args.platform)
+    if not usernames:
+        parser.error(f"no {args.platform} handles in {args.username!r}")
     
-    scrape_and_process(username, platform, limit)
+    process_influencers(usernames, args.platform, args.limit, args.workers)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
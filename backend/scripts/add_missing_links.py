@@ -1,71 +1,52 @@
 """
 Add buy links to existing products that don't have them
+
+Finds link-less products a page at a time with one anti-join query and
+inserts all of their links in one request per page; safe to stop and re-run.
 """
 
-import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
-from supabase import create_client
 
-load_dotenv()
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # backend/, for `core`
+from core import bulkload, get_supabase
 
-supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+load_dotenv()
 
-def add_links_to_existing_products():
-    # Get all products
-    products = supabase.table("products").select("*").execute().data
+def search_links(product):
+    # Generate search query
+    search_query = f"{product.get('brand') or ''} {product['product_name']}".strip().replace(' ', '+')
     
-    print(f"Found {len(products)} products\n")
-    
-    for product in products:
-        product_id = product["id"]
-        
-        # Check if product already has links
-        existing_links = supabase.table("buy_links").select("*").eq("product_id", product_id).execute().data
-        
-        if existing_links:
-            print(f"⏭️  {product['product_name']} - already has {len(existing_links)} links")
-            continue
-        
-        # Generate search query
-        product_name = product["product_name"]
-        brand = product.get("brand", "")
-        search_query = f"{brand} {product_name}".strip()
-        
-        print(f"➕ {product_name}")
-        
-        # Add Amazon link
-        amazon_search = f"https://www.amazon.com/s?k={search_query.replace(' ', '+')}"
-        supabase.table("buy_links").insert({
-            "product_id": product_id,
+    return [
+        # Amazon link
+        {
             "store_name": "Amazon",
-            "url": amazon_search,
+            "url": f"https://www.amazon.com/s?k={search_query}",
             "price": None,
             "currency": "USD"
-        }).execute()
-        
-        # Add Google Shopping link
-        google_shopping = f"https://www.google.com/search?tbm=shop&q={search_query.replace(' ', '+')}"
-        supabase.table("buy_links").insert({
-            "product_id": product_id,
+        },
+        # Google Shopping link
+        {
             "store_name": "Google Shopping",
-            "url": google_shopping,
+            "url": f"https://www.google.com/search?tbm=shop&q={search_query}",
             "price": None,
             "currency": None
-        }).execute()
-        
-        # Add Jumia Egypt link
-        jumia_search = f"https://www.jumia.com.eg/catalog/?q={search_query.replace(' ', '+')}"
-        supabase.table("buy_links").insert({
-            "product_id": product_id,
+        },
+        # Jumia Egypt link
+        {
             "store_name": "Jumia Egypt",
-            "url": jumia_search,
+            "url": f"https://www.jumia.com.eg/catalog/?q={search_query}",
             "price": None,
             "currency": "EGP"
-        }).execute()
-        
-        print(f"   ✅ Added 3 buy links\n")
+        },
+    ]
+
+def add_links_to_existing_products():
+    stats = bulkload.backfill_links(get_supabase(), search_links)
     
+    print(f"\n✅ Added {stats.links} buy links to {stats.products} products in {stats.seconds:.1f}s")
     print("🎉 DONE!")
 
 if __name__ == "__main__":
-    add_links_to_existing_products()
\ No newline at end of file
+    add_links_to_existing_products()
@@ -1,15 +1,16 @@
 """
 Instagram reel scraper using Apify
 """
-import os
 import json
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
-from apify_client import ApifyClient
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # backend/, for `core`
+from core import call, get_apify
 
 load_dotenv()
 
-APIFY_TOKEN = os.getenv("APIFY_API_TOKEN")
 OUTPUT_DIR = Path("data/raw/instagram")
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
@@ -17,7 +18,7 @@ def scrape_instagram_reels(username: str, limit: int = 10):
     """Scrape Instagram reels using Apify"""
     print(f"\n🔍 Scraping @{username} reels...")
     
-    client = ApifyClient(APIFY_TOKEN)
+    client = get_apify()
     
     # Run Instagram Reel Scraper actor
     run_input = {
@@ -26,7 +27,7 @@ def scrape_instagram_reels(username: str, limit: int = 10):
     }
     
     print("🚀 Starting Apify actor...")
-    run = client.actor("apify/instagram-reel-scraper").call(run_input=run_input)
+    run = call("apify", client.actor("apify/instagram-reel-scraper").call, run_input=run_input)
     
     print("📥 Fetching results...")
     items = []
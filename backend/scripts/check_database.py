@@ -1,10 +1,13 @@
-from supabase import create_client
-import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # backend/, for `core`
+from core import get_supabase
+
 load_dotenv()
 
-supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+supabase = get_supabase()
 
 response = supabase.table("products").select("influencer_name, product_name, category").execute()
 
@@ -1,26 +1,21 @@
 """
 Download TikTok video files from scraped data
+
+Downloads run concurrently through `core.download` (DOWNLOAD_CONCURRENCY);
+interrupted files resume on the next run instead of counting as done.
 """
 import json
-import requests
+import sys
 from pathlib import Path
 from tqdm import tqdm
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # backend/, for `core`
+from core.download import download_all
+
 INPUT_FILE = Path("data/raw/tiktok/hudabeauty/videos.json")
 OUTPUT_DIR = Path("data/raw/tiktok/hudabeauty/videos")
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-def download_video(url: str, output_path: Path):
-    """Download video from URL"""
-    response = requests.get(url, stream=True)
-    total_size = int(response.headers.get('content-length', 0))
-    
-    with open(output_path, 'wb') as f:
-        with tqdm(total=total_size, unit='B', unit_scale=True, desc=output_path.name) as pbar:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
-                pbar.update(len(chunk))
-
 def get_video_url(video):
     """Extract video URL from subtitle links (prioritize English)"""
     subtitle_links = video.get('videoMeta', {}).get('subtitleLinks', [])
@@ -46,6 +41,7 @@ def main():
     
     print(f"\n📦 Found {len(videos)} videos to download\n")
     
+    jobs = []
     for i, video in enumerate(videos, 1):
         video_id = video.get("id", f"video_{i}")
         video_url = get_video_url(video)
@@ -54,18 +50,18 @@ def main():
             print(f"❌ {i}. No video URL for {video_id}")
             continue
         
-        output_path = OUTPUT_DIR / f"{video_id}.mp4"
-        
-        if output_path.exists():
-            print(f"⏭️  {i}. Already downloaded: {video_id}")
-            continue
-        
-        print(f"⬇️  {i}/{len(videos)}. Downloading {video_id}...")
-        try:
-            download_video(video_url, output_path)
-            print(f"   ✅ Saved to: {output_path}")
-        except Exception as e:
-            print(f"   ❌ Error: {e}")
+        jobs.append((video_url, OUTPUT_DIR / f"{video_id}.mp4"))
+    
+    with tqdm(total=len(jobs), unit="video") as pbar:
+        results = download_all(jobs, on_done=lambda r: pbar.update(1))
+    
+    for r in results:
+        if r.status == "exists":
+            print(f"⏭️  Already downloaded: {r.path.stem}")
+        elif r.ok:
+            print(f"✅ Saved to: {r.path}" + (" (resumed)" if r.resumed else ""))
+        else:
+            print(f"❌ {r.path.stem}: {r.error}")
     
     print("\n" + "=" * 60)
     print("✅ Download complete!")
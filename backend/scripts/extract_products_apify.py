@@ -2,10 +2,12 @@
 Extract product mentions from transcriptions using Groq AI
 """
 import json
-import os
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
-from groq import Groq
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # backend/, for `core`
+from core import call, deadletter, get_groq, llmjson, prompts
 
 load_dotenv()
 
@@ -15,8 +17,7 @@ OUTPUT_FILE = Path("data/processed/products.json")
 OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
 
 # Groq setup
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-client = Groq(api_key=GROQ_API_KEY)
+client = get_groq()
 
 SYSTEM_PROMPT = """You are a product extraction assistant for beauty and lifestyle influencer content.
 
@@ -41,29 +42,24 @@ def extract_products(transcript: dict) -> list[dict]:
     if not text or len(text) < 20:
         return []
     
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"Extract products from:\n\n{prompts.clean_caption(text, prompts.LLM_PROMPT_BUDGET)}"}
+    ]
+    prompts.measure("groq.chat.transcript", messages)
+    
     try:
-        response = client.chat.completions.create(
+        response = call(
+            "groq",
+            client.chat.completions.create,
+            endpoint="groq.chat",
             model="llama-3.3-70b-versatile",
-            messages=[
-                {"role": "system", "content": SYSTEM_PROMPT},
-                {"role": "user", "content": f"Extract products from:\n\n{text}"}
-            ],
             temperature=0.1,
             max_tokens=1024,
+            **llmjson.request(messages, wrap="products"),
         )
         
-        raw = response.choices[0].message.content.strip()
-        
-        # Clean markdown
-        if raw.startswith("```"):
-            raw = raw.split("```")[1]
-            if raw.startswith("json"):
-                raw = raw[4:]
-        
-        products = json.loads(raw.strip())
-        
-        if not isinstance(products, list):
-            return []
+        products = llmjson.read_array(response, "groq.chat.transcript")
         
         # Add metadata
         enriched = []
@@ -82,6 +78,7 @@ def extract_products(transcript: dict) -> list[dict]:
         
     except Exception as e:
         print(f"  ❌ Error: {e}")
+        deadletter.record("transcript_extract", transcript, e)
         return []
 
 def main():
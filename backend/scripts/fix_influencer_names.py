@@ -1,16 +1,19 @@
 """
 Fix influencer_name - replace IDs with actual names
+
+Each rename is one update of the influencer (see core.influencers.rename),
+not one update per product.
 """
-import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
-from supabase import create_client
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # backend/, for `core`
+from core import call, get_supabase, influencers
 
 load_dotenv()
 
-supabase = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_KEY")
-)
+supabase = get_supabase()
 
 # Based on the products we saw earlier
 INFLUENCER_MAP = {
@@ -19,39 +22,25 @@ INFLUENCER_MAP = {
     "3836834772354552655": "Huda Beauty",  # This one had all Huda products
 }
 
-def fix_all_names():
+def fix_all_names(mapping: dict = INFLUENCER_MAP):
     print("🔧 Fixing influencer names...\n")
     
-    # Get all products
-    response = supabase.table("products").select("*").execute()
-    products = response.data
-    
-    print(f"Found {len(products)} products\n")
-    
-    fixed = 0
-    for product in products:
-        old_id = product["influencer_name"]
-        
-        if old_id in INFLUENCER_MAP:
-            new_name = INFLUENCER_MAP[old_id]
-            
-            # Update in Supabase
-            supabase.table("products").update({
-                "influencer_name": new_name
-            }).eq("id", product["id"]).execute()
-            
-            print(f"✅ {product['product_name'][:40]}")
-            print(f"   {old_id} → {new_name}\n")
-            fixed += 1
+    requests = 0
+    for old_id, new_name in mapping.items():
+        requests += influencers.rename(supabase, old_id, new_name)
+        print(f"✅ {old_id} → {new_name}")
     
-    print(f"\n✅ Fixed {fixed}/{len(products)} products!")
+    print(f"\n✅ Renamed {len(mapping)} influencers in {requests} requests!")
     
     # Show new distinct names
-    response = supabase.table("products").select("influencer_name").execute()
-    unique_names = set(p["influencer_name"] for p in response.data)
-    print(f"\n📊 Unique influencer names now:")
-    for name in sorted(unique_names):
-        print(f"  • {name}")
+    response = call(
+        "supabase",
+        supabase.table("influencers").select("name").order("name").execute,
+        endpoint="supabase.influencers",
+    )
+    print(f"\n📊 Influencers now:")
+    for row in response.data:
+        print(f"  • {row['name']}")
 
 if __name__ == "__main__":
-    fix_all_names()
\ No newline at end of file
+    fix_all_names()
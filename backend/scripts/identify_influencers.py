@@ -1,16 +1,16 @@
 """
 Check what products each ID has to identify them
 """
-import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
-from supabase import create_client
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # backend/, for `core`
+from core import get_supabase
 
 load_dotenv()
 
-supabase = create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_KEY")
-)
+supabase = get_supabase()
 
 # Get all influencer IDs
 response = supabase.table("products").select("influencer_name, product_name, brand, platform, video_url").execute()
@@ -1,12 +1,18 @@
 """
 Load products to Supabase using REST API
+
+Usage:
+    python load_to_supabase.py [CHUNK]   # products per request, default BULK_CHUNK (500)
 """
 import json
 import os
-import requests
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
 
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # backend/, for `core`
+from core import bulkload
+
 load_dotenv()
 
 SUPABASE_URL = os.getenv("SUPABASE_URL")
@@ -15,14 +21,7 @@ SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 INFLUENCERS_FILE = Path("influencers.json")
 PRODUCTS_FILE = Path("data/processed/products.json")
 
-HEADERS = {
-    "apikey": SUPABASE_KEY,
-    "Authorization": f"Bearer {SUPABASE_KEY}",
-    "Content-Type": "application/json",
-    "Prefer": "return=representation"
-}
-
-def load_influencers():
+def load_influencers(insert):
     """Load influencers into database"""
     if not INFLUENCERS_FILE.exists():
         print("⚠️  influencers.json not found")
@@ -31,110 +30,39 @@ def load_influencers():
     with open(INFLUENCERS_FILE) as f:
         influencers = json.load(f)
     
-    inserted = 0
-    for inf in influencers:
-        data = {
+    rows = [
+        {
             "name": inf["name"],
             "instagram_handle": inf.get("instagram", ""),
             "tiktok_handle": inf.get("tiktok", ""),
             "platform": "instagram" if inf.get("instagram") else "tiktok"
         }
-        
-        try:
-            response = requests.post(
-                f"{SUPABASE_URL}/rest/v1/influencers",
-                headers=HEADERS,
-                json=data
-            )
-            
-            if response.status_code in [200, 201]:
-                inserted += 1
-                print(f"  ✅ {inf['name']}")
-            else:
-                print(f"  ⚠️  {inf['name']}: {response.text}")
-        except Exception as e:
-            print(f"  ❌ {inf['name']}: {e}")
+        for inf in influencers
+    ]
+    
+    # Names are unique: ones already loaded are skipped, new ones still go in
+    try:
+        insert("influencers", rows, on_conflict="name")
+    except Exception as e:
+        print(f"  ❌ {e}")
+        return 0
     
-    return inserted
+    for row in rows:
+        print(f"  ✅ {row['name']}")
+    return len(rows)
 
-def load_products():
-    """Load products and buy links"""
+def load_products(insert, chunk):
+    """Load products and buy links, `chunk` products per request"""
     if not PRODUCTS_FILE.exists():
         print(f"❌ {PRODUCTS_FILE} not found")
-        return 0, 0
+        return bulkload.LoadStats()
     
     with open(PRODUCTS_FILE) as f:
         products = json.load(f)
     
-    inserted_products = 0
-    inserted_links = 0
-    
-    for product in products:
-        # Insert product
-        product_data = {
-            "influencer_name": product.get("influencer", "Unknown"),
-            "product_name": product.get("product_name", ""),
-            "brand": product.get("brand", ""),
-            "category": product.get("category", "other"),
-            "quote": product.get("quote", ""),
-            "platform": product.get("platform", "tiktok")
-        }
-        
-        try:
-            response = requests.post(
-                f"{SUPABASE_URL}/rest/v1/products",
-                headers=HEADERS,
-                json=product_data
-            )
-            
-            if response.status_code in [200, 201]:
-                inserted_products += 1
-                product_id = response.json()[0]["id"]
-                
-                # Create buy links
-                buy_links = [
-                    {
-                        "product_id": product_id,
-                        "store": "Amazon Egypt",
-                        "url": f"https://www.amazon.eg/s?k={product['product_name'].replace(' ', '+')}",
-                        "price": None
-                    },
-                    {
-                        "product_id": product_id,
-                        "store": "Noon Egypt",
-                        "url": f"https://www.noon.com/egypt-en/search/?q={product['product_name'].replace(' ', '+')}",
-                        "price": None
-                    },
-                    {
-                        "product_id": product_id,
-                        "store": "Jumia Egypt",
-                        "url": f"https://www.jumia.com.eg/catalog/?q={product['product_name'].replace(' ', '+')}",
-                        "price": None
-                    }
-                ]
-                
-                for link in buy_links:
-                    try:
-                        r = requests.post(
-                            f"{SUPABASE_URL}/rest/v1/buy_links",
-                            headers=HEADERS,
-                            json=link
-                        )
-                        if r.status_code in [200, 201]:
-                            inserted_links += 1
-                    except:
-                        pass
-                
-                print(f"  ✅ {product['product_name'][:50]}")
-            else:
-                print(f"  ❌ {response.text[:100]}")
-        
-        except Exception as e:
-            print(f"  ❌ Error: {e}")
-    
-    return inserted_products, inserted_links
+    return bulkload.load_rest(products, insert, chunk)
 
-def main():
+def main(chunk=bulkload.BULK_CHUNK):
     print("="*60)
     print("Loading Data to Supabase")
     print("="*60)
@@ -143,18 +71,22 @@ def main():
         print("❌ Set SUPABASE_URL and SUPABASE_KEY in .env")
         return
     
+    insert = bulkload.rest_insert(SUPABASE_URL, SUPABASE_KEY)
+    
     print("\n📤 Loading influencers...")
-    inf_count = load_influencers()
+    inf_count = load_influencers(insert)
     print(f"✅ Loaded {inf_count} influencers\n")
     
-    print("📤 Loading products...")
-    prod_count, link_count = load_products()
-    print(f"\n✅ Loaded {prod_count} products")
-    print(f"✅ Created {link_count} buy links")
+    print(f"📤 Loading products ({chunk} per request)...")
+    stats = load_products(insert, chunk)
+    print(f"\n✅ Loaded {stats.products} products in {stats.seconds:.1f}s ({stats.rate:.0f}/s)")
+    print(f"✅ Created {stats.links} buy links")
+    if stats.failed:
+        print(f"⚠️  {stats.failed} products dead-lettered")
     
     print("\n" + "="*60)
     print("✅ Upload complete!")
     print("="*60)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else bulkload.BULK_CHUNK)
\ No newline at end of file
@@ -0,0 +1,144 @@
+"""
+Replay items that failed after all retries and were dead-lettered.
+
+Usage:
+    python replay_dead_letters.py            # list dead-letter kinds and counts
+    python replay_dead_letters.py <kind>     # replay one kind
+
+Entries that fail again stay in the dead-letter file; the rest are removed.
+Kinds without a replayer (e.g. transcribe, transcript_extract) are listed so
+they can be re-run through their pipeline step.
+"""
+
+import sys
+import uuid
+from pathlib import Path
+from dotenv import load_dotenv
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # backend/, for `core`
+from core import call, deadletter, get_supabase
+
+load_dotenv()
+
+
+def _link_id(link: dict, product_id: str) -> str:
+    """The link's own id, or one derived from its product and URL for entries written without ids."""
+    return link.get("id") or str(uuid.uuid5(uuid.NAMESPACE_URL, f"{product_id} {link['url']}"))
+
+
+def replay_product(payload: dict) -> None:
+    """Insert a dead-lettered product (unless it already exists), and its buy links if it has none.
+
+    Writes are upserts on id, so an insert that committed before its timeout
+    (or an entry replayed twice) doesn't duplicate rows.
+    """
+    supabase = get_supabase()
+    product = dict(payload["product"])
+
+    existing = call(
+        "supabase",
+        supabase.table("products").select("id")
+        .eq("product_name", product["product_name"])
+        .eq("influencer_name", product["influencer_name"])
+        .execute,
+        endpoint="supabase.products",
+    )
+    if existing.data:
+        product_id = existing.data[0]["id"]
+    else:
+        product.setdefault("id", str(uuid.uuid4()))
+        call(
+            "supabase",
+            supabase.table("products").upsert(product, on_conflict="id", ignore_duplicates=True).execute,
+            endpoint="supabase.products",
+        )
+        product_id = product["id"]
+
+    links = [
+        {
+            "id": _link_id(link, product_id),
+            "product_id": product_id,
+            "store_name": link.get("store_name"),
+            "url": link["url"],
+            "price": link.get("price"),
+            "currency": link.get("currency"),
+        }
+        for link in payload.get("buy_links", [])
+        if (link.get("url") or "").strip()
+    ]
+    if not links:
+        return
+    # A product saved on an earlier replay whose links then failed still needs them
+    has_links = call(
+        "supabase",
+        supabase.table("buy_links").select("id").eq("product_id", product_id).limit(1).execute,
+        endpoint="supabase.buy_links",
+    )
+    if not has_links.data:
+        call(
+            "supabase",
+            supabase.table("buy_links").upsert(links, on_conflict="id", ignore_duplicates=True).execute,
+            endpoint="supabase.buy_links",
+        )
+
+
+def replay_buy_link(payload: dict) -> None:
+    link = dict(payload, id=_link_id(payload, payload["product_id"]))
+    call(
+        "supabase",
+        get_supabase().table("buy_links").upsert(link, on_conflict="id", ignore_duplicates=True).execute,
+        endpoint="supabase.buy_links",
+    )
+
+
+def replay_monster_extract(payload: dict) -> None:
+    from monster import Monster
+
+    monster = Monster()
+    products = monster.extract_products_with_ai(payload["posts"], payload["handle"], raise_errors=True)
+    monster.save_products_to_db(products, payload["handle"])
+
+
+REPLAYERS = {
+    "products_insert": replay_product,
+    "buy_links_insert": replay_buy_link,
+    "monster_extract": replay_monster_extract,
+}
+
+
+def main():
+    if len(sys.argv) < 2:
+        kinds = deadletter.kinds()
+        if not kinds:
+            print("✅ No dead letters")
+            return
+        print("📮 Dead letters:")
+        for kind in kinds:
+            count = sum(1 for _ in deadletter.read(kind))
+            note = "" if kind in REPLAYERS else "  (no replayer — re-run its pipeline step)"
+            print(f"  {kind:<20} {count:>5}{note}")
+        return
+
+    kind = sys.argv[1]
+    replayer = REPLAYERS.get(kind)
+    if replayer is None:
+        print(f"❌ No replayer for '{kind}'. Known: {', '.join(REPLAYERS)}")
+        sys.exit(1)
+
+    entries = list(deadletter.read(kind))
+    print(f"↻ Replaying {len(entries)} {kind} entries...")
+
+    still_failing = []
+    for entry in entries:
+        try:
+            replayer(entry["payload"])
+        except Exception as e:
+            entry["error"] = f"{type(e).__name__}: {e}"
+            still_failing.append(entry)
+
+    deadletter.rewrite(kind, still_failing)
+    print(f"✅ Replayed {len(entries) - len(still_failing)}/{len(entries)}, {len(still_failing)} still failing")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,47 @@
 """
-Master script: run all pipeline steps in sequence.
+Master script: run the whole pipeline.
 
 Usage:
-    python run_all.py [--skip-instagram]
-
-Steps:
-    1. Scrape TikTok
-    2. Scrape Instagram  (skipped with --skip-instagram)
-    3. Transcribe videos
-    4. Extract products with AI
-    5. Load into Supabase
+    python run_all.py [--skip-instagram] [--workers scrape=1,download=4,transcribe=1,extract=4,load=2]
+                      [--queue-size 32] [--on-error continue|abort] [--sequential]
+
+By default the stages run concurrently in this process, connected by bounded
+queues, so the first influencer's products are loaded while later ones are
+still being scraped:
+
+    scrape → download → transcribe → extract → load
+
+Each stage has its own worker threads (`--workers`); transcription runs on a
+pool of Whisper processes of the same size. Every stage still writes its usual
+JSONL file in data/, so a crash keeps finished work and the numbered scripts
+can pick up from there. A failed item is dead-lettered as `pipeline_<stage>`
+and the run continues; `--on-error abort` stops the whole pipeline instead.
+
+`--sequential` runs the five numbered scripts one after another as before.
 """
 
+import argparse
+import importlib
+import json
+import multiprocessing
+import queue
 import subprocess
 import sys
+import threading
 import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
 
 SCRIPTS_DIR = Path(__file__).parent
 ROOT_DIR = SCRIPTS_DIR.parents[1]
 DATA_DIR = ROOT_DIR / "data"
 
+sys.path.insert(0, str(SCRIPTS_DIR.parent))  # backend/, for `core`
+sys.path.insert(0, str(SCRIPTS_DIR))  # the numbered scripts, imported as modules
+from core import deadletter, get_groq, get_supabase, jsonl, metrics, span, telemetry
+from core.download import Downloader
+
 STEPS = [
     ("1_scrape_tiktok.py", "Scrape TikTok videos"),
     ("2_scrape_instagram.py", "Scrape Instagram reels"),
@@ -29,17 +50,21 @@ STEPS = [
     ("5_load_database.py", "Load data into Supabase"),
 ]
 
-SKIP_INSTAGRAM = "--skip-instagram" in sys.argv
+DEFAULT_WORKERS = {"scrape": 1, "download": 4, "transcribe": 1, "extract": 4, "load": 2}
 
+_DONE = object()  # end-of-stream marker on a stage's queue
 
-def run_step(script: str, description: str) -> bool:
+
+# ── Sequential mode ───────────────────────────────────────────────────────────
+
+def run_step(script: str, description: str, skip_instagram: bool) -> bool:
     """Run a pipeline step. Returns True on success."""
     print(f"\n{'=' * 60}")
     print(f"▶ {description}")
     print(f"  Script: {script}")
     print("=" * 60)
 
-    if script == "2_scrape_instagram.py" and SKIP_INSTAGRAM:
+    if script == "2_scrape_instagram.py" and skip_instagram:
         print("  [SKIP] Instagram scraping disabled (--skip-instagram)")
         return True
 
@@ -58,31 +83,321 @@ def run_step(script: str, description: str) -> bool:
         return False
 
 
+def run_sequential(skip_instagram: bool, on_error: str) -> int:
+    success_count = 0
+    for script, description in STEPS:
+        if run_step(script, description, skip_instagram):
+            success_count += 1
+        elif on_error == "abort":
+            print("Aborting pipeline (--on-error abort).")
+            return 1
+
+    print(f"\n{'=' * 60}")
+    print(f"Pipeline complete: {success_count}/{len(STEPS)} steps succeeded")
+    print("=" * 60)
+    return 0 if success_count == len(STEPS) else 1
+
+
+# ── Pipelined mode ────────────────────────────────────────────────────────────
+
+class Stage:
+    """`workers` threads that take items from `inbox`, call `fn` and pass its results on.
+
+    `setup()` runs once per worker thread and its return value is handed to
+    `fn(state, item)`; `teardown(state)` runs when the worker stops. `fn`
+    returns an iterable of items for the next stage.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[Any, Any], Iterable[Any]],
+        workers: int,
+        queue_size: int,
+        setup: Optional[Callable[[], Any]] = None,
+        teardown: Optional[Callable[[Any], None]] = None,
+    ):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.setup = setup
+        self.teardown = teardown
+        self.inbox: queue.Queue = queue.Queue(maxsize=queue_size)
+        self.next: Optional["Stage"] = None
+        self.processed = 0
+        self.failed = 0
+        self._running = self.workers
+        self._lock = threading.Lock()
+
+
+class Pipeline:
+    def __init__(self, stages: list[Stage], on_error: str):
+        self.stages = stages
+        for upstream, downstream in zip(stages, stages[1:]):
+            upstream.next = downstream
+        self.on_error = on_error
+        self.stop = threading.Event()
+        self.started = time.perf_counter()
+        self.first_output: Optional[float] = None
+        metrics.gauge_callback("influencer_queue_depth", self._queue_depths)
+
+    def _queue_depths(self) -> dict:
+        return {(("queue", f"pipeline.{s.name}"),): s.inbox.qsize() for s in self.stages}
+
+    def _put(self, stage: Stage, item: Any) -> bool:
+        """Block until `stage` has room, unless the pipeline is aborting."""
+        while not self.stop.is_set():
+            try:
+                stage.inbox.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _work(self, stage: Stage) -> None:
+        state = stage.setup() if stage.setup else None
+        try:
+            while not self.stop.is_set():
+                try:
+                    item = stage.inbox.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+                if item is _DONE:
+                    break
+                try:
+                    with span(f"pipeline.{stage.name}"):
+                        outputs = list(stage.fn(state, item))
+                except Exception as exc:
+                    with stage._lock:
+                        stage.failed += 1
+                    print(f"  ❌ {stage.name}: {type(exc).__name__}: {exc}")
+                    deadletter.record(f"pipeline_{stage.name}", item, exc)
+                    if self.on_error == "abort":
+                        self.stop.set()
+                    continue
+                with stage._lock:
+                    stage.processed += 1
+                if stage.next is None:
+                    if outputs and self.first_output is None:
+                        self.first_output = time.perf_counter() - self.started
+                    continue
+                for output in outputs:
+                    if not self._put(stage.next, output):
+                        break
+        finally:
+            if stage.teardown:
+                stage.teardown(state)
+            with stage._lock:
+                stage._running -= 1
+                last = stage._running == 0
+            if last and stage.next is not None:
+                for _ in range(stage.next.workers):
+                    self._put(stage.next, _DONE)
+
+    def run(self, items: Iterable[Any]) -> bool:
+        threads = [
+            threading.Thread(target=self._work, args=(stage,), name=f"{stage.name}-{i}", daemon=True)
+            for stage in self.stages
+            for i in range(stage.workers)
+        ]
+        for t in threads:
+            t.start()
+        first = self.stages[0]
+        for item in items:
+            if not self._put(first, item):
+                break
+        for _ in range(first.workers):
+            self._put(first, _DONE)
+        for t in threads:
+            t.join()
+        return not self.stop.is_set()
+
+
+class _ScrapeState:
+    """Per-thread scraper sessions, opened on first use."""
+
+    def __init__(self, skip_instagram: bool):
+        import asyncio
+
+        self.skip_instagram = skip_instagram
+        self.loop = asyncio.new_event_loop()
+        self.tiktok = None
+        self.instagram = None
+
+    def tiktok_api(self):
+        if self.tiktok is None:
+            import os
+
+            from TikTokApi import TikTokApi
+
+            ms_token = os.getenv("MS_TOKEN", "")
+            api = TikTokApi()
+            self.loop.run_until_complete(api.__aenter__())
+            self.loop.run_until_complete(api.create_sessions(
+                ms_tokens=[ms_token] if ms_token else None, num_sessions=1, sleep_after=3,
+            ))
+            self.tiktok = api
+        return self.tiktok
+
+    def close(self) -> None:
+        if self.tiktok is not None:
+            self.loop.run_until_complete(self.tiktok.__aexit__(None, None, None))
+        self.loop.close()
+
+
+def run_pipelined(skip_instagram: bool, workers: dict, queue_size: int, on_error: str) -> int:
+    tiktok = importlib.import_module("1_scrape_tiktok")
+    instagram = importlib.import_module("2_scrape_instagram")
+    transcribe = importlib.import_module("3_transcribe")
+    extract = importlib.import_module("4_extract_products")
+    load = importlib.import_module("5_load_database")
+
+    with open(ROOT_DIR / "influencers.json") as f:
+        influencers = json.load(f)
+    print(f"Loaded {len(influencers)} influencers")
+    print("Workers: " + ", ".join(f"{k}={v}" for k, v in workers.items()) + f", queue size {queue_size}\n")
+
+    supabase = get_supabase()
+    print(f"  ✅ {load.load_influencers(supabase)} influencers loaded\n")
+
+    try:
+        import whisper  # noqa: F401
+
+        # spawn, not fork: torch's thread pools don't survive a fork
+        whisper_pool: Optional[ProcessPoolExecutor] = ProcessPoolExecutor(
+            workers["transcribe"],
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=transcribe._init_worker,
+            initargs=(transcribe.WHISPER_MODEL, transcribe.WHISPER_THREADS),
+        )
+    except ImportError:
+        print("[WARN] openai-whisper not installed — only captioned videos will be used\n")
+        whisper_pool = None
+    store = transcribe.TranscriptStore()
+    groq = get_groq()
+
+    tiktok_out = jsonl.Writer(tiktok.OUTPUT_FILE)
+    instagram_out = jsonl.Writer(instagram.OUTPUT_FILE)
+    transcripts_out = jsonl.Writer(transcribe.OUTPUT_FILE)
+    products_out = jsonl.Writer(extract.OUTPUT_FILE)
+
+    def do_scrape(state: _ScrapeState, influencer: dict) -> list[dict]:
+        print(f"→ {influencer['name']}")
+        videos = state.loop.run_until_complete(tiktok.scrape_influencer(state.tiktok_api(), influencer))
+        tiktok_out.write_many(videos)
+        if not state.skip_instagram and influencer.get("instagram"):
+            if state.instagram is None:
+                state.instagram = instagram.make_loader()
+            reels = instagram.scrape_influencer(state.instagram, influencer)
+            instagram_out.write_many(reels)  # every reel, as 2_scrape_instagram.py writes them
+            videos.extend(reels)
+        return videos
+
+    def do_download(downloader: Downloader, video: dict) -> list[dict]:
+        if video.get("video_url") and video.get("local_path"):
+            result = downloader.fetch(video["video_url"], Path(video["local_path"]))
+            if not result.ok:
+                raise RuntimeError(f"download failed: {result.error}")
+        return [video]
+
+    def do_transcribe(_, video: dict) -> list[dict]:
+        if video.get("has_caption") and video.get("caption"):
+            record = transcribe._record(video, video["caption"], "caption")
+        else:
+            video_id = transcribe._video_id(video)
+            previous = store.get(video["platform"], video_id, transcribe.STORE_MODEL, transcribe.STORE_LANGUAGE)
+            local_path = video.get("local_path", "")
+            if previous:
+                record = transcribe._record(video, previous["text"], "whisper")
+            elif whisper_pool is None or not local_path or not Path(local_path).exists():
+                return []
+            else:
+                text, seconds = whisper_pool.submit(transcribe.transcribe_video, local_path).result()
+                if text is None:
+                    raise RuntimeError(f"Whisper failed for {local_path}")
+                store.put(video["platform"], video_id, transcribe.STORE_MODEL, transcribe.STORE_LANGUAGE,
+                          text, "whisper", seconds)
+                record = transcribe._record(video, text, "whisper")
+        transcripts_out.write(record)
+        return [record]
+
+    def do_extract(_, transcript: dict) -> list[dict]:
+        products = extract.extract_products(groq, transcript)
+        products_out.write_many(products)
+        return products
+
+    def do_load(_, product: dict) -> list[dict]:
+        inserted, _links = load.insert_product(supabase, product)
+        return [product] if inserted else []
+
+    pipeline = Pipeline(
+        [
+            Stage("scrape", do_scrape, workers["scrape"], queue_size,
+                  setup=lambda: _ScrapeState(skip_instagram), teardown=lambda s: s.close()),
+            Stage("download", do_download, workers["download"], queue_size,
+                  setup=Downloader, teardown=lambda d: d.close()),
+            Stage("transcribe", do_transcribe, workers["transcribe"], queue_size),
+            Stage("extract", do_extract, workers["extract"], queue_size),
+            Stage("load", do_load, workers["load"], queue_size),
+        ],
+        on_error,
+    )
+    try:
+        completed = pipeline.run(influencers)
+    finally:
+        if whisper_pool is not None:
+            whisper_pool.shutdown(cancel_futures=True)
+        store.close()
+        for writer in (tiktok_out, instagram_out, transcripts_out, products_out):
+            writer.close(done=not pipeline.stop.is_set())
+
+    elapsed = time.perf_counter() - pipeline.started
+    print(f"\n{'=' * 60}")
+    print(f"Pipeline {'complete' if completed else 'aborted'} in {elapsed:.1f}s")
+    for stage in pipeline.stages:
+        print(f"  {stage.name:<11} {stage.processed:>6} done {stage.failed:>5} failed")
+    if pipeline.first_output is not None:
+        print(f"  first product loaded after {pipeline.first_output:.1f}s")
+    print()
+    print(telemetry.format_summary())
+    print("=" * 60)
+    failed = sum(s.failed for s in pipeline.stages)
+    return 0 if completed and not failed else 1
+
+
+def parse_workers(value: str) -> dict:
+    workers = dict(DEFAULT_WORKERS)
+    for part in filter(None, value.split(",")):
+        name, _, count = part.partition("=")
+        if name not in workers or not count.isdigit():
+            raise argparse.ArgumentTypeError(f"expected stage=count with stage in {', '.join(workers)}: {part!r}")
+        workers[name] = int(count)
+    return workers
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Run the whole pipeline")
+    parser.add_argument("--skip-instagram", action="store_true")
+    parser.add_argument("--sequential", action="store_true", help="run the numbered scripts one after another")
+    parser.add_argument("--workers", type=parse_workers, default=dict(DEFAULT_WORKERS),
+                        help="threads per stage, e.g. download=8,extract=4")
+    parser.add_argument("--queue-size", type=int, default=32, help="items buffered between stages")
+    parser.add_argument("--on-error", choices=["continue", "abort"], default="continue")
+    args = parser.parse_args()
+
     print("=" * 60)
     print("🚀 Influencer Product Search — Full Pipeline")
     print("=" * 60)
-    if SKIP_INSTAGRAM:
+    if args.skip_instagram:
         print("Mode: TikTok only (--skip-instagram)\n")
     else:
         print("Mode: TikTok + Instagram\n")
 
     DATA_DIR.mkdir(exist_ok=True)
 
-    success_count = 0
-    for script, description in STEPS:
-        ok = run_step(script, description)
-        if ok:
-            success_count += 1
-        else:
-            answer = input(f"\nStep failed. Continue anyway? [y/N] ").strip().lower()
-            if answer != "y":
-                print("Aborting pipeline.")
-                sys.exit(1)
-
-    print(f"\n{'=' * 60}")
-    print(f"Pipeline complete: {success_count}/{len(STEPS)} steps succeeded")
-    print("=" * 60)
+    if args.sequential:
+        sys.exit(run_sequential(args.skip_instagram, args.on_error))
+    sys.exit(run_pipelined(args.skip_instagram, args.workers, args.queue_size, args.on_error))
 
 
 if __name__ == "__main__":
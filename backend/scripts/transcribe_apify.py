@@ -1,16 +1,21 @@
 """
 Transcribe videos from Apify scraped data using Groq Whisper
+
+Uploads the speech as mono 16 kHz Opus (`core.audio`) rather than the MP4.
+Finished transcripts are kept in the transcript store (`core.transcripts`), so
+a re-run only sends videos it hasn't seen.
 """
-import os
 import json
+import sys
 from pathlib import Path
 from dotenv import load_dotenv
-from groq import Groq
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # backend/, for `core`
+from core import TranscriptStore, audio, call, deadletter, get_groq
 
 load_dotenv()
 
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-client = Groq(api_key=GROQ_API_KEY)
+client = get_groq()
 
 # Paths
 INSTAGRAM_VIDEOS = Path("data/raw/instagram/hudabeauty/videos")
@@ -18,27 +23,50 @@ TIKTOK_VIDEOS = Path("data/raw/tiktok/hudabeauty/videos")
 OUTPUT_FILE = Path("data/processed/transcriptions.json")
 OUTPUT_FILE.parent.mkdir(parents=True, exist_ok=True)
 
-def transcribe_video(video_path: Path):
-    """Transcribe a single video file"""
+MODEL = "whisper-large-v3"
+LANGUAGE = "en"
+STORE_MODEL = f"groq/{MODEL}"
+
+def transcribe_video(video_path: Path, store: TranscriptStore):
+    """Transcribe a single video file and commit it to the store"""
     print(f"  🎤 Transcribing {video_path.name}...")
     
+    result = {
+        "video_id": video_path.stem,
+        "filename": video_path.name,
+        "platform": "instagram" if "instagram" in str(video_path) else "tiktok",
+        "text": "",
+    }
     try:
-        with open(video_path, "rb") as f:
-            transcription = client.audio.transcriptions.create(
-                file=(video_path.name, f.read()),
-                model="whisper-large-v3",
-                language="en",
-                response_format="verbose_json",
-            )
-        
-        return {
-            "video_id": video_path.stem,
-            "filename": video_path.name,
-            "platform": "instagram" if "instagram" in str(video_path) else "tiktok",
-            "text": transcription.text,
-        }
+        upload, seconds = video_path, None
+        if audio.available():
+            prepared = audio.prepare(video_path, "opus")
+            seconds = prepared.source_seconds
+            if prepared.empty:
+                print("     🔇 No speech found")
+                store.put(result["platform"], result["video_id"], STORE_MODEL, LANGUAGE, "", "vad", seconds)
+                return result
+            upload = prepared.path
+
+        # A few hundred KB of Opus; kept as bytes so a retry can resend it
+        with open(upload, "rb") as f:
+            data = f.read()
+        transcription = call(
+            "groq",
+            client.audio.transcriptions.create,
+            endpoint="groq.audio",
+            file=(upload.name, data),
+            model=MODEL,
+            language=LANGUAGE,
+            response_format="verbose_json",
+        )
+
+        result["text"] = transcription.text
+        store.put(result["platform"], result["video_id"], STORE_MODEL, LANGUAGE, result["text"], "groq", seconds)
+        return result
     except Exception as e:
         print(f"     ❌ Error: {e}")
+        deadletter.record("transcribe", {"video_path": str(video_path)}, e)
         return None
 
 def main():
@@ -59,15 +87,35 @@ def main():
     video_files = [v for v in video_files if v.stat().st_size > 0]
     
     print(f"\n📹 Found {len(video_files)} videos\n")
+    if not audio.available():
+        print("⚠️  ffmpeg not found — uploading whole videos\n")
     
+    store = TranscriptStore()
+    done = store.rows(STORE_MODEL, LANGUAGE)
     transcriptions = []
+    pending = []
+    for video_path in video_files:
+        platform = "instagram" if "instagram" in str(video_path) else "tiktok"
+        previous = done.get((platform, video_path.stem))
+        if previous:
+            transcriptions.append({
+                "video_id": video_path.stem,
+                "filename": video_path.name,
+                "platform": platform,
+                "text": previous["text"],
+            })
+        else:
+            pending.append(video_path)
+    if transcriptions:
+        print(f"↻ {len(transcriptions)} already transcribed, {len(pending)} new\n")
     
-    for i, video_path in enumerate(video_files, 1):
-        print(f"{i}/{len(video_files)}:")
-        result = transcribe_video(video_path)
+    for i, video_path in enumerate(pending, 1):
+        print(f"{i}/{len(pending)}:")
+        result = transcribe_video(video_path, store)
         if result:
             transcriptions.append(result)
             print(f"     ✅ {len(result['text'])} chars")
+    store.close()
     
     # Save transcriptions
     with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
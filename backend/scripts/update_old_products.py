@@ -1,17 +1,30 @@
 # -*- coding: utf-8 -*-
 """
-Update existing products with real buy links using SerpAPI
+Update existing products with real buy links
+
+Usage:
+    python update_old_products.py            # products without any links
+    python update_old_products.py --replace  # rewrite the links of every product
+
+Products are handled a page at a time (`--page`, default BULK_CHUNK): one
+query finds them, one request inserts all their links (and with --replace one
+more deletes the old ones first). Progress is checkpointed in
+backend/data/update_old_products.checkpoint, so an interrupted run resumes where it
+stopped; re-running a finished one changes nothing.
 """
 
-import os
-import time
+import argparse
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
-from supabase import create_client
-from serpapi import GoogleSearch
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))  # backend/, for `core`
+from core import bulkload, get_supabase
 
 load_dotenv()
 
-supabase = create_client(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+# backend/data, next to the dead letters and caches
+CHECKPOINT_FILE = Path(__file__).resolve().parents[1] / "data" / "update_old_products.checkpoint"
 
 def scrape_real_buy_links(product_name: str, brand: str):
     """
@@ -19,105 +32,68 @@ def scrape_real_buy_links(product_name: str, brand: str):
     """
     from urllib.parse import quote_plus
     
-    search_query = f"{brand} {product_name}".strip()
-    
-    print(f"    🔍 Creating links for: {search_query}")
-    
-    links = []
-    
-    # Jumia Egypt
-    jumia_url = f"https://www.jumia.com.eg/catalog/?q={quote_plus(search_query)}"
-    links.append({
-        "store_name": "Jumia Egypt",
-        "url": jumia_url,
-        "price": None,
-        "currency": "EGP"
-    })
-    print(f"      ✅ Jumia Egypt")
+    search_query = quote_plus(f"{brand or ''} {product_name}".strip())
     
-    # Noon Egypt
-    noon_url = f"https://www.noon.com/egypt-en/search?q={quote_plus(search_query)}"
-    links.append({
-        "store_name": "Noon Egypt",
-        "url": noon_url,
-        "price": None,
-        "currency": "EGP"
-    })
-    print(f"      ✅ Noon Egypt")
-    
-    # Amazon Egypt
-    amazon_url = f"https://www.amazon.eg/s?k={quote_plus(search_query)}"
-    links.append({
-        "store_name": "Amazon Egypt",
-        "url": amazon_url,
-        "price": None,
-        "currency": "EGP"
-    })
-    print(f"      ✅ Amazon Egypt")
-    
-    # Google Shopping
-    google_url = f"https://www.google.com/search?tbm=shop&q={quote_plus(search_query)}"
-    links.append({
-        "store_name": "Google Shopping",
-        "url": google_url,
-        "price": None,
-        "currency": None
-    })
-    print(f"      ✅ Google Shopping")
-    
-    return links
-def update_all_products():
+    return [
+        # Jumia Egypt
+        {
+            "store_name": "Jumia Egypt",
+            "url": f"https://www.jumia.com.eg/catalog/?q={search_query}",
+            "price": None,
+            "currency": "EGP"
+        },
+        # Noon Egypt
+        {
+            "store_name": "Noon Egypt",
+            "url": f"https://www.noon.com/egypt-en/search?q={search_query}",
+            "price": None,
+            "currency": "EGP"
+        },
+        # Amazon Egypt
+        {
+            "store_name": "Amazon Egypt",
+            "url": f"https://www.amazon.eg/s?k={search_query}",
+            "price": None,
+            "currency": "EGP"
+        },
+        # Google Shopping
+        {
+            "store_name": "Google Shopping",
+            "url": f"https://www.google.com/search?tbm=shop&q={search_query}",
+            "price": None,
+            "currency": None
+        },
+    ]
+
+def update_all_products(replace: bool = False, page: int = bulkload.BULK_CHUNK):
     """
-    Update all products with real buy links
+    Update products with real buy links
     """
-    print("��� Fetching all products...\n")
-    products = supabase.table("products").select("*").execute().data
-    
-    print(f"Found {len(products)} products\n")
+    print(f"🔍 {'Rewriting links for all products' if replace else 'Adding links to products without any'}...\n")
     print("="*60)
     
-    updated = 0
-    
-    for i, product in enumerate(products, 1):
-        print(f"\n[{i}/{len(products)}] {product['product_name']}")
-        
-        # Delete old links
-        supabase.table("buy_links").delete().eq("product_id", product['id']).execute()
-        print("    🗑️  Deleted old links")
-        
-        # Get new real links
-        real_links = scrape_real_buy_links(
-            product['product_name'],
-            product.get('brand', '')
-        )
-        
-        # Insert new links
-        for link in real_links:
-            try:
-                supabase.table("buy_links").insert({
-                    "product_id": product['id'],
-                    "store_name": link["store_name"],
-                    "url": link["url"],
-                    "price": link.get("price"),
-                    "currency": link.get("currency")
-                }).execute()
-            except Exception as e:
-                print(f"      ❌ Failed: {e}")
-        
-        updated += 1
-        print(f"    ✅ Added {len(real_links)} new links")
-        
-        # Rate limiting (important for SerpAPI!)
-        time.sleep(2)
+    stats = bulkload.backfill_links(
+        get_supabase(),
+        lambda product: scrape_real_buy_links(product["product_name"], product.get("brand")),
+        replace=replace,
+        page=page,
+        checkpoint=CHECKPOINT_FILE,
+    )
     
     print("\n" + "="*60)
-    print(f"🎉 Updated {updated} products with real buy links!")
+    print(f"🎉 Updated {stats.products} products with {stats.links} buy links in {stats.seconds:.1f}s")
     print("="*60)
 
 
 if __name__ == "__main__":
-    confirm = input("This will replace ALL buy links. Continue? (y/n): ")
-    if confirm.lower() in ["y", "yes"]:
-        update_all_products()
-    else:
-        print("Cancelled.")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Backfill buy links for existing products")
+    parser.add_argument("--replace", action="store_true", help="delete and rewrite the links of every product")
+    parser.add_argument("--page", type=int, default=bulkload.BULK_CHUNK, help="products per round trip")
+    parser.add_argument("--yes", action="store_true", help="don't ask before --replace")
+    args = parser.parse_args()
+    if args.replace and not args.yes and not CHECKPOINT_FILE.exists():
+        confirm = input("This will replace ALL buy links. Continue? (y/n): ")
+        if confirm.lower() not in ["y", "yes"]:
+            print("Cancelled.")
+            sys.exit(0)
+    update_all_products(args.replace, max(1, args.page))
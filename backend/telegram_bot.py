@@ -7,8 +7,6 @@ import os
 from datetime import datetime, date
 
 from dotenv import load_dotenv
-from groq import Groq
-from supabase import create_client, Client
 from telegram import Update
 from telegram.ext import (
     Application,
@@ -18,23 +16,19 @@ from telegram.ext import (
     ContextTypes,
 )
 
+from core import call, get_groq, get_supabase
+
 load_dotenv()
 
-SUPABASE_URL = os.getenv("SUPABASE_URL", "")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY", "")
-GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
 
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-groq_client = Groq(api_key=GROQ_API_KEY)
-
 
 # ── DB helpers ─────────────────────────────────────────────────────────────────
 
 def get_db_stats() -> dict:
     """Fetch live stats from the database."""
     try:
-        products_resp = supabase.table("products").select("id, created_at").execute()
+        products_resp = get_supabase().table("products").select("id, created_at").execute()
         all_products = products_resp.data or []
         total_products = len(all_products)
 
@@ -45,20 +39,20 @@ def get_db_stats() -> dict:
         )
 
         watchlist_resp = (
-            supabase.table("influencer_watchlist")
+            get_supabase().table("influencer_watchlist")
             .select("id")
             .eq("status", "active")
             .execute()
         )
         active_count = len(watchlist_resp.data or [])
 
-        config_resp = supabase.table("monster_config").select("*").limit(1).execute()
+        config_resp = get_supabase().table("monster_config").select("*").limit(1).execute()
         config = config_resp.data[0] if config_resp.data else {}
         is_active = config.get("is_active", False)
 
         # Top 5 influencers by product count
         top_resp = (
-            supabase.table("products")
+            get_supabase().table("products")
             .select("influencer_name")
             .execute()
         )
@@ -117,7 +111,9 @@ User Message: {user_message}
 Respond naturally with gangsta energy. If asking stats, give numbers with attitude. If chatting, keep it savage!"""
 
     try:
-        response = groq_client.chat.completions.create(
+        response = call(
+            "groq",
+            get_groq().chat.completions.create,
             model="llama-3.3-70b-versatile",
             messages=[{"role": "user", "content": system_prompt}],
             temperature=0.8,
@@ -162,13 +158,13 @@ async def cmd_status(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def cmd_start_monster(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
-        config_resp = supabase.table("monster_config").select("id").limit(1).execute()
+        config_resp = get_supabase().table("monster_config").select("id").limit(1).execute()
         if config_resp.data:
-            supabase.table("monster_config").update(
+            get_supabase().table("monster_config").update(
                 {"is_active": True, "updated_at": datetime.utcnow().isoformat()}
             ).eq("id", config_resp.data[0]["id"]).execute()
         else:
-            supabase.table("monster_config").insert(
+            get_supabase().table("monster_config").insert(
                 {"is_active": True, "monitoring_interval": 21600}
             ).execute()
         await update.message.reply_text(
@@ -181,9 +177,9 @@ async def cmd_start_monster(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
 async def cmd_stop_monster(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
-        config_resp = supabase.table("monster_config").select("id").limit(1).execute()
+        config_resp = get_supabase().table("monster_config").select("id").limit(1).execute()
         if config_resp.data:
-            supabase.table("monster_config").update(
+            get_supabase().table("monster_config").update(
                 {"is_active": False, "updated_at": datetime.utcnow().isoformat()}
             ).eq("id", config_resp.data[0]["id"]).execute()
         await update.message.reply_text(
@@ -216,14 +212,14 @@ async def cmd_parse(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Auto-add to watchlist if not there
         try:
             existing = (
-                supabase.table("influencer_watchlist")
+                get_supabase().table("influencer_watchlist")
                 .select("id")
                 .eq("handle", handle)
                 .eq("platform", "instagram")
                 .execute()
             )
             if not existing.data:
-                supabase.table("influencer_watchlist").insert(
+                get_supabase().table("influencer_watchlist").insert(
                     {
                         "handle": handle,
                         "platform": "instagram",
@@ -253,7 +249,7 @@ async def cmd_parse(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def cmd_watchlist(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         resp = (
-            supabase.table("influencer_watchlist")
+            get_supabase().table("influencer_watchlist")
             .select("*")
             .order("created_at", desc=True)
             .execute()
@@ -290,7 +286,7 @@ async def cmd_add(update: Update, context: ContextTypes.DEFAULT_TYPE):
     handle = args[0].lstrip("@")
     try:
         existing = (
-            supabase.table("influencer_watchlist")
+            get_supabase().table("influencer_watchlist")
             .select("id")
             .eq("handle", handle)
             .eq("platform", "instagram")
@@ -302,7 +298,7 @@ async def cmd_add(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
             return
 
-        supabase.table("influencer_watchlist").insert(
+        get_supabase().table("influencer_watchlist").insert(
             {
                 "handle": handle,
                 "platform": "instagram",
@@ -327,7 +323,7 @@ async def cmd_remove(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     handle = args[0].lstrip("@")
     try:
-        supabase.table("influencer_watchlist").delete().eq(
+        get_supabase().table("influencer_watchlist").delete().eq(
             "handle", handle
         ).eq("platform", "instagram").execute()
         await update.message.reply_text(
@@ -340,7 +336,7 @@ async def cmd_remove(update: Update, context: ContextTypes.DEFAULT_TYPE):
 async def cmd_logs(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         resp = (
-            supabase.table("processing_logs")
+            get_supabase().table("processing_logs")
             .select("*")
             .order("created_at", desc=True)
             .limit(10)
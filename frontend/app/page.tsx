@@ -12,6 +12,42 @@ const supabase = createClient(
 
 const API_URL = process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'
 
+// POST /ask/stream (Server-Sent Events): answer text as it's generated, then the /ask response
+async function askStream(question: string, onText: (text: string) => void) {
+  const res = await fetch(`${API_URL}/ask/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ question })
+  })
+  if (!res.ok || !res.body) throw new Error(`Server error: ${res.status}`)
+
+  const reader = res.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+  while (true) {
+    const { done, value } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+
+    let boundary
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const message = buffer.slice(0, boundary)
+      buffer = buffer.slice(boundary + 2)
+      let event = 'message'
+      let data = ''
+      for (const line of message.split('\n')) {
+        if (line.startsWith('event:')) event = line.slice(6).trim()
+        else if (line.startsWith('data:')) data += line.slice(5).trim()
+      }
+      if (!data) continue
+      const payload = JSON.parse(data)
+      if (event === 'delta') onText(payload.text)
+      else if (event === 'done') return payload
+    }
+  }
+  throw new Error('Answer stream ended early')
+}
+
 export default function HomePage() {
   const [query, setQuery] = useState('')
   const [products, setProducts] = useState<Product[]>([])
@@ -20,6 +56,7 @@ export default function HomePage() {
   const [error, setError] = useState('')
   const [aiMode, setAiMode] = useState(true)
   const [aiAnswer, setAiAnswer] = useState('')
+  const [answering, setAnswering] = useState(false)
 
 
 
@@ -50,14 +87,15 @@ export default function HomePage() {
 
     try {
       if (aiMode) {
-        // AI-powered Q&A
-        const res = await fetch(`${API_URL}/ask`, {
-          method: 'POST',
-          headers: { 'Content-Type': 'application/json' },
-          body: JSON.stringify({ question: searchQuery })
+        // AI-powered Q&A, streamed: show the answer as it's written, products when it's done
+        setProducts([])
+        setAnswering(true)
+        let answer = ''
+        const data = await askStream(searchQuery, (text) => {
+          answer += text
+          setAiAnswer(answer)
+          setLoading(false)
         })
-        if (!res.ok) throw new Error(`Server error: ${res.status}`)
-        const data = await res.json()
         setAiAnswer(data.answer)
         setProducts(data.products ?? [])
       } else {
@@ -74,6 +112,7 @@ export default function HomePage() {
       setProducts([])
     } finally {
       setLoading(false)
+      setAnswering(false)
     }
   }
 
@@ -124,7 +163,7 @@ export default function HomePage() {
         )}
 
         {/* Empty state after search */}
-        {!loading && searched && products.length === 0 && !error && (
+        {!loading && !answering && searched && products.length === 0 && !error && (
           <div className="text-center py-20">
             <p className="text-5xl mb-4">🔍</p>
             <h2 className="text-2xl font-semibold text-gray-700 mb-2">No products found</h2>